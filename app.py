@@ -12,7 +12,10 @@ from options_calculator import OptionsCalculator
 from strategies import OptionsStrategies
 from visualizations import OptionsVisualizer
 from risk_analyzer import RiskAnalyzer
-from config import MERVAL_TICKERS
+from strategy_search import StrategySearchEngine, StrikeIndex
+from config import MERVAL_TICKERS, REFERENCE_CONFIG
+from reference import get_reference_cache
+from utils import widen_frame
 
 # Configuración de la página
 st.set_page_config(
@@ -61,15 +64,59 @@ def initialize_analyzers(ticker):
         'calculator': OptionsCalculator(),
         'strategies': OptionsStrategies(),
         'visualizer': OptionsVisualizer(),
-        'risk_analyzer': RiskAnalyzer()
+        'risk_analyzer': RiskAnalyzer(),
+        'search_engine': StrategySearchEngine()
     }
 
-# Función para cargar datos
-@st.cache_data(ttl=60)  # Cache por 1 minuto
+# Precarga de datos de referencia de todo el universo: el cache de referencia la lanza una
+# sola vez por proceso (no depende de st.cache_resource, que se limpia al cambiar de ticker)
+def prefetch_reference_data():
+    if REFERENCE_CONFIG['PREFETCH_ON_STARTUP']:
+        get_reference_cache().start_prefetch(MERVAL_TICKERS.keys())
+
+# Función para cargar datos: sin st.cache_data, porque DataFetcher ya comparte y cachea la
+# descarga (stale-while-revalidate con CACHE_CONFIG/FETCH_CONFIG) y la edad, is_stale y
+# fetch_status se tienen que recalcular en cada rerun
 def load_market_data(ticker):
     analyzers = initialize_analyzers(ticker)
     return analyzers['data_fetcher'].get_market_data()
 
+# Búsqueda de estrategias sobre la cadena real
+@st.cache_data(ttl=60)
+def search_chain_strategies(ticker, current_price, risk_free_rate, default_sigma, use_rate_curve=False):
+    market_data = load_market_data(ticker)
+    analyzers = initialize_analyzers(ticker)
+    # Con la curva del Tesoro cada vencimiento usa su propia tasa
+    rate = market_data['rate_curve'] if use_rate_curve else risk_free_rate
+    return analyzers['search_engine'].search(
+        market_data['options_chain'], current_price, rate, default_sigma
+    )
+
+# Barrido de métricas de estrategias: uno por (ticker, precio, tasas, strikes, grilla de vols);
+# mover el slider de días es una búsqueda en el tensor
+@st.cache_resource(max_entries=16)
+def strategy_sweep(ticker, current_price, rate_key, strikes, sigmas, _rate):
+    return initialize_analyzers(ticker)['strategies'].sweep_strategy_metrics(
+        current_price, _rate, list(strikes), sigmas=list(sigmas)
+    )
+
+# Estrategias con precios de mercado de un vencimiento listado: mientras el slider no cambie
+# de vencimiento las entradas son las mismas y el resultado sale del cache
+@st.cache_data(ttl=60, max_entries=32)
+def analyze_listed_strategies(ticker, current_price, T, risk_free_rate, volatility, strikes,
+                              T_far, sigma_far, leg_prices, far_leg_prices):
+    return initialize_analyzers(ticker)['strategies'].analyze_all_strategies(
+        current_price, T, risk_free_rate, volatility, list(strikes), T_far=T_far,
+        sigma_far=sigma_far, leg_prices=leg_prices, far_leg_prices=far_leg_prices
+    )
+
+# Análisis de riesgo Monte Carlo cacheado por estrategia y parámetros
+@st.cache_data(ttl=300)
+def cached_strategy_risk(_risk_analyzer, strategy, current_price, risk_free_rate, volatility, T, num_simulations):
+    return _risk_analyzer.analyze_strategy_risk(
+        strategy, current_price, risk_free_rate, volatility, T, num_simulations
+    )
+
 # Limpiar cache cuando cambie el ticker
 def clear_cache_on_ticker_change():
     if 'previous_ticker' not in st.session_state:
@@ -77,6 +124,9 @@ def clear_cache_on_ticker_change():
     
     current_ticker = st.session_state.get('selected_ticker', 'GGAL')
     if st.session_state.previous_ticker != current_ticker:
+        # Solo la memoria del proceso: el disco lo comparten todas las réplicas y sus TTL
+        # ya acotan la antigüedad de los datos
+        DataFetcher(current_ticker).invalidate_cache()
         st.cache_data.clear()
         st.cache_resource.clear()
         st.session_state.previous_ticker = current_ticker
@@ -85,6 +135,7 @@ def clear_cache_on_ticker_change():
 def main():
     # Header
     st.markdown('<h1 class="main-header">📈 Análisis de Opciones S&P Merval - Tiempo Real</h1>', unsafe_allow_html=True)
+    prefetch_reference_data()
     
     # Selector de ticker en el sidebar
     st.sidebar.markdown('<div class="sidebar-header">🎯 Selección de Ticker</div>', unsafe_allow_html=True)
@@ -107,6 +158,12 @@ def main():
     # Sidebar configuración
     st.sidebar.markdown('<div class="sidebar-header">⚙️ Configuración</div>', unsafe_allow_html=True)
     
+    # Refresco explícito: descarta también los datos del ticker en el disco compartido
+    if st.sidebar.button("🔄 Forzar actualización", help="Vuelve a descargar los datos del ticker"):
+        DataFetcher(selected_ticker).invalidate_cache(disk=True)
+        st.cache_data.clear()
+        st.rerun()
+    
     # Auto-refresh
     auto_refresh = st.sidebar.checkbox("Auto-actualizar (30s)", value=True)
     if auto_refresh:
@@ -116,6 +173,7 @@ def main():
     # Configuración manual
     st.sidebar.subheader("Parámetros de Análisis")
       # Parámetros del mercado
+    use_rate_curve = st.sidebar.checkbox("Usar Curva del Tesoro", value=True)
     risk_free_rate = st.sidebar.slider("Tasa Libre de Riesgo (%)", 0.0, 10.0, 5.0, 0.1) / 100
     volatility_override = st.sidebar.slider("Volatilidad Implícita (%)", 10.0, 100.0, 30.0, 1.0) / 100
     use_historical_vol = st.sidebar.checkbox("Usar Volatilidad Histórica", value=True)
@@ -128,9 +186,20 @@ def main():
             market_data = load_market_data(selected_ticker)
             analyzers = initialize_analyzers(selected_ticker)
         
+        fetch_status = market_data.get('fetch_status', {})
         if market_data['current_price'] is None:
             st.error(f"❌ No se pudieron obtener datos de {selected_ticker}. Verifica la conexión o el ticker.")
+            if fetch_status.get('failures'):
+                st.caption(f"Próximo reintento en {fetch_status['retry_in']:.0f}s "
+                           f"({fetch_status['failures']} fallas seguidas)")
             return
+        
+        if fetch_status.get('failures'):
+            st.warning(f"⚠️ Yahoo Finance no responde para {selected_ticker} ({fetch_status['error']}). "
+                       f"Mostrando los últimos datos válidos; próximo reintento en {fetch_status['retry_in']:.0f}s.")
+        
+        if use_rate_curve:
+            risk_free_rate = market_data['risk_free_rate']
           # Información básica
         col1, col2, col3, col4 = st.columns(4)
         
@@ -153,14 +222,17 @@ def main():
             st.metric(
                 "Tasa Libre Riesgo",
                 f"{risk_free_rate * 100:.1f}%",
-                "Treasury 10Y" if risk_free_rate == market_data['risk_free_rate'] else "Manual"
+                "Curva Tesoro" if use_rate_curve else "Manual"
             )
         
         with col4:
+            age = market_data.get('age_seconds')
             st.metric(
                 "Última Actualización",
                 market_data['last_update'].strftime("%H:%M:%S"),
-                market_data['last_update'].strftime("%d/%m/%Y")
+                f"hace {age:.0f}s · actualizando" if market_data.get('is_stale') and age is not None
+                else market_data['last_update'].strftime("%d/%m/%Y"),
+                delta_color="off"
             )
         
         # Tabs principales
@@ -212,14 +284,23 @@ def main():
             with col1:
                 expiration_days = st.slider("Días hasta Expiración", 7, 365, 30)
                 T = expiration_days / 365.25
+                # Vencimiento lejano para calendar/diagonal spreads
+                T_far = 2 * T
+                if use_rate_curve:
+                    risk_free_rate = market_data['rate_curve'](T)
             
             with col2:
                 strategy_type = st.selectbox(
                     "Tipo de Estrategia",
                     ["Todas", "Covered Call", "Protective Put", "Long Straddle", 
-                     "Iron Condor", "Butterfly Spread", "Collar"]
+                     "Iron Condor", "Butterfly Spread", "Collar", "Calendar Spread", "Diagonal Spread"]
                 )
             
+            evaluation_day = st.slider(
+                "Evaluar P&L a T+n días", 0, expiration_days, min(7, expiration_days),
+                help="Curva de P&L antes de expiración revaluando las patas con Black-Scholes"
+            )
+            
             # Generar strikes alrededor del precio actual
             current_price = market_data['current_price']
             strikes = [
@@ -230,84 +311,202 @@ def main():
                 current_price * 1.10
             ]
             
+            # Strikes listados del vencimiento más cercano, con sus precios de mercado
+            market_leg_prices = None
+            far_leg_prices = None
+            far_index = None
+            listed_iv = None
+            use_listed_strikes = st.checkbox(
+                "Usar strikes listados", value=bool(market_data['options_chain']),
+                help="Lleva los strikes a los que cotizan en el vencimiento listado más cercano y usa sus precios de mercado"
+            )
+            if use_listed_strikes and market_data['options_chain']:
+                listed_expiration = StrikeIndex.nearest_expiration(market_data['options_chain'], expiration_days)
+                strike_index = StrikeIndex(market_data['options_chain'][listed_expiration], listed_expiration)
+                listed_strikes = strike_index.snap(strikes)
+                if listed_strikes is not None:
+                    strikes = listed_strikes
+                    market_leg_prices = strike_index.leg_prices(strikes)
+                    listed_iv = strike_index.atm_iv(current_price)
+                    T = analyzers['calculator'].time_to_expiration(listed_expiration)
+                    T_far = 2 * T
+                    # Pata lejana de calendar/diagonal: el siguiente vencimiento listado, a su mid
+                    far_expiration = StrikeIndex.next_expiration(market_data['options_chain'], listed_expiration)
+                    if far_expiration is not None:
+                        far_index = StrikeIndex(market_data['options_chain'][far_expiration], far_expiration)
+                        far_leg_prices = far_index.leg_prices(strikes)
+                        T_far = analyzers['calculator'].time_to_expiration(far_expiration)
+                    if use_rate_curve:
+                        risk_free_rate = market_data['rate_curve'](T)
+                    st.caption(f"Strikes listados del vencimiento {listed_expiration} ({T * 365.25:.0f} días): "
+                               f"{', '.join(f'{k:.2f}' for k in strikes)}"
+                               + (f" · pata lejana {far_expiration} ({T_far * 365.25:.0f} días)" if far_index else ""))
+                else:
+                    st.caption("El vencimiento listado no tiene strikes suficientes; se usan strikes teóricos")
+            
             vol_to_use = market_data['historical_volatility'] if use_historical_vol else volatility_override
+            if listed_iv is not None and use_historical_vol:
+                # Con strikes listados el modelo usa la IV ATM cotizada del vencimiento (salvo volatilidad manual)
+                vol_to_use = listed_iv
+                st.caption(f"Volatilidad: IV ATM de {listed_expiration} ({listed_iv * 100:.1f}%)")
+            
+            # Volatilidad de la pata lejana: IV ATM de su vencimiento listado (o del más cercano a T_far)
+            if far_index is None and market_data['options_chain']:
+                far_expiration = StrikeIndex.nearest_expiration(market_data['options_chain'], T_far * 365.25)
+                far_index = StrikeIndex(market_data['options_chain'][far_expiration], far_expiration)
+            sigma_far = far_index.atm_iv(current_price) if far_index is not None else None
+            
+            # Estrategias completas (payoff y patas) solo para las que se grafican
+            def build_strategies(names):
+                return analyzers['strategies'].analyze_all_strategies(
+                    current_price, T, risk_free_rate, vol_to_use, strikes, T_far=T_far,
+                    sigma_far=sigma_far, leg_prices=market_leg_prices, names=names,
+                    far_leg_prices=far_leg_prices
+                )
             
             # Analizar estrategias
             with st.spinner("Analizando estrategias..."):
                 if strategy_type == "Todas":
-                    strategies = analyzers['strategies'].analyze_all_strategies(
-                        current_price, T, risk_free_rate, vol_to_use, strikes
-                    )
+                    # Barrido precalculado sobre todo el rango de días y una grilla de volatilidades
+                    sigma_grid = tuple(sorted({*np.round(np.arange(0.10, 1.001, 0.05), 4).tolist(), round(vol_to_use, 4)}))
+                    sweep_rate = market_data['rate_curve'] if use_rate_curve else risk_free_rate
+                    rate_key = tuple(sweep_rate.to_dict().items()) if use_rate_curve else risk_free_rate
+                    sweep = strategy_sweep(selected_ticker, current_price, rate_key, tuple(strikes), sigma_grid, sweep_rate)
+                    
+                    if market_leg_prices is None:
+                        # Mover el slider es una búsqueda en el tensor, no un recálculo
+                        strategy_metrics = sweep.metrics(expiration_days, vol_to_use)
+                        # Los spreads de dos vencimientos no forman parte del barrido
+                        strategies = build_strategies(['calendar_call', 'diagonal_call'])
+                        strategy_metrics.update(strategies)
+                    else:
+                        # Precios de mercado del vencimiento listado: cacheado mientras no cambie el vencimiento
+                        strategies = analyze_listed_strategies(
+                            selected_ticker, current_price, T, risk_free_rate, vol_to_use, tuple(strikes),
+                            T_far, sigma_far, market_leg_prices, far_leg_prices
+                        )
+                        strategy_metrics = strategies
                 else:
                     strategies = {}
                     if strategy_type == "Covered Call":
                         strategies['covered_call'] = analyzers['strategies'].covered_call(
-                            current_price, strikes[2], T, risk_free_rate, vol_to_use
+                            current_price, strikes[2], T, risk_free_rate, vol_to_use,
+                            leg_prices=market_leg_prices
                         )
                     elif strategy_type == "Protective Put":
                         strategies['protective_put'] = analyzers['strategies'].protective_put(
-                            current_price, strikes[1], T, risk_free_rate, vol_to_use
+                            current_price, strikes[1], T, risk_free_rate, vol_to_use,
+                            leg_prices=market_leg_prices
                         )
                     elif strategy_type == "Long Straddle":
                         strategies['long_straddle'] = analyzers['strategies'].long_straddle(
-                            current_price, strikes[2], T, risk_free_rate, vol_to_use
+                            current_price, strikes[2], T, risk_free_rate, vol_to_use,
+                            leg_prices=market_leg_prices
                         )
                     elif strategy_type == "Iron Condor":
                         strategies['iron_condor'] = analyzers['strategies'].iron_condor(
                             current_price, strikes[0], strikes[1], strikes[3], strikes[4],
-                            T, risk_free_rate, vol_to_use
+                            T, risk_free_rate, vol_to_use,
+                            leg_prices=market_leg_prices
                         )
                     elif strategy_type == "Butterfly Spread":
                         strategies['butterfly_call'] = analyzers['strategies'].butterfly_spread(
                             current_price, strikes[1], strikes[2], strikes[3],
-                            T, risk_free_rate, vol_to_use, 'call'
+                            T, risk_free_rate, vol_to_use, 'call',
+                            leg_prices=market_leg_prices
                         )
                     elif strategy_type == "Collar":
                         strategies['collar'] = analyzers['strategies'].collar(
-                            current_price, strikes[1], strikes[3], T, risk_free_rate, vol_to_use
+                            current_price, strikes[1], strikes[3], T, risk_free_rate, vol_to_use,
+                            leg_prices=market_leg_prices
                         )
+                    elif strategy_type == "Calendar Spread":
+                        strategies['calendar_call'] = analyzers['strategies'].calendar_spread(
+                            current_price, strikes[2], T, T_far, risk_free_rate, vol_to_use, sigma_far,
+                            leg_prices=market_leg_prices, far_leg_prices=far_leg_prices
+                        )
+                    elif strategy_type == "Diagonal Spread":
+                        strategies['diagonal_call'] = analyzers['strategies'].diagonal_spread(
+                            current_price, strikes[3], strikes[2], T, T_far, risk_free_rate, vol_to_use, sigma_far,
+                            leg_prices=market_leg_prices, far_leg_prices=far_leg_prices
+                        )
+                    strategy_metrics = strategies
             
-            if strategies:
-                # Ranking de estrategias
-                ranked_strategies = analyzers['strategies'].rank_strategies(strategies, 'risk_reward')
-                
+            if strategy_metrics:
                 # Mostrar tabla resumen
-                summary_df = analyzers['visualizer'].create_strategy_summary_table(strategies)
+                summary_df = analyzers['visualizer'].create_strategy_summary_table(strategy_metrics)
                 st.subheader("📊 Resumen de Estrategias")
                 st.dataframe(summary_df, use_container_width=True)
                 
+                charted = strategies
+                if strategy_type == "Todas":
+                    prob_by_days = pd.DataFrame({
+                        name.replace('_', ' ').title(): sweep.metric_curve(name, 'probability_profit', vol_to_use) * 100
+                        for name in sweep.names
+                    })
+                    st.subheader("📅 Probabilidad de Ganancia por Días hasta Expiración")
+                    st.line_chart(prob_by_days)
+                    
+                    # Solo se arman y grafican las estrategias elegidas (por defecto las más probables)
+                    ranked_strategies = analyzers['strategies'].rank_strategies(strategy_metrics, 'probability')
+                    charted_names = st.multiselect(
+                        "Estrategias a graficar", list(strategy_metrics),
+                        default=[name for name, _, _ in ranked_strategies[:3]]
+                    )
+                    missing = [name for name in charted_names if name not in strategies]
+                    if missing:
+                        strategies = {**strategies, **build_strategies(missing)}
+                    charted = {name: strategies[name] for name in charted_names}
+                
                 # Gráficos de payoff
                 st.subheader("📈 Gráficos de Payoff")
                 
-                if len(strategies) > 1:
+                if len(charted) > 1:
                     # Comparación múltiple
-                    comparison_fig = analyzers['visualizer'].plot_strategy_comparison(strategies)
+                    comparison_fig = analyzers['visualizer'].plot_strategy_comparison(charted)
                     st.plotly_chart(comparison_fig, use_container_width=True)
                 
                 # Gráficos individuales
-                for name, strategy in strategies.items():
+                for name, strategy in charted.items():
                     with st.expander(f"📊 {strategy.get('strategy', name)}"):
                         col1, col2 = st.columns([2, 1])
                         
                         with col1:
-                            payoff_fig = analyzers['visualizer'].plot_option_payoff(strategy)
+                            pnl_surface = analyzers['strategies'].pnl_surface(
+                                strategy, T, risk_free_rate, vol_to_use,
+                                days_elapsed=sorted({0, evaluation_day, expiration_days})
+                            )
+                            payoff_fig = analyzers['visualizer'].plot_option_payoff(strategy, pnl_surface=pnl_surface)
                             st.plotly_chart(payoff_fig, use_container_width=True)
                         
                         with col2:
-                            # Análisis de riesgo para esta estrategia
-                            risk_results = analyzers['risk_analyzer'].analyze_strategy_risk(
-                                strategy, current_price, risk_free_rate, vol_to_use, T, 1000
-                            )
-                            
+                            # Métricas cerradas (lognormal); la simulación Monte Carlo está en Gestión de Riesgo
+                            metrics = strategy_metrics[name]
                             st.markdown("**Métricas de Riesgo:**")
-                            st.write(f"Retorno Esperado: ${risk_results['expected_return']:.2f}")
-                            st.write(f"Volatilidad: ${risk_results['volatility']:.2f}")
-                            st.write(f"VaR 95%: ${risk_results['var_95']:.2f}")
-                            st.write(f"Prob. Ganancia: {risk_results['prob_profit']*100:.1f}%")
+                            st.write(f"Payoff Esperado: ${metrics['expected_payoff']:.2f}")
+                            st.write("Max Ganancia: Ilimitado" if np.isinf(metrics['max_profit']) else f"Max Ganancia: ${metrics['max_profit']:.2f}")
+                            st.write(f"Max Pérdida: ${metrics['max_loss']:.2f}")
+                            st.write(f"Prob. Ganancia: {metrics['probability_profit']*100:.1f}%")
                             
                             # Gráfico radar de riesgo
                             radar_fig = analyzers['visualizer'].plot_risk_metrics_radar(strategy)
                             st.plotly_chart(radar_fig, use_container_width=True)
+            
+            # Búsqueda sobre strikes y vencimientos listados
+            if market_data['options_chain']:
+                st.subheader("🔎 Mejores Estrategias en la Cadena")
+                with st.spinner("Buscando estrategias en la cadena de opciones..."):
+                    # Con la curva del Tesoro la tasa del slider de días no interviene (ni invalida el cache)
+                    search_results = search_chain_strategies(
+                        selected_ticker, current_price, None if use_rate_curve else risk_free_rate,
+                        vol_to_use, use_rate_curve
+                    )
+                
+                if not search_results.empty:
+                    st.caption(f"{search_results.attrs.get('candidates_evaluated', 0):,} combinaciones evaluadas")
+                    st.dataframe(search_results.drop(columns=['components']).round(4), use_container_width=True)
+                else:
+                    st.info("No se encontraron estrategias que cumplan los filtros en la cadena")
         
         with tab3:
             st.subheader("📈 Análisis Técnico Avanzado")
@@ -319,17 +518,14 @@ def main():
                 with col1:
                     st.subheader("Análisis de Volatilidad")
                     
-                    # Calcular volatilidad rodante
                     returns = np.log(market_data['historical_data']['Close'] / 
                                    market_data['historical_data']['Close'].shift(1)).dropna()
                     
+                    # Volatilidad rodante ya calculada por el motor de indicadores
                     vol_windows = [20, 50, 100]
-                    vol_data = {}
-                    
-                    for window in vol_windows:
-                        vol_data[f'Vol_{window}d'] = returns.rolling(window).std() * np.sqrt(252) * 100
-                    
-                    vol_df = pd.DataFrame(vol_data, index=returns.index)
+                    vol_df = market_data['indicator_history'][[f'vol_{window}' for window in vol_windows]] * 100
+                    vol_df.columns = [f'Vol_{window}d' for window in vol_windows]
+                    vol_df = vol_df.dropna(how='all')
                     st.line_chart(vol_df)
                     
                     # Estadísticas de volatilidad
@@ -359,12 +555,13 @@ def main():
             st.subheader("⚠️ Gestión de Riesgo")
             
             # Seleccionar estrategia para análisis de riesgo
-            if 'strategies' in locals() and strategies:
-                strategy_names = list(strategies.keys())
+            if 'strategy_metrics' in locals() and strategy_metrics:
+                strategy_names = list(strategy_metrics.keys())
                 selected_strategy = st.selectbox("Seleccionar Estrategia para Análisis", strategy_names)
                 
                 if selected_strategy:
-                    strategy = strategies[selected_strategy]
+                    # Con "Todas" solo se arma la estrategia elegida
+                    strategy = strategies.get(selected_strategy) or build_strategies([selected_strategy])[selected_strategy]
                     
                     col1, col2 = st.columns(2)
                     
@@ -372,8 +569,8 @@ def main():
                         st.subheader("Simulación Monte Carlo")
                         
                         # Análisis de riesgo completo
-                        risk_results = analyzers['risk_analyzer'].analyze_strategy_risk(
-                            strategy, current_price, risk_free_rate, vol_to_use, T, num_simulations
+                        risk_results = cached_strategy_risk(
+                            analyzers['risk_analyzer'], strategy, current_price, risk_free_rate, vol_to_use, T, num_simulations
                         )
                         
                         # Métricas principales
@@ -424,6 +621,10 @@ def main():
             
             options_chain = market_data['options_chain']
             
+            chain_errors = market_data.get('options_chain_errors', {})
+            if chain_errors:
+                st.warning(f"⚠️ No se pudieron descargar {len(chain_errors)} vencimientos: {', '.join(chain_errors)}")
+            
             if options_chain:
                 # Selector de fecha de expiración
                 expiration_dates = list(options_chain.keys())
@@ -431,6 +632,10 @@ def main():
                 
                 if selected_expiration:
                     chain_data = options_chain[selected_expiration]
+                    if use_rate_curve:
+                        risk_free_rate = market_data['rate_curve'](
+                            analyzers['calculator'].time_to_expiration(selected_expiration)
+                        )
                     
                     col1, col2 = st.columns(2)
                     
@@ -438,9 +643,10 @@ def main():
                         st.subheader("📞 Calls")
                         if not chain_data['calls'].empty:
                             # Analizar cadena de calls
-                            calls_analyzed = analyzers['calculator'].analyze_option_chain(
-                                chain_data['calls'], current_price, risk_free_rate, selected_expiration
-                            )
+                            # El cache guarda el análisis compacto; se amplía a float64 solo para mostrarlo
+                            calls_analyzed = widen_frame(analyzers['data_fetcher'].get_analyzed_chain(
+                                selected_expiration, 'calls', current_price, risk_free_rate
+                            ))
                             
                             if not calls_analyzed.empty:
                                 # Seleccionar columnas disponibles
@@ -464,9 +670,10 @@ def main():
                         st.subheader("📉 Puts")
                         if not chain_data['puts'].empty:
                             # Analizar cadena de puts
-                            puts_analyzed = analyzers['calculator'].analyze_option_chain(
-                                chain_data['puts'], current_price, risk_free_rate, selected_expiration
-                            )
+                            # El cache guarda el análisis compacto; se amplía a float64 solo para mostrarlo
+                            puts_analyzed = widen_frame(analyzers['data_fetcher'].get_analyzed_chain(
+                                selected_expiration, 'puts', current_price, risk_free_rate
+                            ))
                             
                             if not puts_analyzed.empty:
                                 # Seleccionar columnas disponibles
@@ -0,0 +1,261 @@
+"""
+Benchmarks de rendimiento del análisis de opciones.
+
+Uso:
+    python benchmarks.py
+"""
+
+import sys
+import time
+import numpy as np
+
+
+def timed(func, repeats: int = 5) -> float:
+    """Devuelve el mejor tiempo (segundos) de varias ejecuciones"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_analyze_all_strategies(num_strikes: int = 50, repeats: int = 5):
+    """Compara analyze_all_strategies con tabla compartida contra el precio pata por pata"""
+    from strategies import OptionsStrategies
+    from options_calculator import OptionsCalculator
+
+    print(f"\n⏱️ analyze_all_strategies con {num_strikes} strikes")
+
+    strategies = OptionsStrategies()
+    S, T, r, sigma = 100.0, 30 / 365.25, 0.05, 0.3
+    strikes = list(np.linspace(S * 0.75, S * 1.25, num_strikes))
+
+    # Contar llamadas de Black-Scholes escalares: con la tabla solo quedan las del vencimiento lejano
+    calls = {'count': 0}
+    original_call, original_put = OptionsCalculator.black_scholes_call, OptionsCalculator.black_scholes_put
+
+    def counting(func):
+        def wrapper(*args, **kwargs):
+            calls['count'] += 1
+            return func(*args, **kwargs)
+        return staticmethod(wrapper)
+
+    OptionsCalculator.black_scholes_call = counting(original_call)
+    OptionsCalculator.black_scholes_put = counting(original_put)
+    try:
+        result = strategies.analyze_all_strategies(S, T, r, sigma, strikes)
+        shared_calls = calls['count']
+
+        calls['count'] = 0
+        for strike in strikes:
+            strategies.covered_call(S, strike, T, r, sigma)
+            strategies.protective_put(S, strike, T, r, sigma)
+        per_leg_calls = calls['count']
+    finally:
+        OptionsCalculator.black_scholes_call = staticmethod(original_call)
+        OptionsCalculator.black_scholes_put = staticmethod(original_put)
+
+    def per_leg():
+        for strike in strikes:
+            strategies.covered_call(S, strike, T, r, sigma)
+            strategies.protective_put(S, strike, T, r, sigma)
+        strategies.long_straddle(S, strikes[1], T, r, sigma)
+        strategies.butterfly_spread(S, strikes[0], strikes[1], strikes[2], T, r, sigma, 'call')
+        strategies.collar(S, strikes[0], strikes[2], T, r, sigma)
+        strategies.iron_condor(S, strikes[0], strikes[1], strikes[2], strikes[3], T, r, sigma)
+
+    table_time = timed(lambda: strategies.price_leg_table(S, strikes, T, r, sigma), repeats)
+    shared_time = timed(lambda: strategies.analyze_all_strategies(S, T, r, sigma, strikes), repeats)
+    per_leg_time = timed(per_leg, repeats)
+
+    print(f"   Estrategias analizadas: {len(result)}")
+    print(f"   Tabla de precios ({2 * num_strikes} patas únicas): {table_time * 1000:.2f} ms")
+    print(f"   Con tabla compartida: {shared_time * 1000:.2f} ms ({shared_calls} llamadas Black-Scholes escalares)")
+    print(f"   Pata por pata: {per_leg_time * 1000:.2f} ms (>= {per_leg_calls} llamadas Black-Scholes escalares)")
+
+    return {
+        'num_strategies': len(result),
+        'table_seconds': table_time,
+        'shared_seconds': shared_time,
+        'per_leg_seconds': per_leg_time
+    }
+
+
+def benchmark_strategy_sweep(num_strikes: int = 5):
+    """Tiempo de construir el barrido días x volatilidad contra la consulta de un punto"""
+    from strategies import OptionsStrategies
+
+    print(f"\n⏱️ sweep_strategy_metrics con {num_strikes} strikes")
+
+    strategies = OptionsStrategies()
+    S, r = 100.0, 0.05
+    strikes = list(np.linspace(S * 0.9, S * 1.1, num_strikes))
+
+    start = time.perf_counter()
+    sweep = strategies.sweep_strategy_metrics(S, r, strikes)
+    build_time = time.perf_counter() - start
+
+    lookup_time = timed(lambda: strategies.sweep_strategy_metrics(S, r, strikes).slice(45, 0.3), 20)
+    recompute_time = timed(lambda: strategies.analyze_all_strategies(S, 45 / 365.25, r, 0.3, strikes), 20)
+
+    print(f"   Tensor: {sweep.values.shape} ({sweep.values.size:,} valores)")
+    print(f"   Construcción: {build_time * 1000:.1f} ms")
+    print(f"   Consulta de un punto: {lookup_time * 1000:.2f} ms")
+    print(f"   Recalcular analyze_all_strategies: {recompute_time * 1000:.2f} ms")
+
+    return {
+        'build_seconds': build_time,
+        'lookup_seconds': lookup_time,
+        'recompute_seconds': recompute_time
+    }
+
+
+def benchmark_market_data_pipeline(num_tickers: int = 20, latency: float = 0.02):
+    """Refresco completo del universo sobre snapshots reproducidos (sin red)"""
+    import tempfile
+    from data_fetcher import DataFetcher, UniverseFetcher
+    from providers import ReplayProvider
+    from fixtures import build_synthetic_snapshot
+
+    print(f"\n⏱️ Pipeline de datos con {num_tickers} tickers reproducidos ({latency * 1000:.0f} ms por llamada)")
+
+    root = tempfile.mkdtemp()
+    tickers = [f"T{i:02d}" for i in range(num_tickers)]
+    for i, ticker in enumerate(tickers):
+        build_synthetic_snapshot(root, ticker, S=50.0 + i, seed=i)
+
+    provider = ReplayProvider(root, latency=latency)
+    start = time.perf_counter()
+    for ticker in tickers:
+        DataFetcher(ticker, provider=provider).get_market_data()
+    per_ticker_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    market_data = UniverseFetcher(tickers, provider=provider).get_market_data()
+    universe_time = time.perf_counter() - start
+
+    print(f"   DataFetcher por ticker: {per_ticker_time:.2f} s")
+    print(f"   UniverseFetcher: {universe_time:.2f} s ({len(market_data)} tickers)")
+
+    return {
+        'per_ticker_seconds': per_ticker_time,
+        'universe_seconds': universe_time
+    }
+
+
+def benchmark_chain_snapshot_scan(num_days: int = 20, snapshots_per_day: int = 780):
+    """Consulta de la serie de un contrato sobre días de snapshots cada 30 segundos"""
+    import tempfile
+    import pandas as pd
+    from datetime import datetime, timedelta
+    from storage import ChainSnapshotStore
+    from fixtures import build_synthetic_chain
+    
+    print(f"\n⏱️ Snapshots de cadenas: {num_days} días x {snapshots_per_day} snapshots")
+    
+    store = ChainSnapshotStore(tempfile.mkdtemp())
+    chain = build_synthetic_chain()
+    template = ChainSnapshotStore.build_snapshot(chain, 100.0, 0.05, datetime(2025, 1, 2, 14, 30))
+    offsets = pd.to_timedelta(np.arange(snapshots_per_day) * 30, unit='s')
+    
+    start = time.perf_counter()
+    for day in range(num_days):
+        # Un día completo de snapshots escrito de una vez y compactado
+        day_start = template['snapshot_time'].iloc[0] + timedelta(days=day)
+        snapshots = pd.concat([template.assign(snapshot_time=day_start + offset) for offset in offsets],
+                              ignore_index=True)
+        store.append('BENCH', snapshots)
+        store.compact('BENCH', day_start.date())
+    store.flush()
+    write_time = time.perf_counter() - start
+    
+    contract = chain[list(chain)[0]]['calls']['contractSymbol'].iloc[10]
+    rows = len(template) * snapshots_per_day * num_days
+    contract_time = timed(lambda: store.query('BENCH', contract=contract,
+                                              columns=['impliedVolatility', 'delta']), 3)
+    strike_time = timed(lambda: store.query('BENCH', option_type='put', strike_range=(95, 105),
+                                            columns=['strike', 'impliedVolatility']), 3)
+    
+    print(f"   Filas guardadas: {rows:,} (escritura {write_time:.2f} s)")
+    print(f"   Serie de un contrato: {contract_time * 1000:.1f} ms")
+    print(f"   Puts entre 95 y 105: {strike_time * 1000:.1f} ms")
+    
+    return {
+        'rows': rows,
+        'write_seconds': write_time,
+        'contract_seconds': contract_time,
+        'strike_range_seconds': strike_time
+    }
+
+
+def benchmark_payoff_matrix(num_strategies: int = 500, num_points: int = 200):
+    """Payoff de muchas estrategias: matriz vectorizada contra el bucle precio x pata"""
+    from utils import payoff_matrix
+    
+    print(f"\n⏱️ payoff_matrix con {num_strategies} estrategias y {num_points} precios")
+    
+    rng = np.random.default_rng(0)
+    S = 100.0
+    strategies = []
+    for _ in range(num_strategies):
+        k1, k2, k3, k4 = np.sort(rng.uniform(80, 120, 4))
+        strategies.append([
+            {'type': 'put', 'quantity': 1, 'strike': k1, 'price': 0.5},
+            {'type': 'put', 'quantity': -1, 'strike': k2, 'price': 1.5},
+            {'type': 'call', 'quantity': -1, 'strike': k3, 'price': 1.5},
+            {'type': 'call', 'quantity': 1, 'strike': k4, 'price': 0.5}
+        ])
+    prices = np.linspace(S * 0.7, S * 1.3, num_points)
+    
+    def loop():
+        rows = []
+        for components in strategies:
+            row = []
+            for price in prices:
+                total = 0.0
+                for c in components:
+                    intrinsic = max(price - c['strike'], 0) if c['type'] == 'call' else max(c['strike'] - price, 0)
+                    total += c['quantity'] * (intrinsic - c['price'])
+                row.append(total)
+            rows.append(row)
+        return rows
+    
+    vectorized_time = timed(lambda: payoff_matrix(strategies, prices), 3)
+    loop_time = timed(loop, 1)
+    
+    print(f"   Vectorizado: {vectorized_time * 1000:.1f} ms")
+    print(f"   Bucle: {loop_time * 1000:.1f} ms")
+    
+    return {
+        'vectorized_seconds': vectorized_time,
+        'loop_seconds': loop_time
+    }
+
+
+BENCHMARKS = [
+    ("analyze_all_strategies", benchmark_analyze_all_strategies),
+    ("sweep_strategy_metrics", benchmark_strategy_sweep),
+    ("market_data_pipeline", benchmark_market_data_pipeline),
+    ("chain_snapshot_scan", benchmark_chain_snapshot_scan),
+    ("payoff_matrix", benchmark_payoff_matrix),
+]
+
+
+def main():
+    """Ejecuta todos los benchmarks"""
+    print("🚀 BENCHMARKS DEL SISTEMA DE ANÁLISIS DE OPCIONES")
+    print("=" * 60)
+
+    for name, benchmark in BENCHMARKS:
+        try:
+            benchmark()
+        except Exception as e:
+            print(f"❌ {name}: ERROR - {e}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -59,7 +59,28 @@ OPTIONS_CONFIG = {
     'MAX_DAYS_TO_EXPIRATION': 365,
     'DEFAULT_DAYS_TO_EXPIRATION': 30,
     'STRIKE_RANGE': [-0.2, 0.2],  # ±20% del precio actual
-    'NUM_STRIKES': 5
+    'NUM_STRIKES': 5,
+    'MAX_EXPIRATIONS': 6,         # vencimientos a descargar por cadena
+    'COMPACT_CHAINS': True,       # float32, categorías y solo las columnas usadas
+    # Columnas de la cadena de yfinance que usa el análisis (el resto se descarta)
+    'CHAIN_COLUMNS': ['contractSymbol', 'strike', 'lastPrice', 'bid', 'ask',
+                      'volume', 'openInterest', 'impliedVolatility']
+}
+
+# Configuraciones de búsqueda de estrategias sobre la cadena
+SEARCH_CONFIG = {
+    'MIN_DAYS_TO_EXPIRATION': 7,
+    'MAX_DAYS_TO_EXPIRATION': 120,
+    'MIN_OPEN_INTEREST': 10,
+    'MAX_SPREAD_PCT': 0.5,       # spread bid-ask máximo como fracción del mid
+    'MAX_WIDTH_PCT': 0.2,        # ancho máximo entre strikes como fracción del spot
+    'TOP_K': 20,
+    'WEIGHTS': {
+        'probability_profit': 0.4,
+        'risk_reward': 0.3,
+        'expected_payoff': 0.2,
+        'liquidity': 0.1
+    }
 }
 
 # Configuraciones de riesgo
@@ -78,7 +99,85 @@ RISK_CONFIG = {
 API_CONFIG = {
     'YAHOO_FINANCE_URL': 'https://finance.yahoo.com',
     'BACKUP_DATA_SOURCE': None,
-    'TIMEOUT': 30  # segundos
+    'TIMEOUT': 30,  # segundos por pedido (en la cadena, por vencimiento desde que empieza su descarga)
+    'MAX_WORKERS': 6  # descargas concurrentes por ticker
+}
+
+# Resiliencia de las descargas (stale-while-revalidate, backoff y corte por ticker)
+FETCH_CONFIG = {
+    'FRESH_SECONDS': 30,      # edad hasta la que se sirven los datos sin refrescar
+    'FAILURE_THRESHOLD': 3,   # fallas seguidas para abrir el circuito de un ticker
+    'BACKOFF_BASE': 2,        # segundos de espera tras la primera falla (se duplica)
+    'BACKOFF_MAX': 300,       # espera máxima entre intentos
+    'REFRESH_WORKERS': 4      # refrescos en segundo plano simultáneos
+}
+
+# Barras intradía de 1 minuto en memoria
+INTRADAY_CONFIG = {
+    'POLL_SECONDS': 15,   # intervalo del sondeo en segundo plano
+    'MAX_BARS': 1000      # barras que se conservan por ticker
+}
+
+# Indicadores técnicos (motor incremental)
+INDICATOR_CONFIG = {
+    'SMA_WINDOWS': (20, 50),
+    'BB_WINDOW': 20,
+    'BB_WIDTH': 2.0,
+    'RSI_PERIOD': 14,
+    'VOL_WINDOWS': (20, 50, 100, 252)  # volatilidad realizada anualizada
+}
+
+# Cache de DataFetcher: memoria del proceso y disco compartido por los procesos del host
+CACHE_CONFIG = {
+    'MAX_ENTRIES': 512,
+    'MAX_BYTES': 256 * 1024 * 1024,  # tamaño aproximado máximo
+    'PRICE_TTL': 10,                 # segundos
+    'HISTORY_TTL': 300,
+    'CHAIN_TTL': 30,
+    'ANALYZED_PRICE_STEP': 0.0025,   # paso relativo del subyacente en la clave de las cadenas analizadas
+    # Segundo nivel en disco (SQLite) compartido por las réplicas de la app en el host
+    'DISK_ENABLED': True,
+    'DISK_PATH': None,                    # None = <DATA_DIR>/cache.sqlite
+    'DISK_MAX_BYTES': 1024 * 1024 * 1024
+}
+
+# Configuración de la descarga masiva del universo Merval
+UNIVERSE_CONFIG = {
+    'REFRESH_WINDOW': 60,      # segundos para refrescar todo el universo
+    'CHAIN_WORKERS': 4,        # tickers cuyas cadenas se descargan a la vez
+    'HISTORY_PERIOD': '2y'
+}
+
+# Proveedor de datos de mercado (la variable de entorno MARKET_DATA_PROVIDER tiene prioridad)
+PROVIDER_CONFIG = {
+    'DEFAULT': 'yfinance',               # 'yfinance' o 'replay'
+    'REPLAY_DIR': 'market_data/replay',  # snapshots grabados con providers.record_snapshot
+    'REPLAY_SPEED': None,                # None = snapshot completo; 60 = un minuto de mercado por segundo
+    'REPLAY_LATENCY': 0.0                # demora artificial por llamada (segundos)
+}
+
+# Curva de tasas libres de riesgo (rendimientos del Tesoro de EE.UU.)
+RATES_CONFIG = {
+    'TENORS': {'^IRX': 0.25, '^FVX': 5.0, '^TNX': 10.0, '^TYX': 30.0},  # símbolo: plazo en años
+    'TTL': 3600,          # segundos entre descargas de la curva
+    'FALLBACK_TTL': 60,   # segundos hasta reintentar si la descarga no trajo datos
+    'DEFAULT_RATE': 0.05  # si no hay datos
+}
+
+# Datos de referencia (información de la empresa, vencimientos listados)
+REFERENCE_CONFIG = {
+    'TTL': 86400,                 # segundos; además vencen al cambiar el día
+    'DISK_ENABLED': True,         # persistir en market_data/reference (solo proveedores en vivo)
+    'PREFETCH_WORKERS': 4,        # tickers consultados a la vez en la precarga
+    'PREFETCH_ON_STARTUP': True   # precargar MERVAL_TICKERS al iniciar la app
+}
+
+# Almacenamiento local de datos de mercado
+STORAGE_CONFIG = {
+    'DATA_DIR': 'market_data',   # raíz del almacenamiento en disco
+    'OHLCV_ENABLED': True,       # guardar historia diaria y pedir solo las ruedas nuevas
+    'MAX_GAP_DAYS': 7,           # tolerancia de cobertura antes de redescargar todo
+    'CHAIN_SNAPSHOTS_ENABLED': True  # guardar cada cadena analizada (historia de IV y Greeks)
 }
 
 # Configuraciones de logging
@@ -0,0 +1,19 @@
+"""
+Configuración de pytest para los scripts de prueba del repositorio
+
+Las pruebas de test_system.py y test_tickers.py también se corren como scripts:
+informan el resultado devolviendo True/False en lugar de lanzar una excepción.
+Bajo pytest, un False se reporta como falla para que no pase inadvertido.
+"""
+
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Ejecuta la prueba y falla si devuelve False"""
+    funcargs = pyfuncitem.funcargs
+    result = pyfuncitem.obj(**{arg: funcargs[arg] for arg in pyfuncitem._fixtureinfo.argnames})
+    if result is False:
+        pytest.fail(f"{pyfuncitem.name} devolvió False (ver la salida capturada)", pytrace=False)
+    return True
@@ -1,69 +1,357 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import requests
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
 import time
+import math
+from config import (API_CONFIG, OPTIONS_CONFIG, UNIVERSE_CONFIG, STORAGE_CONFIG, FETCH_CONFIG,
+                    CACHE_CONFIG, MERVAL_TICKERS)
+from storage import OHLCVStore, ChainSnapshotStore
+from providers import MarketDataProvider, get_provider, split_bulk_download
+from utils import period_to_offset, SingleFlight, CircuitBreaker, compact_frame, frame_memory_bytes
+from disk_cache import build_data_cache
+from options_calculator import OptionsCalculator
+from rates import get_rate_service
+from reference import get_reference_cache
+from indicators import IndicatorEngine
+from intraday import get_intraday_poller
+import threading
+
+# Descargas en curso compartidas por todas las instancias (sesiones de Streamlit)
+_inflight = SingleFlight()
+# Precios, historia y cadenas recientes (LRU acotado con TTL por tipo de dato, y con
+# CACHE_CONFIG['DISK_ENABLED'] también en disco para todos los procesos del host)
+_cache = build_data_cache()
+
+# Último resultado válido por clave: {clave: (datos, time.monotonic() de la descarga)}
+_last_good = {}
+# Backoff exponencial y corte por (fuente, ticker)
+_breaker = CircuitBreaker(FETCH_CONFIG['FAILURE_THRESHOLD'], FETCH_CONFIG['BACKOFF_BASE'],
+                          FETCH_CONFIG['BACKOFF_MAX'])
+# Refrescos en segundo plano y claves que se están refrescando
+_refresher = ThreadPoolExecutor(max_workers=FETCH_CONFIG['REFRESH_WORKERS'],
+                                thread_name_prefix='market-data-refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Motor de indicadores técnicos por (fuente, ticker)
+_indicator_engines = {}
+_indicator_lock = threading.Lock()
 
 class DataFetcher:
     """Clase para obtener datos financieros en tiempo real"""
     
-    def __init__(self, ticker: str = "GGAL"):
+    # Ventana diaria más larga que necesita get_market_data (volatilidad de 252 ruedas)
+    HISTORY_PERIOD = "2y"
+    
+    def __init__(self, ticker: str = "GGAL", store: OHLCVStore = None,
+                 provider: MarketDataProvider = None, chain_store: ChainSnapshotStore = None):
         self.ticker = ticker
-        self.yf_ticker = yf.Ticker(ticker)
+        # Fuente de datos (yfinance por defecto; ReplayProvider para trabajar sin red)
+        self.provider = provider or get_provider()
+        # Historia diaria en disco; solo se piden a la red las ruedas nuevas
+        if store is None and STORAGE_CONFIG['OHLCV_ENABLED'] and self.provider.LIVE:
+            store = OHLCVStore()
+        self.store = store
+        # Snapshots de cadenas en disco para series de IV y Greeks
+        if chain_store is None and STORAGE_CONFIG['CHAIN_SNAPSHOTS_ENABLED'] and self.provider.LIVE:
+            chain_store = ChainSnapshotStore()
+        self.chain_store = chain_store
+        # Vencimientos que fallaron en la última descarga de la cadena: {fecha: motivo}
+        self.chain_errors = {}
+        # Memoria de la última cadena antes y después de compactarla (bytes)
+        self.chain_memory = {}
+        # Lo mismo para cada cadena analizada: {(vencimiento, lado): {'before_bytes', 'after_bytes'}}
+        self.analyzed_memory = {}
+        # Momento (epoch) de la descarga de la cadena vigente: la identifica en el cache del análisis
+        self.chain_fetched_at = None
+    
+    def _flight_key(self, kind: str, *params) -> Tuple:
+        """Clave de coalescencia: (fuente, ticker, tipo de dato, parámetros)"""
+        return (self.provider.cache_key, self.ticker, kind) + params
+    
+    @property
+    def _data_cache(self):
+        """Cache compartido; los datos reproducidos no se escriben en el disco del host"""
+        return _cache if self.provider.LIVE else getattr(_cache, 'memory', _cache)
+    
+    def _cached(self, key: Tuple, ttl: float, fetch: Callable, valid: Callable = None):
+        """
+        Valor del cache compartido o, si no hay, descarga coalescida con los pedidos
+        concurrentes de la misma clave. Solo se cachean los resultados válidos.
+        """
+        cache = self._data_cache
+        value = cache.get(key)
+        if value is None:
+            value = _inflight.do(key, fetch)
+            if value is not None and (valid is None or valid(value)):
+                cache.set(key, value, ttl)
+        return value
+    
+    def invalidate_cache(self, disk: bool = False) -> None:
+        """
+        Descarta los datos cacheados del ticker en la memoria del proceso
+        
+        Con disk=True también los borra del disco compartido, para todas las réplicas
+        (solo ante un pedido explícito de refresco: al navegar alcanzan los TTL).
+        """
+        cache = self._data_cache
+        cache.clear(self.ticker)
+        if disk and hasattr(cache, 'clear_disk'):
+            cache.clear_disk(self.ticker)
+    
+    @staticmethod
+    def cache_stats() -> Dict:
+        """Aciertos, fallos, desalojos, entradas y bytes del cache de datos"""
+        return {**_cache.stats, 'entries': len(_cache), 'bytes': _cache.nbytes}
+    
+    @property
+    def _breaker_key(self) -> Tuple:
+        return (self.provider.cache_key, self.ticker)
+    
+    def fetch_status(self) -> Dict:
+        """Estado del circuito del ticker: 'closed', 'backoff' u 'open', fallas y próximo reintento"""
+        return _breaker.status(self._breaker_key)
+    
+    def get_current_price(self, daily_history: pd.DataFrame = None) -> float:
+        """
+        Obtiene el precio actual del ticker
+        
+        Args:
+            daily_history: Historia diaria ya descargada para usar como fallback sin
+                otra llamada a la red
+        
+        El precio se cachea CACHE_CONFIG['PRICE_TTL'] segundos.
+        """
+        return self._cached(self._flight_key('price'), CACHE_CONFIG['PRICE_TTL'],
+                            lambda: self._fetch_current_price(daily_history))
     
-    def get_current_price(self) -> float:
-        """Obtiene el precio actual del ticker"""
+    def _fetch_current_price(self, daily_history: pd.DataFrame = None) -> float:
         try:
-            data = self.yf_ticker.history(period="1d", interval="1m")
-            if not data.empty:
-                return data['Close'].iloc[-1]
+            # Solo se piden las barras posteriores a la última en memoria
+            poller = get_intraday_poller(self.provider)
+            poller.poll(self.ticker)
+            price = poller.last_price(self.ticker)
+            if price is not None:
+                return price
             else:
                 # Fallback a precio de cierre del día anterior
-                data = self.yf_ticker.history(period="5d")
-                return data['Close'].iloc[-1]
+                if daily_history is None or daily_history.empty:
+                    daily_history = self.provider.get_history(self.ticker, period="5d")
+                return daily_history['Close'].iloc[-1]
         except Exception as e:
             print(f"Error obteniendo precio actual: {e}")
             return None
     
     def get_historical_data(self, period: str = "1y") -> pd.DataFrame:
-        """Obtiene datos históricos del ticker"""
+        """
+        Obtiene datos históricos del ticker
+        
+        Con almacenamiento en disco, si la historia guardada cubre el período solo se
+        descargan las ruedas desde la última guardada (inclusive, para completar la
+        rueda en curso) y se anexan. Pedidos concurrentes del mismo ticker y período
+        comparten la descarga, y el resultado se cachea CACHE_CONFIG['HISTORY_TTL'] segundos.
+        """
+        return self._cached(self._flight_key('history', period), CACHE_CONFIG['HISTORY_TTL'],
+                            lambda: self._fetch_historical_data(period), lambda data: not data.empty)
+    
+    def _fetch_historical_data(self, period: str) -> pd.DataFrame:
+        """Descarga (o completa desde disco) la historia diaria"""
         try:
-            data = self.yf_ticker.history(period=period)
-            return data
+            if self.store is None:
+                return self.provider.get_history(self.ticker, period=period)
+            
+            stored = self.store.load(self.ticker)
+            offset = period_to_offset(period)
+            start = datetime.now() - offset if offset is not None else None
+            if self.store.covers(stored, start):
+                new = self.provider.get_history(self.ticker, start=stored.index[-1].strftime('%Y-%m-%d'))
+            else:
+                new = self.provider.get_history(self.ticker, period=period)
+            
+            data = self.store.merge(stored, new)
+            if not new.empty:
+                self.store.write(self.ticker, data)
+            return self.slice_period(data, period)
         except Exception as e:
             print(f"Error obteniendo datos históricos: {e}")
             return pd.DataFrame()
     
-    def get_options_chain(self) -> Dict:
-        """Obtiene la cadena de opciones actual"""
+    def get_options_chain(self, max_expirations: int = None) -> Dict:
+        """
+        Obtiene la cadena de opciones actual descargando los vencimientos en paralelo
+        
+        Args:
+            max_expirations: Cantidad de vencimientos a descargar (por defecto
+                OPTIONS_CONFIG['MAX_EXPIRATIONS'])
+        
+        Los vencimientos que fallan o superan API_CONFIG['TIMEOUT'] (contado por
+        vencimiento desde que empieza su descarga) quedan en self.chain_errors, igual
+        que los que no llegan a empezar dentro del plazo total (TIMEOUT por cada tanda
+        de MAX_WORKERS vencimientos). Pedidos concurrentes del mismo ticker comparten la descarga y
+        la cadena se cachea CACHE_CONFIG['CHAIN_TTL'] segundos.
+        Con OPTIONS_CONFIG['COMPACT_CHAINS'] la cadena se guarda con tipos compactos
+        (ver compact_chain) y self.chain_memory informa la memoria antes y después.
+        """
+        max_expirations = max_expirations or OPTIONS_CONFIG['MAX_EXPIRATIONS']
+        chain, errors, memory, fetched_at = self._cached(
+            self._flight_key('options_chain', max_expirations), CACHE_CONFIG['CHAIN_TTL'],
+            lambda: self._fetch_options_chain(max_expirations), lambda result: bool(result[0])
+        )
+        self.chain_errors = dict(errors)
+        self.chain_memory = dict(memory)
+        self.chain_fetched_at = fetched_at
+        return chain
+    
+    @staticmethod
+    def price_bucket(S: float, step: float = None) -> float:
+        """
+        Precio representativo de S en una grilla relativa de paso step (por defecto
+        CACHE_CONFIG['ANALYZED_PRICE_STEP']): los ticks dentro del mismo paso comparten
+        el mismo valor y, con él, el análisis cacheado
+        """
+        step = np.log1p(step if step is not None else CACHE_CONFIG['ANALYZED_PRICE_STEP'])
+        return round(float(np.exp(np.round(np.log(S) / step) * step)), 4)
+    
+    def get_analyzed_chain(self, expiration: str, side: str, S: float, r: float) -> pd.DataFrame:
+        """
+        Cadena de un vencimiento analizada (IV, precio teórico, Greeks, probabilidades)
+        
+        El análisis se cachea CACHE_CONFIG['CHAIN_TTL'] segundos por descarga de la
+        cadena, vencimiento, lado ('calls' o 'puts'), precio y tasa, y con el cache en
+        disco lo comparten todas las réplicas de la app. El precio se lleva a
+        price_bucket (y se analiza con ese valor) para que cada tick no sea un fallo.
+        Con OPTIONS_CONFIG['COMPACT_CHAINS'] el resultado se cachea y devuelve con
+        tipos compactos (usar widen_frame para mostrarlo) y self.analyzed_memory
+        informa la memoria antes y después.
+        """
+        chain = self.get_options_chain().get(expiration, {})
+        S = self.price_bucket(S)
+        
+        def analyze():
+            analyzed = OptionsCalculator.analyze_option_chain(chain.get(side, pd.DataFrame()), S, r, expiration)
+            if not OPTIONS_CONFIG['COMPACT_CHAINS'] or analyzed.empty:
+                return analyzed, {}
+            compact = compact_frame(analyzed)
+            return compact, {'before_bytes': frame_memory_bytes(analyzed), 'after_bytes': frame_memory_bytes(compact)}
+        
+        key = self._flight_key('analyzed_chain', expiration, side, self.chain_fetched_at, S, round(float(r), 6))
+        analyzed, memory = self._cached(key, CACHE_CONFIG['CHAIN_TTL'], analyze, lambda result: not result[0].empty)
+        self.analyzed_memory[(expiration, side)] = dict(memory)
+        return analyzed
+    
+    @staticmethod
+    def compact_chain(options_chain: Dict) -> Tuple[Dict, Dict]:
+        """
+        Normaliza una cadena {vencimiento: {'calls', 'puts'}} a tipos compactos
+        
+        Conserva solo OPTIONS_CONFIG['CHAIN_COLUMNS'], pasa los números a float32 y
+        los textos repetidos a categorías.
+        
+        Returns:
+            (cadena compacta, {'before_bytes': ..., 'after_bytes': ...})
+        """
+        before = after = 0
+        compact = {}
+        for expiration, chain in options_chain.items():
+            compact[expiration] = {}
+            for side, data in chain.items():
+                before += frame_memory_bytes(data)
+                compact[expiration][side] = compact_frame(data, OPTIONS_CONFIG['CHAIN_COLUMNS'])
+                after += frame_memory_bytes(compact[expiration][side])
+        return compact, {'before_bytes': before, 'after_bytes': after}
+    
+    def _fetch_options_chain(self, max_expirations: int) -> Tuple[Dict, Dict, Dict, Optional[float]]:
+        """
+        Descarga la cadena; devuelve (cadena, {vencimiento: motivo del error},
+        memoria antes/después de compactar, momento de la descarga en epoch)
+        """
+        errors = {}
         try:
-            # Obtener fechas de expiración disponibles
-            expirations = self.yf_ticker.options
+            # Fechas de expiración disponibles (cacheadas por día)
+            expirations = get_reference_cache(self.provider).get_expirations(self.ticker)
             if not expirations:
-                return {}
+                return {}, errors, {}, None
             
-            options_data = {}
-            for exp_date in expirations[:6]:  # Primeras 6 fechas
-                try:
-                    opt_chain = self.yf_ticker.option_chain(exp_date)
-                    options_data[exp_date] = {
-                        'calls': opt_chain.calls,
-                        'puts': opt_chain.puts
-                    }
-                except:
-                    continue
+            expirations = list(expirations[:max_expirations])
+            results = {}
+            
+            timeout = API_CONFIG['TIMEOUT']
+            started = {}
+            
+            def fetch(exp_date):
+                # El plazo de cada vencimiento corre desde que un worker lo toma, no desde la cola
+                started[exp_date] = time.monotonic()
+                return self.provider.get_option_chain(self.ticker, exp_date)
+            
+            workers = max(1, min(API_CONFIG['MAX_WORKERS'], len(expirations)))
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = {executor.submit(fetch, exp_date): exp_date for exp_date in expirations}
+            # Plazo total: las tandas de workers que harían falta si cada pedido agotara su plazo.
+            # Si hay workers colgados, los vencimientos que nunca empiezan vencen acá.
+            batch_timeout = timeout * math.ceil(len(expirations) / workers)
+            batch_deadline = time.monotonic() + batch_timeout
+            pending = set(futures)
+            try:
+                while pending:
+                    # Los que empiecen después vencen más tarde: alcanza con despertar en el primer plazo
+                    deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+                    if any(futures[f] not in started for f in pending):
+                        # Los que no empezaron se revisan en breve (o vencen con el plazo total)
+                        deadlines.append(batch_deadline if deadlines else min(batch_deadline, time.monotonic() + 0.05))
+                    wait_for = max(0.0, min(deadlines) - time.monotonic())
+                    done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        exp_date = futures[future]
+                        try:
+                            results[exp_date] = future.result()
+                        except Exception as e:
+                            errors[exp_date] = str(e)
+                    now = time.monotonic()
+                    for future in [f for f in pending if futures[f] in started and now - started[futures[f]] >= timeout]:
+                        errors[futures[future]] = f"timeout ({timeout}s)"
+                        pending.discard(future)
+                    if now >= batch_deadline:
+                        for future in [f for f in pending if futures[f] not in started]:
+                            errors[futures[future]] = f"timeout (sin empezar en {batch_timeout:g}s)"
+                            pending.discard(future)
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
             
-            return options_data
+            if errors:
+                print(f"Vencimientos sin datos para {self.ticker}: {errors}")
+            
+            # Mantener el orden cronológico de los vencimientos
+            chain = {exp_date: results[exp_date] for exp_date in expirations if exp_date in results}
+            if not OPTIONS_CONFIG['COMPACT_CHAINS']:
+                return chain, errors, {}, time.time()
+            chain, memory = self.compact_chain(chain)
+            return chain, errors, memory, time.time()
         except Exception as e:
             print(f"Error obteniendo cadena de opciones: {e}")
-            return {}
+            return {}, errors, {}, None
+    
+    @staticmethod
+    def slice_period(data: pd.DataFrame, period: str) -> pd.DataFrame:
+        """Recorta en memoria una historia diaria al período pedido (ej. la vista de 1y desde 2y)"""
+        offset = period_to_offset(period)
+        if data.empty or offset is None:
+            return data
+        return data[data.index > data.index[-1] - offset]
     
-    def calculate_historical_volatility(self, window: int = 252) -> float:
-        """Calcula la volatilidad histórica anualizada"""
+    def calculate_historical_volatility(self, window: int = 252, data: pd.DataFrame = None) -> float:
+        """
+        Calcula la volatilidad histórica anualizada
+        
+        Args:
+            window: Ventana en ruedas
+            data: Historia diaria ya descargada; si no se pasa se descargan 2 años
+        """
         try:
-            data = self.get_historical_data(period="2y")
+            if data is None:
+                data = self.get_historical_data(period=self.HISTORY_PERIOD)
             if data.empty:
                 return 0.2  # Valor por defecto
             
@@ -77,63 +365,262 @@ class DataFetcher:
             print(f"Error calculando volatilidad histórica: {e}")
             return 0.2
     
-    def get_risk_free_rate(self) -> float:
-        """Obtiene la tasa libre de riesgo (aproximación con bonos del tesoro de EE.UU.)"""
+    def get_risk_free_rate(self, T: float = None) -> float:
+        """
+        Obtiene la tasa libre de riesgo para un plazo desde la curva del Tesoro compartida
+        
+        Args:
+            T: Plazo en años (por defecto OPTIONS_CONFIG['DEFAULT_DAYS_TO_EXPIRATION'])
+        """
         try:
-            # Usar yield del Treasury a 10 años como proxy
-            treasury = yf.Ticker("^TNX")
-            data = treasury.history(period="5d")
-            if not data.empty:
-                return data['Close'].iloc[-1] / 100  # Convertir porcentaje a decimal
-            else:
-                return 0.05  # Valor por defecto 5%
+            if T is None:
+                T = OPTIONS_CONFIG['DEFAULT_DAYS_TO_EXPIRATION'] / 365.25
+            return get_rate_service(self.provider).rate(T)
         except Exception as e:
             print(f"Error obteniendo tasa libre de riesgo: {e}")
             return 0.05
     
-    def get_market_data(self) -> Dict:
-        """Obtiene un conjunto completo de datos de mercado"""
-        current_price = self.get_current_price()
-        historical_data = self.get_historical_data()
-        options_chain = self.get_options_chain()
-        historical_vol = self.calculate_historical_volatility()
-        risk_free_rate = self.get_risk_free_rate()
-        
-        # Calcular algunos indicadores técnicos básicos
-        technical_indicators = {}
-        if not historical_data.empty:
-            # RSI simple
-            delta = historical_data['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            technical_indicators['rsi'] = rsi.iloc[-1] if not rsi.empty else 50
+    @staticmethod
+    def calculate_technical_indicators(historical_data: pd.DataFrame) -> Dict:
+        """Calcula RSI (Wilder), medias móviles, Bandas de Bollinger y volatilidades desde una historia diaria"""
+        if historical_data.empty:
+            return {}
+        engine = IndicatorEngine()
+        engine.backfill(historical_data['Close'])
+        return engine.snapshot()
+    
+    def update_indicators(self, full_history: pd.DataFrame) -> IndicatorEngine:
+        """
+        Actualiza el motor de indicadores del ticker con la historia descargada
+        
+        Si la historia continúa la que ya procesó el motor, solo se aplican las barras
+        nuevas (O(1) cada una, revisando la rueda en curso); si no (primera vez, hueco
+        o cierres ajustados por dividendos), se recalcula todo en una pasada.
+        """
+        closes = full_history['Close'].dropna() if not full_history.empty else pd.Series(dtype=float)
+        with _indicator_lock:
+            engine = _indicator_engines.get(self._breaker_key)
+            if engine is None:
+                engine = _indicator_engines[self._breaker_key] = IndicatorEngine()
+                get_intraday_poller(self.provider).subscribe(self._intraday_listener(engine), self.ticker)
             
-            # Medias móviles
-            technical_indicators['sma_20'] = historical_data['Close'].rolling(20).mean().iloc[-1]
-            technical_indicators['sma_50'] = historical_data['Close'].rolling(50).mean().iloc[-1]
+            last = engine.last_timestamp
+            continues = last is not None and last in closes.index
+            if continues and engine.prev_close is not None:
+                # El cierre anterior a la última barra procesada no debe haber cambiado
+                position = closes.index.get_loc(last)
+                continues = position > 0 and np.isclose(closes.iloc[position - 1], engine.prev_close)
             
-            # Bollinger Bands
-            sma_20 = historical_data['Close'].rolling(20).mean()
-            std_20 = historical_data['Close'].rolling(20).std()
-            technical_indicators['bb_upper'] = (sma_20 + 2 * std_20).iloc[-1]
-            technical_indicators['bb_lower'] = (sma_20 - 2 * std_20).iloc[-1]
+            if continues:
+                for timestamp, close in closes[closes.index >= last].items():
+                    engine.update(close, timestamp)
+            else:
+                engine.backfill(closes)
+            return engine
+    
+    @staticmethod
+    def _align_tz(timestamp: pd.Timestamp, tz) -> pd.Timestamp:
+        """Expresa un timestamp en la zona horaria de otro índice (sin zona = hora local del mercado)"""
+        if timestamp.tz is None:
+            return timestamp if tz is None else timestamp.tz_localize(tz)
+        return timestamp.tz_localize(None) if tz is None else timestamp.tz_convert(tz)
+    
+    @classmethod
+    def _intraday_listener(cls, engine: IndicatorEngine):
+        """
+        Suscriptor intradía que revisa la barra diaria de la rueda en curso
+        
+        Solo revisa la última barra del motor: si la rueda intradía todavía no está en la
+        historia diaria no se agrega una barra sintética (la agrega update_indicators con
+        la próxima descarga, continuando sin recalcular todo).
+        """
+        def on_delta(ticker: str, delta: pd.DataFrame) -> None:
+            with _indicator_lock:
+                last = engine.last_timestamp
+                if last is None:
+                    return
+                try:
+                    session = cls._align_tz(delta.index[-1], last.tz).normalize()
+                    if session == last.normalize():
+                        engine.update(float(delta['Close'].iloc[-1]), last)
+                except Exception as e:
+                    print(f"Error revisando indicadores de {ticker} con barras intradía: {e}")
+        return on_delta
+    
+    def _indicator_fields(self, full_history: pd.DataFrame) -> Dict:
+        """Volatilidad histórica, indicadores actuales y su historia de 1 año"""
+        engine = self.update_indicators(full_history)
+        technical_indicators = engine.snapshot() if engine.last_timestamp is not None else {}
+        historical_vol = technical_indicators.get('vol_252', np.nan)
+        if np.isnan(historical_vol):
+            # Historia más corta que la ventana: usar todos los retornos disponibles
+            historical_vol = self.calculate_historical_volatility(data=full_history)
+        return {
+            'historical_volatility': historical_vol,
+            'technical_indicators': technical_indicators,
+            'indicator_history': self.slice_period(engine.frame, "1y")
+        }
+    
+    def get_market_data(self) -> Dict:
+        """
+        Obtiene un conjunto completo de datos de mercado
+        
+        La historia diaria se descarga una sola vez (HISTORY_PERIOD) y de ella se
+        derivan la vista de 1 año, la volatilidad histórica y los indicadores técnicos.
+        Sesiones concurrentes sobre el mismo ticker comparten una única descarga.
+        
+        Stale-while-revalidate: si hay un resultado válido anterior se devuelve de
+        inmediato y, cuando tiene más de FETCH_CONFIG['FRESH_SECONDS'], se refresca en
+        segundo plano. Las fallas aplican backoff exponencial por ticker y, tras
+        FAILURE_THRESHOLD fallas seguidas, el circuito queda abierto hasta el próximo
+        reintento. El resultado incluye 'age_seconds', 'is_stale' y 'fetch_status'.
+        """
+        key = self._flight_key('market_data')
+        cached = _last_good.get(key)
+        
+        if cached is None:
+            if _breaker.allow(self._breaker_key):
+                try:
+                    market_data = self._revalidate()
+                except Exception as e:
+                    # Igual que en el refresco en segundo plano: la falla cuenta para el circuito
+                    _breaker.record_failure(self._breaker_key, str(e))
+                    print(f"Error descargando datos de {self.ticker}: {e}")
+                    market_data = self._empty_market_data()
+            else:
+                market_data = self._empty_market_data()
+            cached = _last_good.get(key)
+            if cached is None:
+                return self._with_freshness(market_data, None)
+        elif time.monotonic() - cached[1] >= FETCH_CONFIG['FRESH_SECONDS']:
+            self._refresh_in_background(key)
+        
+        market_data, fetched_at = cached
+        self.chain_errors = dict(market_data['options_chain_errors'])
+        return self._with_freshness(market_data, fetched_at)
+    
+    def _revalidate(self) -> Dict:
+        """Descarga los datos; si son válidos reemplazan al último resultado guardado"""
+        market_data = _inflight.do(self._flight_key('market_data'), self._fetch_market_data)
+        self.chain_errors = dict(market_data['options_chain_errors'])
+        self._record_result(market_data)
+        return market_data
+    
+    def _record_result(self, market_data: Dict) -> bool:
+        """Guarda una descarga válida como último resultado bueno y actualiza el circuito"""
+        error = self._validation_error(market_data)
+        previous = _last_good.get(self._flight_key('market_data'))
+        if error is None and not market_data['options_chain'] and previous is not None and previous[0]['options_chain']:
+            # Una cadena que desaparece no reemplaza a la última buena ni cierra el circuito
+            error = "cadena de opciones vacía"
+        if error is None:
+            _last_good[self._flight_key('market_data')] = (market_data, time.monotonic())
+            _breaker.record_success(self._breaker_key)
+            return True
+        _breaker.record_failure(self._breaker_key, error)
+        print(f"Descarga fallida para {self.ticker}: {error} ({_breaker.status(self._breaker_key)['state']})")
+        return False
+    
+    def last_good(self) -> Optional[Dict]:
+        """Último resultado válido con su edad (None si nunca hubo uno)"""
+        cached = _last_good.get(self._flight_key('market_data'))
+        return self._with_freshness(*cached) if cached is not None else None
+    
+    def _refresh_in_background(self, key: Tuple) -> None:
+        """Encola un refresco si el ticker no está en backoff y no hay otro en curso"""
+        if not _breaker.allow(self._breaker_key):
+            return
+        with _refreshing_lock:
+            if key in _refreshing:
+                return
+            _refreshing.add(key)
+        
+        def refresh():
+            try:
+                self._revalidate()
+            except Exception as e:
+                _breaker.record_failure(self._breaker_key, str(e))
+            finally:
+                with _refreshing_lock:
+                    _refreshing.discard(key)
+        
+        _refresher.submit(refresh)
+    
+    @staticmethod
+    def _validation_error(market_data: Dict) -> Optional[str]:
+        """Motivo por el que una descarga no sirve (None si es válida)"""
+        if market_data['current_price'] is None:
+            return "sin precio actual"
+        if market_data['historical_data'].empty:
+            return "sin historia diaria"
+        if not market_data['options_chain'] and market_data['options_chain_errors']:
+            return "sin cadena de opciones"
+        return None
+    
+    def _with_freshness(self, market_data: Dict, fetched_at: Optional[float]) -> Dict:
+        """Agrega edad y estado de la descarga sin modificar el diccionario compartido"""
+        age = time.monotonic() - fetched_at if fetched_at is not None else None
+        return {
+            **market_data,
+            'age_seconds': age,
+            'is_stale': age is None or age >= FETCH_CONFIG['FRESH_SECONDS'],
+            'fetch_status': self.fetch_status()
+        }
+    
+    def _empty_market_data(self) -> Dict:
+        """Datos vacíos para un ticker con el circuito abierto y sin resultado previo"""
+        return {
+            'current_price': None,
+            'historical_data': pd.DataFrame(),
+            'options_chain': {},
+            'options_chain_errors': {},
+            'options_chain_memory': {},
+            'historical_volatility': None,
+            'risk_free_rate': None,
+            'rate_curve': None,
+            'technical_indicators': {},
+            'indicator_history': pd.DataFrame(),
+            'last_update': datetime.now()
+        }
+    
+    def _fetch_market_data(self) -> Dict:
+        """Descarga y arma el conjunto completo de datos de mercado"""
+        full_history = self.get_historical_data(period=self.HISTORY_PERIOD)
+        historical_data = self.slice_period(full_history, "1y")
+        current_price = self.get_current_price(daily_history=full_history)
+        options_chain = self.get_options_chain()
+        rate_curve = get_rate_service(self.provider).get_curve()
+        risk_free_rate = rate_curve(OPTIONS_CONFIG['DEFAULT_DAYS_TO_EXPIRATION'] / 365.25)
+        self.record_chain_snapshot(options_chain, current_price, rate_curve)
         
         return {
             'current_price': current_price,
             'historical_data': historical_data,
             'options_chain': options_chain,
-            'historical_volatility': historical_vol,
+            'options_chain_errors': dict(self.chain_errors),
+            'options_chain_memory': dict(self.chain_memory),
             'risk_free_rate': risk_free_rate,
-            'technical_indicators': technical_indicators,
+            'rate_curve': rate_curve,
+            # Volatilidad histórica e indicadores técnicos desde el motor incremental
+            **self._indicator_fields(full_history),
             'last_update': datetime.now()
         }
     
+    def record_chain_snapshot(self, options_chain: Dict, current_price: float, rate_curve=None) -> None:
+        """Guarda la cadena analizada en el almacenamiento de snapshots (si está habilitado)"""
+        if self.chain_store is None or not options_chain or not current_price:
+            return
+        try:
+            rate_curve = rate_curve or get_rate_service(self.provider).get_curve()
+            snapshot = ChainSnapshotStore.build_snapshot(options_chain, current_price, rate_curve)
+            self.chain_store.append(self.ticker, snapshot)
+        except Exception as e:
+            print(f"Error guardando snapshot de la cadena de {self.ticker}: {e}")
+    
     def get_company_info(self) -> Dict:
-        """Obtiene información básica de la empresa"""
+        """Obtiene información básica de la empresa (cacheada por día en memoria y disco)"""
         try:
-            info = self.yf_ticker.info
+            info = get_reference_cache(self.provider).get_info(self.ticker)
             return {
                 'name': info.get('longName', 'GGAL'),
                 'sector': info.get('sector', 'Financial Services'),
@@ -152,3 +639,184 @@ class DataFetcher:
                 'pe_ratio': 0,
                 'dividend_yield': 0
             }
+
+
+class UniverseFetcher:
+    """
+    Descarga masiva de datos de mercado para un universo de tickers (por defecto
+    MERVAL_TICKERS)
+    
+    La historia diaria y el precio intradía de todos los tickers se bajan en una
+    sola llamada al proveedor cada uno (yf.download con YFinanceProvider); las cadenas de opciones se descargan con
+    un pool acotado (UNIVERSE_CONFIG['CHAIN_WORKERS'] tickers a la vez, cada uno
+    con sus propios vencimientos en paralelo).
+    """
+    
+    def __init__(self, tickers: List[str] = None, chain_workers: int = None,
+                 refresh_window: float = None, store: OHLCVStore = None,
+                 provider: MarketDataProvider = None, chain_store: ChainSnapshotStore = None):
+        self.tickers = list(tickers or MERVAL_TICKERS.keys())
+        self.chain_workers = chain_workers or UNIVERSE_CONFIG['CHAIN_WORKERS']
+        self.refresh_window = refresh_window or UNIVERSE_CONFIG['REFRESH_WINDOW']
+        self.provider = provider or get_provider()
+        if store is None and STORAGE_CONFIG['OHLCV_ENABLED'] and self.provider.LIVE:
+            store = OHLCVStore()
+        self.store = store
+        if chain_store is None and STORAGE_CONFIG['CHAIN_SNAPSHOTS_ENABLED'] and self.provider.LIVE:
+            chain_store = ChainSnapshotStore()
+        self.fetchers = {ticker: DataFetcher(ticker, store=store, provider=self.provider,
+                                             chain_store=chain_store)
+                         for ticker in self.tickers}
+        # Errores de la última actualización: {ticker: motivo}
+        self.errors = {}
+        # Tickers no consultados por backoff y cadenas fallidas en la última actualización
+        self.skipped = set()
+        self.chain_failures = {}
+        # Errores por vencimiento de cada cadena, copiados al terminar su descarga
+        self.chain_errors = {}
+    
+    split_bulk_download = staticmethod(split_bulk_download)
+    
+    def download_histories(self, period: str = None, interval: str = "1d",
+                           start: str = None) -> Dict[str, pd.DataFrame]:
+        """Descarga la historia de todos los tickers en una única llamada"""
+        try:
+            return self.provider.get_histories(
+                self.tickers,
+                period=period or UNIVERSE_CONFIG['HISTORY_PERIOD'],
+                start=start,
+                interval=interval
+            )
+        except Exception as e:
+            print(f"Error en la descarga masiva ({interval}): {e}")
+            return {ticker: pd.DataFrame() for ticker in self.tickers}
+    
+    def update_histories(self, period: str = None) -> Dict[str, pd.DataFrame]:
+        """
+        Historia diaria de todo el universo usando el almacenamiento en disco
+        
+        Si todos los tickers tienen historia guardada que cubre el período, la descarga
+        masiva arranca en la última rueda guardada más antigua; si no (o si el período
+        es 'max', que no tiene inicio fijo), se baja el período completo.
+        """
+        period = period or UNIVERSE_CONFIG['HISTORY_PERIOD']
+        if self.store is None:
+            return self.download_histories(period)
+        
+        stored = {ticker: self.store.load(ticker) for ticker in self.tickers}
+        offset = period_to_offset(period)
+        start = datetime.now() - offset if offset is not None else None
+        if all(self.store.covers(data, start) for data in stored.values()):
+            since = min(data.index[-1] for data in stored.values())
+            new = self.download_histories(start=since.strftime('%Y-%m-%d'))
+        else:
+            new = self.download_histories(period)
+        
+        histories = {}
+        for ticker in self.tickers:
+            merged = self.store.merge(stored[ticker], new.get(ticker, pd.DataFrame()))
+            if not new.get(ticker, pd.DataFrame()).empty:
+                self.store.write(ticker, merged)
+            histories[ticker] = DataFetcher.slice_period(merged, period)
+        return histories
+    
+    def get_current_prices(self, histories: Dict[str, pd.DataFrame] = None) -> Dict[str, float]:
+        """Último precio intradía de cada ticker; usa el último cierre diario como fallback"""
+        intraday = self.download_histories(period="1d", interval="1m")
+        prices = {}
+        for ticker in self.tickers:
+            data = intraday.get(ticker, pd.DataFrame())
+            if data.empty and histories is not None:
+                data = histories.get(ticker, pd.DataFrame())
+            close = data['Close'].dropna() if not data.empty else pd.Series(dtype=float)
+            prices[ticker] = close.iloc[-1] if not close.empty else None
+        return prices
+    
+    def get_options_chains(self, deadline: float = None) -> Dict[str, Dict]:
+        """Descarga las cadenas de todos los tickers con un pool acotado"""
+        chains = {ticker: {} for ticker in self.tickers}
+        timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else self.refresh_window
+        
+        # Los tickers en backoff o con el circuito abierto no se consultan
+        self.skipped = set()
+        self.chain_failures = {}
+        self.chain_errors = {}
+        allowed = []
+        for ticker in self.tickers:
+            if _breaker.allow(self.fetchers[ticker]._breaker_key):
+                allowed.append(ticker)
+            else:
+                self.skipped.add(ticker)
+                self.errors[ticker] = f"circuito {self.fetchers[ticker].fetch_status()['state']}"
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.chain_workers, len(allowed))))
+        futures = {executor.submit(self.fetchers[ticker].get_options_chain): ticker for ticker in allowed}
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                ticker = futures[future]
+                try:
+                    chains[ticker] = future.result()
+                    # Copia al terminar: un worker vencido puede seguir escribiendo en el fetcher
+                    self.chain_errors[ticker] = dict(self.fetchers[ticker].chain_errors)
+                except Exception as e:
+                    self.errors[ticker] = self.chain_failures[ticker] = str(e)
+        except FuturesTimeoutError:
+            for future, ticker in futures.items():
+                if not future.done():
+                    self.errors[ticker] = self.chain_failures[ticker] = f"cadena fuera de la ventana de {self.refresh_window}s"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return chains
+    
+    def get_market_data(self) -> Dict[str, Dict]:
+        """
+        Obtiene los datos de mercado de todo el universo
+        
+        Returns:
+            Diccionario {ticker: datos} con la misma forma que DataFetcher.get_market_data.
+            Los tickers cuya descarga falla devuelven su último resultado válido (con
+            'is_stale') si existe, y su falla cuenta para el circuito del ticker. Los
+            que están en backoff no se consultan: conservan su último resultado válido
+            y su circuito no cambia.
+        """
+        self.errors = {}
+        deadline = time.monotonic() + self.refresh_window
+        
+        histories = self.update_histories()
+        prices = self.get_current_prices(histories)
+        chains = self.get_options_chains(deadline)
+        # La curva de tasas es común a todo el universo
+        rate_curve = get_rate_service(self.provider).get_curve()
+        risk_free_rate = rate_curve(OPTIONS_CONFIG['DEFAULT_DAYS_TO_EXPIRATION'] / 365.25)
+        
+        market_data = {}
+        for ticker in self.tickers:
+            fetcher = self.fetchers[ticker]
+            full_history = histories.get(ticker, pd.DataFrame())
+            if full_history.empty:
+                self.errors.setdefault(ticker, "sin historia diaria")
+            historical_data = DataFetcher.slice_period(full_history, "1y")
+            
+            data = {
+                'current_price': prices.get(ticker),
+                'historical_data': historical_data,
+                'options_chain': chains.get(ticker, {}),
+                'options_chain_errors': dict(self.chain_errors.get(ticker, {})),
+                'options_chain_memory': dict(fetcher.chain_memory),
+                'risk_free_rate': risk_free_rate,
+                'rate_curve': rate_curve,
+                **fetcher._indicator_fields(full_history),
+                'last_update': datetime.now()
+            }
+            
+            # Un ticker en backoff no se consultó: su circuito y su último resultado no cambian
+            if ticker in self.chain_failures:
+                _breaker.record_failure(fetcher._breaker_key, self.chain_failures[ticker])
+            elif ticker not in self.skipped:
+                fetcher.record_chain_snapshot(data['options_chain'], data['current_price'], rate_curve)
+                fetcher._record_result(data)
+            market_data[ticker] = fetcher.last_good() or fetcher._with_freshness(data, None)
+        
+        if self.errors:
+            print(f"Tickers con errores en la actualización del universo: {self.errors}")
+        return market_data
@@ -0,0 +1,255 @@
+"""
+Segundo nivel de cache en disco compartido por todos los procesos del host.
+
+st.cache_data y utils.DataCache viven dentro de un proceso: con varias réplicas de
+la app detrás de un balanceador cada una descargaría lo mismo de Yahoo. DiskCache
+guarda los datos en una base SQLite local (modo WAL, escrituras atómicas por
+transacción) con vencimiento por reloj de pared, y TieredCache la combina con el
+cache en memoria:
+
+    memoria (por proceso) -> disco (por host) -> descarga
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from typing import Dict
+from config import CACHE_CONFIG, STORAGE_CONFIG
+from utils import DataCache
+
+# Cada cuántas escrituras se borran las entradas vencidas y se controla el tamaño
+PRUNE_EVERY = 100
+
+
+class DiskCache:
+    """
+    Cache clave-valor en SQLite con TTL, compartido entre procesos
+
+    Los valores se serializan con pickle: es un cache local del propio host, no se
+    deben abrir bases de terceros.
+
+    Args:
+        path: Archivo SQLite (por defecto <DATA_DIR>/cache.sqlite)
+        ttl_seconds: TTL por defecto
+        max_bytes: Tamaño máximo aproximado; se descartan primero las entradas más viejas
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = 300, max_bytes: int = None):
+        self.path = path or CACHE_CONFIG['DISK_PATH'] or os.path.join(STORAGE_CONFIG['DATA_DIR'], 'cache.sqlite')
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'errors': 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        """Una conexión por hilo (la base se crea con el primer uso)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        ticker TEXT,
+                        kind TEXT,
+                        expires_at REAL NOT NULL,
+                        created_at REAL NOT NULL,
+                        size INTEGER NOT NULL,
+                        value BLOB NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key) -> str:
+        return repr(key)
+
+    @staticmethod
+    def _labels(key):
+        """(ticker, tipo de dato) de las claves de DataFetcher: (fuente, ticker, tipo, ...)"""
+        if isinstance(key, tuple) and len(key) >= 3:
+            return str(key[1]), str(key[2])
+        return None, None
+
+    def get_with_expiry(self, key):
+        """(valor, vencimiento en epoch) vigente o (None, None)"""
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                (self._key(key), time.time())
+            ).fetchone()
+            value = pickle.loads(row[0]) if row is not None else None
+        except Exception as e:
+            self._count('errors')
+            print(f"Error leyendo cache en disco: {e}")
+            return None, None
+        if row is None:
+            self._count('misses')
+            return None, None
+        self._count('hits')
+        return value, row[1]
+
+    def get(self, key, default=None):
+        """Obtiene un valor vigente del cache"""
+        value, _ = self.get_with_expiry(key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl: float = None, expires_at: float = None):
+        """Almacena un valor (reemplazo atómico de la entrada)"""
+        now = time.time()
+        expires_at = expires_at or now + (self.ttl if ttl is None else ttl)
+        ticker, kind = self._labels(key)
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self._key(key), ticker, kind, expires_at, now, len(blob), sqlite3.Binary(blob))
+                )
+        except Exception as e:
+            self._count('errors')
+            print(f"Error guardando en cache en disco: {e}")
+            return
+        with self._stats_lock:
+            self.stats['writes'] += 1
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def delete(self, key) -> bool:
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM entries WHERE key = ?", (self._key(key),)).rowcount > 0
+
+    def prune(self) -> int:
+        """Borra las entradas vencidas y, si se supera max_bytes, las más viejas"""
+        with self._connection() as conn:
+            removed = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),)).rowcount
+            if self.max_bytes is not None:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    rows = conn.execute("SELECT key, size FROM entries ORDER BY created_at").fetchall()
+                    stale = []
+                    for key, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((key,))
+                        total -= size
+                    conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+                    removed += len(stale)
+        return removed
+
+    def clear(self, ticker: str = None):
+        """Limpia el cache (o solo las entradas de un ticker)"""
+        with self._connection() as conn:
+            if ticker is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE ticker = ?", (ticker,))
+
+    def size(self) -> int:
+        """Cantidad de entradas vigentes"""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM entries WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __contains__(self, key) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM entries WHERE key = ? AND expires_at > ?", (self._key(key), time.time())
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.size()
+
+
+class TieredCache:
+    """
+    Cache en memoria del proceso respaldado por DiskCache
+
+    Los aciertos en disco se copian a memoria con el TTL que les queda, así una
+    réplica aprovecha lo que otra ya descargó sin volver a leer el disco.
+    Misma interfaz que utils.DataCache.
+    """
+
+    def __init__(self, memory: DataCache = None, disk: DiskCache = None):
+        # "is None" y no "or": un cache vacío es falso (__len__ == 0)
+        self.memory = memory if memory is not None else DataCache()
+        self.disk = disk if disk is not None else DiskCache()
+
+    @property
+    def stats(self) -> Dict:
+        return {**self.memory.stats, 'disk_hits': self.disk.stats['hits'],
+                'disk_misses': self.disk.stats['misses'], 'disk_writes': self.disk.stats['writes']}
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        value, expires_at = self.disk.get_with_expiry(key)
+        if value is None:
+            return default
+        self.memory.set(key, value, ttl=expires_at - time.time())
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.memory.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl)
+        self.disk.set(key, value, ttl)
+
+    def get_or_set(self, key, func, ttl: float = None):
+        value = self.get(key)
+        if value is None:
+            value = func()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+    def delete(self, key) -> bool:
+        in_memory = self.memory.delete(key)
+        return self.disk.delete(key) or in_memory
+
+    def clear(self, ticker: str = None):
+        """Limpia solo la memoria del proceso (el disco es compartido); ver clear_disk"""
+        self.memory.clear(ticker)
+
+    def clear_disk(self, ticker: str = None):
+        """Limpia el disco compartido (o solo las entradas de un ticker) para todas las réplicas"""
+        self.disk.clear(ticker)
+
+    def size(self):
+        return self.memory.size()
+
+    @property
+    def nbytes(self) -> int:
+        return self.memory.nbytes
+
+    def __contains__(self, key) -> bool:
+        return key in self.memory or key in self.disk
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+
+def build_data_cache() -> DataCache:
+    """Cache de DataFetcher según CACHE_CONFIG: en memoria o en memoria y disco"""
+    memory = DataCache(max_entries=CACHE_CONFIG['MAX_ENTRIES'], max_bytes=CACHE_CONFIG['MAX_BYTES'])
+    if not CACHE_CONFIG['DISK_ENABLED']:
+        return memory
+    return TieredCache(memory, DiskCache(max_bytes=CACHE_CONFIG['DISK_MAX_BYTES']))
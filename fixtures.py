@@ -0,0 +1,58 @@
+"""
+Datos de mercado sintéticos para pruebas y benchmarks sin red.
+
+- build_synthetic_chain: cadena de opciones con precios Black-Scholes y sonrisa de IV.
+- build_synthetic_snapshot: snapshot completo (historia, intradía, cadena, info y
+  tasa ^TNX) grabado para ReplayProvider.
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from options_calculator import OptionsCalculator
+from providers import record_snapshot
+
+
+def build_synthetic_chain(S=100.0, num_expirations=3, r=0.05):
+    """Construye una cadena de opciones sintética con precios Black-Scholes"""
+    chain = {}
+    strikes = np.arange(S * 0.7, S * 1.3 + 1e-9, S * 0.025).round(2)
+    for i in range(num_expirations):
+        expiration = (datetime.now() + timedelta(days=15 + 30 * i)).strftime('%Y-%m-%d')
+        T = OptionsCalculator.time_to_expiration(expiration)
+        ivs = 0.30 + 0.5 * np.log(strikes / S) ** 2
+        chain[expiration] = {}
+        for option_type, pricer in (('calls', OptionsCalculator.black_scholes_call),
+                                    ('puts', OptionsCalculator.black_scholes_put)):
+            prices = np.array([pricer(S, K, T, r, iv) for K, iv in zip(strikes, ivs)])
+            chain[expiration][option_type] = pd.DataFrame({
+                'contractSymbol': [f"TEST{expiration.replace('-', '')}{option_type[0].upper()}{int(K * 100):08d}" for K in strikes],
+                'strike': strikes,
+                'lastPrice': prices,
+                'bid': np.maximum(prices - 0.05, 0),
+                'ask': prices + 0.05,
+                'volume': 100,
+                'openInterest': 500,
+                'impliedVolatility': ivs
+            })
+    return chain
+
+
+def build_synthetic_snapshot(root, ticker='GGAL', S=100.0, r=0.045, days=520, seed=0):
+    """Graba un snapshot sintético (historia, intradía, cadena y tasa) para ReplayProvider"""
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=datetime.now().date(), periods=days, tz='America/New_York')
+    close = np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    close *= S / close[-1]
+    history = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                            'Close': close, 'Volume': 1_000_000.0}, index=idx)
+    minutes = pd.date_range(idx[-1] + pd.Timedelta(hours=9, minutes=30), periods=390, freq='min')
+    intraday_close = S * np.exp(np.cumsum(rng.normal(0, 0.0005, 390)))
+    intraday = pd.DataFrame({'Open': intraday_close, 'High': intraday_close, 'Low': intraday_close,
+                             'Close': intraday_close, 'Volume': 1000.0}, index=minutes)
+    
+    record_snapshot(ticker, root, history, intraday, build_synthetic_chain(S, r=r),
+                    info={'longName': f'{ticker} sintético', 'sector': 'Financial Services', 'beta': 1.2})
+    rate = pd.DataFrame({'Close': np.full(5, r * 100)}, index=idx[-5:])
+    record_snapshot('^TNX', root, rate)
+    return intraday
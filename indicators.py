@@ -0,0 +1,320 @@
+"""
+Motor incremental de indicadores técnicos.
+
+IndicatorEngine mantiene el estado rodante de cada indicador (sumas y sumas de
+cuadrados por ventana, promedios de Wilder para el RSI) y lo actualiza en O(1) por
+cada barra nueva. backfill() calcula todos los indicadores y ventanas de una sola
+pasada vectorizada y deja el estado listo para seguir con update().
+"""
+
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import Dict, Iterable
+from scipy.signal import lfilter
+from config import INDICATOR_CONFIG
+
+# Cada cuántas actualizaciones se recalculan las sumas desde cero (evita deriva numérica)
+RESUM_EVERY = 1000
+
+
+class RollingWindow:
+    """Media y desvío de una ventana deslizante con sumas acumuladas"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        # Las sumas se llevan respecto de un valor de referencia para no perder precisión
+        self._ref = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def push(self, x: float) -> None:
+        if self._ref is None:
+            self._ref = x
+        d = x - self._ref
+        self.values.append(x)
+        self._sum += d
+        self._sumsq += d * d
+        if len(self.values) > self.size:
+            old = self.values.popleft() - self._ref
+            self._sum -= old
+            self._sumsq -= old * old
+        self._updates += 1
+        if self._updates % RESUM_EVERY == 0:
+            self._resum()
+
+    def replace_last(self, x: float) -> None:
+        """Reemplaza el último valor (barra en curso revisada)"""
+        old = self.values[-1] - self._ref
+        d = x - self._ref
+        self.values[-1] = x
+        self._sum += d - old
+        self._sumsq += d * d - old * old
+
+    def _resum(self) -> None:
+        values = np.fromiter(self.values, dtype=float)
+        self._ref = float(values.mean())
+        d = values - self._ref
+        self._sum = float(d.sum())
+        self._sumsq = float((d * d).sum())
+
+    def seed(self, values: Iterable[float]) -> None:
+        """Carga los últimos valores de una serie (para continuar después de backfill)"""
+        self.values = deque(float(x) for x in list(values)[-self.size:])
+        self._ref = self.values[0] if self.values else None
+        self._updates = 0
+        if self.values:
+            self._resum()
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        if not self.full:
+            return np.nan
+        return self._ref + self._sum / self.size
+
+    def std(self) -> float:
+        """Desvío muestral (ddof=1, como pandas rolling().std())"""
+        if not self.full or self.size < 2:
+            return np.nan
+        var = (self._sumsq - self._sum * self._sum / self.size) / (self.size - 1)
+        return np.sqrt(max(var, 0.0))
+
+
+class WilderAverage:
+    """Promedio de Wilder: media simple de los primeros `period` valores y luego suavizado 1/period"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.value = np.nan
+        self._seed = []
+        self._previous = np.nan
+
+    def push(self, x: float) -> None:
+        self._previous = self.value
+        if np.isnan(self.value):
+            self._seed.append(x)
+            if len(self._seed) == self.period:
+                self.value = float(np.mean(self._seed))
+        else:
+            self.value = (self.value * (self.period - 1) + x) / self.period
+
+    def replace_last(self, x: float) -> None:
+        """Recalcula el último paso con un valor revisado"""
+        if np.isnan(self._previous):
+            self._seed[-1] = x
+            self.value = float(np.mean(self._seed)) if len(self._seed) == self.period else np.nan
+        else:
+            self.value = (self._previous * (self.period - 1) + x) / self.period
+
+
+class IndicatorEngine:
+    """
+    Estado rodante de RSI (Wilder), medias móviles, Bandas de Bollinger y
+    volatilidades realizadas de un ticker
+
+    Args:
+        sma_windows: Ventanas de medias móviles del cierre
+        bb_window: Ventana de las Bandas de Bollinger
+        bb_width: Cantidad de desvíos de las bandas
+        rsi_period: Período del RSI
+        vol_windows: Ventanas de volatilidad realizada (anualizada) de los log-retornos
+    """
+
+    def __init__(self, sma_windows=None, bb_window: int = None, bb_width: float = None,
+                 rsi_period: int = None, vol_windows=None):
+        self.sma_windows = tuple(sma_windows or INDICATOR_CONFIG['SMA_WINDOWS'])
+        self.bb_window = bb_window or INDICATOR_CONFIG['BB_WINDOW']
+        self.bb_width = bb_width or INDICATOR_CONFIG['BB_WIDTH']
+        self.rsi_period = rsi_period or INDICATOR_CONFIG['RSI_PERIOD']
+        self.vol_windows = tuple(vol_windows or INDICATOR_CONFIG['VOL_WINDOWS'])
+        self.reset()
+
+    def reset(self) -> None:
+        """Descarta todo el estado"""
+        self._close_windows = {w: RollingWindow(w) for w in set(self.sma_windows) | {self.bb_window}}
+        self._return_windows = {w: RollingWindow(w) for w in self.vol_windows}
+        self._gain = WilderAverage(self.rsi_period)
+        self._loss = WilderAverage(self.rsi_period)
+        self.last_close = None
+        self.prev_close = None
+        self.last_timestamp = None
+        self._frame = pd.DataFrame(columns=self.columns)
+        self._rows = []
+
+    @property
+    def columns(self):
+        return (['rsi'] + [f'sma_{w}' for w in self.sma_windows] + ['bb_upper', 'bb_lower']
+                + [f'vol_{w}' for w in self.vol_windows])
+
+    def snapshot(self) -> Dict[str, float]:
+        """Valores actuales de todos los indicadores"""
+        gain, loss = self._gain.value, self._loss.value
+        if np.isnan(gain) or np.isnan(loss):
+            rsi = np.nan
+        else:
+            rsi = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+        values = {'rsi': rsi}
+        for w in self.sma_windows:
+            values[f'sma_{w}'] = self._close_windows[w].mean()
+        bb = self._close_windows[self.bb_window]
+        values['bb_upper'] = bb.mean() + self.bb_width * bb.std()
+        values['bb_lower'] = bb.mean() - self.bb_width * bb.std()
+        for w in self.vol_windows:
+            values[f'vol_{w}'] = self._return_windows[w].std() * np.sqrt(252)
+        return values
+
+    def update(self, close: float, timestamp=None) -> Dict[str, float]:
+        """
+        Agrega una barra en O(1) y devuelve los indicadores
+
+        Si timestamp coincide con la última barra, la barra se revisa en lugar de
+        agregarse (ej. la rueda en curso con un precio nuevo).
+        """
+        if timestamp is not None and self.last_timestamp is not None:
+            if timestamp == self.last_timestamp:
+                return self._revise(close)
+            if timestamp < self.last_timestamp:
+                raise ValueError(f"Barra anterior a la última procesada: {timestamp}")
+
+        for window in self._close_windows.values():
+            window.push(close)
+        if self.last_close is not None:
+            for window in self._return_windows.values():
+                window.push(np.log(close / self.last_close))
+            delta = close - self.last_close
+            self._gain.push(max(delta, 0.0))
+            self._loss.push(max(-delta, 0.0))
+
+        self.prev_close, self.last_close, self.last_timestamp = self.last_close, close, timestamp
+        values = self.snapshot()
+        self._rows.append((timestamp, values))
+        return values
+
+    def _revise(self, close: float) -> Dict[str, float]:
+        for window in self._close_windows.values():
+            window.replace_last(close)
+        if self.prev_close is not None:
+            for window in self._return_windows.values():
+                window.replace_last(np.log(close / self.prev_close))
+            delta = close - self.prev_close
+            self._gain.replace_last(max(delta, 0.0))
+            self._loss.replace_last(max(-delta, 0.0))
+
+        self.last_close = close
+        values = self.snapshot()
+        if self._rows:
+            self._rows[-1] = (self.last_timestamp, values)
+        elif not self._frame.empty:
+            self._frame.iloc[-1] = [values[c] for c in self.columns]
+        return values
+
+    def backfill(self, closes: pd.Series) -> pd.DataFrame:
+        """
+        Calcula todos los indicadores sobre una serie completa en una pasada y deja
+        el estado listo para seguir con update()
+
+        Returns:
+            DataFrame con una columna por indicador (mismo índice que closes)
+        """
+        self.reset()
+        closes = closes.dropna()
+        c = closes.to_numpy(dtype=float)
+        n = len(c)
+        frame = {}
+
+        # Sumas acumuladas respecto del primer cierre: todas las ventanas en una pasada
+        ref = c[0] if n else 0.0
+        d = c - ref
+        s1 = np.concatenate(([0.0], np.cumsum(d)))
+        s2 = np.concatenate(([0.0], np.cumsum(d * d)))
+
+        def rolling(w):
+            mean = np.full(n, np.nan)
+            std = np.full(n, np.nan)
+            if n >= w:
+                end = np.arange(w, n + 1)
+                total = s1[end] - s1[end - w]
+                mean[end - 1] = ref + total / w
+                if w > 1:
+                    var = (s2[end] - s2[end - w] - total * total / w) / (w - 1)
+                    std[end - 1] = np.sqrt(np.maximum(var, 0.0))
+            return mean, std
+
+        stats = {w: rolling(w) for w in set(self.sma_windows) | {self.bb_window}}
+        for w in self.sma_windows:
+            frame[f'sma_{w}'] = stats[w][0]
+        bb_mean, bb_std = stats[self.bb_window]
+        frame['bb_upper'] = bb_mean + self.bb_width * bb_std
+        frame['bb_lower'] = bb_mean - self.bb_width * bb_std
+
+        # Log-retornos (el primero corresponde a la segunda barra)
+        returns = np.log(c[1:] / c[:-1]) if n > 1 else np.empty(0)
+        r1 = np.concatenate(([0.0], np.cumsum(returns)))
+        r2 = np.concatenate(([0.0], np.cumsum(returns * returns)))
+        for w in self.vol_windows:
+            std = np.full(n, np.nan)
+            if len(returns) >= w:
+                end = np.arange(w, len(returns) + 1)
+                total = r1[end] - r1[end - w]
+                var = (r2[end] - r2[end - w] - total * total / w) / (w - 1)
+                std[end] = np.sqrt(np.maximum(var, 0.0))
+            frame[f'vol_{w}'] = std * np.sqrt(252)
+
+        # RSI de Wilder: semilla con media simple y luego filtro recursivo
+        rsi = np.full(n, np.nan)
+        p = self.rsi_period
+        delta = np.diff(c)
+        gains, losses = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+        if len(delta) >= p:
+            avg = {}
+            for name, values in (('gain', gains), ('loss', losses)):
+                seed = values[:p].mean()
+                tail = values[p:]
+                smoothed = lfilter([1 / p], [1, -(p - 1) / p], tail, zi=[seed * (p - 1) / p])[0] if len(tail) else np.empty(0)
+                avg[name] = np.concatenate(([seed], smoothed))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = avg['gain'] / avg['loss']
+                rsi[p:] = np.where(avg['loss'] == 0, 100.0, 100 - 100 / (1 + rs))
+            self._seed_wilder(self._gain, gains, avg['gain'])
+            self._seed_wilder(self._loss, losses, avg['loss'])
+        else:
+            for value in gains:
+                self._gain.push(value)
+            for value in losses:
+                self._loss.push(value)
+        frame['rsi'] = rsi
+
+        # Estado para continuar en O(1)
+        for window in self._close_windows.values():
+            window.seed(c)
+        for window in self._return_windows.values():
+            window.seed(returns)
+        if n:
+            self.last_close = float(c[-1])
+            self.prev_close = float(c[-2]) if n > 1 else None
+            self.last_timestamp = closes.index[-1]
+
+        self._frame = pd.DataFrame(frame, index=closes.index)[self.columns]
+        return self._frame
+
+    @staticmethod
+    def _seed_wilder(average: WilderAverage, values: np.ndarray, smoothed: np.ndarray) -> None:
+        average._seed = list(values[:average.period])
+        average.value = float(smoothed[-1])
+        average._previous = float(smoothed[-2]) if len(smoothed) > 1 else np.nan
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Historia de los indicadores (backfill más las barras agregadas con update)"""
+        if self._rows:
+            index = [timestamp for timestamp, _ in self._rows]
+            rows = pd.DataFrame([values for _, values in self._rows], index=index)[self.columns]
+            self._frame = rows if self._frame.empty else pd.concat([self._frame, rows])
+            self._rows = []
+        return self._frame
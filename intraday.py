@@ -0,0 +1,155 @@
+"""
+Sondeo de barras intradía con actualizaciones incrementales.
+
+IntradayPoller mantiene en memoria las barras de 1 minuto de cada ticker y en cada
+sondeo pide solo las barras desde la última conocida (inclusive, porque la barra en
+curso todavía puede cambiar). Las barras nuevas o revisadas se publican como un
+DataFrame delta a los suscriptores (la app, el motor de indicadores, alertas).
+"""
+
+import threading
+import pandas as pd
+from typing import Callable, Dict, Iterable, Optional
+from config import INTRADAY_CONFIG
+from providers import MarketDataProvider, get_provider
+from utils import SingleFlight
+
+# Firma de un suscriptor: callback(ticker, delta)
+Subscriber = Callable[[str, pd.DataFrame], None]
+
+
+class IntradayPoller:
+    """Barras de 1 minuto en memoria por ticker, con deltas publicados a suscriptores"""
+
+    def __init__(self, provider: MarketDataProvider = None, poll_seconds: float = None,
+                 max_bars: int = None):
+        self.provider = provider or get_provider()
+        self.poll_seconds = poll_seconds or INTRADAY_CONFIG['POLL_SECONDS']
+        self.max_bars = max_bars or INTRADAY_CONFIG['MAX_BARS']
+        self._series = {}
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._tickers = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'polls': 0, 'rows_received': 0}
+
+    def series(self, ticker: str) -> pd.DataFrame:
+        """Barras en memoria del ticker"""
+        with self._lock:
+            return self._series.get(ticker, pd.DataFrame())
+
+    def last_timestamp(self, ticker: str) -> Optional[pd.Timestamp]:
+        data = self.series(ticker)
+        return data.index[-1] if not data.empty else None
+
+    def last_price(self, ticker: str) -> Optional[float]:
+        """Último cierre de 1 minuto conocido (sin consultar al proveedor)"""
+        data = self.series(ticker)
+        return float(data['Close'].iloc[-1]) if not data.empty else None
+
+    def subscribe(self, callback: Subscriber, ticker: str = None) -> Callable[[], None]:
+        """
+        Registra un suscriptor para un ticker (o para todos si ticker es None)
+
+        Returns:
+            Función que cancela la suscripción
+        """
+        with self._lock:
+            self._subscribers.setdefault(ticker, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(ticker, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+        return unsubscribe
+
+    def poll(self, ticker: str) -> pd.DataFrame:
+        """
+        Pide las barras desde la última conocida y publica el delta
+
+        Returns:
+            Barras nuevas o revisadas (vacío si no hubo cambios)
+        """
+        return self._flight.do(ticker, self._poll, ticker)
+
+    def _poll(self, ticker: str) -> pd.DataFrame:
+        last = self.last_timestamp(ticker)
+        bars = self.provider.get_intraday(ticker, start=last)
+        if bars is None or bars.empty:
+            with self._lock:
+                self.stats['polls'] += 1
+            return pd.DataFrame()
+
+        with self._lock:
+            self.stats['polls'] += 1
+            self.stats['rows_received'] += len(bars)
+            current = self._series.get(ticker, pd.DataFrame())
+            if current.empty:
+                delta = bars
+            else:
+                # Barras posteriores a la última y la última si cambió
+                known = current.reindex(bars.index)
+                changed = ~(known.eq(bars) | (known.isna() & bars.isna())).all(axis=1)
+                delta = bars[changed]
+            if delta.empty:
+                return delta
+
+            merged = pd.concat([current, delta]) if not current.empty else delta
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            # Solo la última rueda, acotada a max_bars
+            merged = merged[merged.index.normalize() == merged.index[-1].normalize()]
+            self._series[ticker] = merged.iloc[-self.max_bars:]
+            callbacks = list(self._subscribers.get(ticker, [])) + list(self._subscribers.get(None, []))
+
+        for callback in callbacks:
+            try:
+                callback(ticker, delta)
+            except Exception as e:
+                print(f"Error en suscriptor intradía de {ticker}: {e}")
+        return delta
+
+    def poll_all(self, tickers: Iterable[str] = None) -> Dict[str, pd.DataFrame]:
+        """Sondea varios tickers (por defecto los registrados con start)"""
+        deltas = {}
+        for ticker in list(tickers or self._tickers):
+            try:
+                deltas[ticker] = self.poll(ticker)
+            except Exception as e:
+                print(f"Error sondeando barras intradía de {ticker}: {e}")
+        return deltas
+
+    def start(self, tickers: Iterable[str]) -> None:
+        """Sondea en segundo plano cada poll_seconds los tickers indicados"""
+        self._tickers.update(tickers)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='intraday-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll_all()
+            self._stop.wait(self.poll_seconds)
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def get_intraday_poller(provider: MarketDataProvider = None) -> IntradayPoller:
+    """Sondeador único por fuente de datos en todo el proceso"""
+    provider = provider or get_provider()
+    with _pollers_lock:
+        if provider.cache_key not in _pollers:
+            _pollers[provider.cache_key] = IntradayPoller(provider)
+        return _pollers[provider.cache_key]
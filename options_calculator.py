@@ -1,10 +1,12 @@
 import numpy as np
 import pandas as pd
 from scipy.stats import norm
+from scipy.special import ndtr
 from scipy.optimize import minimize_scalar
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import warnings
+from utils import widen_frame
 warnings.filterwarnings('ignore')
 
 class OptionsCalculator:
@@ -45,6 +47,29 @@ class OptionsCalculator:
         put_price = K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
         return max(put_price, 0)
     
+    @staticmethod
+    def black_scholes_price(S, K, T, r, sigma, is_call=True) -> np.ndarray:
+        """
+        Black-Scholes vectorizado para calls y puts
+        
+        Todos los argumentos aceptan escalares o arrays y se combinan por broadcasting.
+        Con T <= 0 devuelve el valor intrínseco.
+        """
+        S, K, T, r, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, r, sigma))
+        is_call = np.asarray(is_call, dtype=bool)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_T = np.sqrt(np.maximum(T, 0))
+            d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+            d2 = d1 - sigma * sqrt_T
+            discounted_K = K * np.exp(-r * np.maximum(T, 0))
+            price = np.where(is_call,
+                             S * ndtr(d1) - discounted_K * ndtr(d2),
+                             discounted_K * ndtr(-d2) - S * ndtr(-d1))
+        
+        intrinsic = np.where(is_call, np.maximum(S - K, 0), np.maximum(K - S, 0))
+        return np.where((T > 0) & (sigma > 0), np.maximum(price, 0), intrinsic)
+    
     @staticmethod
     def calculate_greeks(S: float, K: float, T: float, r: float, sigma: float, option_type: str = 'call') -> Dict[str, float]:
         """
@@ -81,6 +106,35 @@ class OptionsCalculator:
             'rho': rho
         }
     
+    @staticmethod
+    def greeks_vectorized(S, K, T, r, sigma, is_call=True) -> Dict[str, np.ndarray]:
+        """
+        Greeks vectorizadas (mismas unidades que calculate_greeks: theta por día,
+        vega y rho por punto porcentual)
+        
+        Los argumentos aceptan escalares o arrays; con T <= 0 o sigma <= 0 las Greeks son 0.
+        """
+        S, K, T, r, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, r, sigma))
+        is_call = np.asarray(is_call, dtype=bool)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_T = np.sqrt(np.maximum(T, 0))
+            d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+            d2 = d1 - sigma * sqrt_T
+            pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+            discounted_K = K * np.exp(-r * T)
+            greeks = {
+                'delta': np.where(is_call, ndtr(d1), ndtr(d1) - 1),
+                'gamma': pdf_d1 / (S * sigma * sqrt_T),
+                'theta': (-(S * pdf_d1 * sigma) / (2 * sqrt_T)
+                          - np.where(is_call, r * discounted_K * ndtr(d2), -r * discounted_K * ndtr(-d2))) / 365,
+                'vega': S * pdf_d1 * sqrt_T / 100,
+                'rho': np.where(is_call, discounted_K * T * ndtr(d2), -discounted_K * T * ndtr(-d2)) / 100
+            }
+        
+        valid = (T > 0) & (sigma > 0)
+        return {name: np.where(valid, value, 0.0) for name, value in greeks.items()}
+    
     @staticmethod
     def implied_volatility(market_price: float, S: float, K: float, T: float, r: float, option_type: str = 'call') -> float:
         """
@@ -143,6 +197,10 @@ class OptionsCalculator:
     def analyze_option_chain(options_data: pd.DataFrame, S: float, r: float, expiration_date: str) -> pd.DataFrame:
         """
         Analiza una cadena de opciones completa
+        
+        La cadena puede venir con tipos compactos (float32, ver compact_chain); los
+        cálculos y el resultado son float64, con los strikes y precios cotizados tal
+        como se listaron.
         """
         if options_data.empty:
             return pd.DataFrame()
@@ -151,6 +209,9 @@ class OptionsCalculator:
         if T <= 0:
             return options_data
         
+        options_data = widen_frame(options_data)
+        numeric = options_data.select_dtypes('number').columns
+        options_data = options_data.astype({column: 'float64' for column in numeric})
         results = []
         
         for _, option in options_data.iterrows():
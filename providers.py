@@ -0,0 +1,288 @@
+"""
+Proveedores de datos de mercado.
+
+DataFetcher y UniverseFetcher no hablan directamente con yfinance sino con un
+MarketDataProvider:
+
+- YFinanceProvider: datos en vivo de Yahoo Finance.
+- ReplayProvider: reproduce snapshots grabados en disco (con record_snapshot), para
+  pruebas y benchmarks deterministas sin red.
+
+El proveedor por defecto se elige con PROVIDER_CONFIG o con la variable de entorno
+MARKET_DATA_PROVIDER ('yfinance' o 'replay').
+"""
+
+import os
+import json
+import time
+import yfinance as yf
+from abc import ABC, abstractmethod
+import pandas as pd
+from typing import Dict, List, Optional
+from config import API_CONFIG, PROVIDER_CONFIG
+from utils import period_to_offset
+
+
+def split_bulk_download(data: pd.DataFrame, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """Separa el resultado de yf.download(group_by='ticker') en un DataFrame por ticker"""
+    frames = {}
+    if data is None or data.empty:
+        return {ticker: pd.DataFrame() for ticker in tickers}
+
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                frames[ticker] = pd.DataFrame()
+                continue
+            frame = data[ticker]
+        else:
+            # Descarga de un solo ticker sin columnas multinivel
+            frame = data if len(tickers) == 1 else pd.DataFrame()
+        # Cada ticker cotiza en su propio calendario (ADRs vs .BA)
+        frames[ticker] = frame.dropna(how='all')
+    return frames
+
+
+class MarketDataProvider(ABC):
+    """Interfaz de un proveedor de datos de mercado"""
+
+    # Los datos en vivo se guardan en el almacenamiento en disco; los reproducidos no
+    LIVE = True
+
+    @property
+    def cache_key(self) -> str:
+        """Identifica la fuente de datos en claves de cache y de coalescencia"""
+        return type(self).__name__
+
+    @abstractmethod
+    def get_intraday(self, ticker: str, start: pd.Timestamp = None) -> pd.DataFrame:
+        """Barras de 1 minuto de la rueda actual (desde start inclusive, si se indica)"""
+
+    @abstractmethod
+    def get_history(self, ticker: str, period: str = "1y", start: str = None) -> pd.DataFrame:
+        """Historia diaria por período o desde una fecha"""
+
+    def get_histories(self, tickers: List[str], period: str = "1y", start: str = None,
+                      interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """Historia de varios tickers; por defecto una llamada por ticker"""
+        if interval != "1d":
+            return {ticker: self.get_intraday(ticker) for ticker in tickers}
+        return {ticker: self.get_history(ticker, period=period, start=start) for ticker in tickers}
+
+    @abstractmethod
+    def get_expirations(self, ticker: str) -> List[str]:
+        """Vencimientos disponibles (YYYY-MM-DD), en orden cronológico"""
+
+    @abstractmethod
+    def get_option_chain(self, ticker: str, expiration: str) -> Dict[str, pd.DataFrame]:
+        """Cadena de un vencimiento: {'calls': DataFrame, 'puts': DataFrame}"""
+
+    def get_rate(self, symbol: str = "^TNX") -> Optional[float]:
+        """Último rendimiento de un índice de tasas de Yahoo, en decimal"""
+        data = self.get_history(symbol, period="5d")
+        if data.empty:
+            return None
+        return data['Close'].iloc[-1] / 100
+
+    @abstractmethod
+    def get_info(self, ticker: str) -> Dict:
+        """Información de la empresa (campos de yfinance Ticker.info)"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Datos en vivo de Yahoo Finance"""
+
+    def __init__(self):
+        self._tickers = {}
+
+    def ticker(self, ticker: str) -> yf.Ticker:
+        """yf.Ticker reutilizable (conserva sesión y cookies)"""
+        if ticker not in self._tickers:
+            self._tickers[ticker] = yf.Ticker(ticker)
+        return self._tickers[ticker]
+
+    def get_intraday(self, ticker: str, start: pd.Timestamp = None) -> pd.DataFrame:
+        if start is not None:
+            return self.ticker(ticker).history(start=start, interval="1m")
+        return self.ticker(ticker).history(period="1d", interval="1m")
+
+    def get_history(self, ticker: str, period: str = "1y", start: str = None) -> pd.DataFrame:
+        if start is not None:
+            return self.ticker(ticker).history(start=start)
+        return self.ticker(ticker).history(period=period)
+
+    def get_histories(self, tickers: List[str], period: str = "1y", start: str = None,
+                      interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """Una sola llamada a yf.download para todos los tickers"""
+        window = {'start': start} if start else {'period': period}
+        data = yf.download(
+            tickers,
+            interval=interval,
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            timeout=API_CONFIG['TIMEOUT'],
+            **window
+        )
+        return split_bulk_download(data, tickers)
+
+    def get_expirations(self, ticker: str) -> List[str]:
+        return list(self.ticker(ticker).options)
+
+    def get_option_chain(self, ticker: str, expiration: str) -> Dict[str, pd.DataFrame]:
+        opt_chain = self.ticker(ticker).option_chain(expiration)
+        return {'calls': opt_chain.calls, 'puts': opt_chain.puts}
+
+    def get_info(self, ticker: str) -> Dict:
+        return self.ticker(ticker).info
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Reproduce snapshots grabados en disco
+
+    Estructura de un snapshot (ver record_snapshot):
+
+        <root>/<ticker>/history.parquet
+        <root>/<ticker>/intraday.parquet
+        <root>/<ticker>/chains/<vencimiento>_calls.parquet
+        <root>/<ticker>/chains/<vencimiento>_puts.parquet
+        <root>/<ticker>/info.json
+
+    Args:
+        root: Directorio de snapshots
+        speed: None sirve el snapshot completo; un número reproduce las barras
+            intradía a esa velocidad respecto del reloj real (60 = un minuto de
+            mercado por segundo), empezando por la primera barra
+        latency: Demora artificial por llamada en segundos, para pruebas de carga
+    """
+
+    LIVE = False
+
+    @property
+    def cache_key(self) -> str:
+        return f"replay:{os.path.abspath(self.root)}"
+
+    def __init__(self, root: str = None, speed: float = None, latency: float = None):
+        self.root = root or PROVIDER_CONFIG['REPLAY_DIR']
+        self.speed = speed if speed is not None else PROVIDER_CONFIG['REPLAY_SPEED']
+        self.latency = latency if latency is not None else PROVIDER_CONFIG['REPLAY_LATENCY']
+        self._frames = {}
+        self._started = time.monotonic()
+
+    def _read(self, ticker: str, *parts: str) -> pd.DataFrame:
+        """Lee (una vez) un Parquet del snapshot; vacío si no existe"""
+        if self.latency:
+            time.sleep(self.latency)
+        path = os.path.join(self.root, ticker, *parts)
+        if path not in self._frames:
+            self._frames[path] = pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame()
+        return self._frames[path]
+
+    def get_intraday(self, ticker: str, start: pd.Timestamp = None) -> pd.DataFrame:
+        data = self._read(ticker, "intraday.parquet")
+        if data.empty:
+            return data
+        if self.speed is not None:
+            elapsed = pd.Timedelta(seconds=(time.monotonic() - self._started) * self.speed)
+            data = data[data.index <= data.index[0] + elapsed]
+        if start is not None:
+            data = data[data.index >= start]
+        return data
+
+    def get_history(self, ticker: str, period: str = "1y", start: str = None) -> pd.DataFrame:
+        data = self._read(ticker, "history.parquet")
+        if data.empty:
+            return data
+        if start is not None:
+            start = pd.Timestamp(start)
+            if data.index.tz is not None:
+                start = start.tz_localize(data.index.tz)
+            return data[data.index >= start]
+        offset = period_to_offset(period)
+        if offset is None:
+            return data
+        return data[data.index > data.index[-1] - offset]
+
+    def get_expirations(self, ticker: str) -> List[str]:
+        if self.latency:
+            time.sleep(self.latency)
+        chains_dir = os.path.join(self.root, ticker, "chains")
+        if not os.path.isdir(chains_dir):
+            return []
+        return sorted({name.split('_')[0] for name in os.listdir(chains_dir) if name.endswith('.parquet')})
+
+    def get_option_chain(self, ticker: str, expiration: str) -> Dict[str, pd.DataFrame]:
+        calls = self._read(ticker, "chains", f"{expiration}_calls.parquet")
+        puts = self._read(ticker, "chains", f"{expiration}_puts.parquet")
+        if calls.empty and puts.empty:
+            raise ValueError(f"Vencimiento {expiration} no grabado para {ticker}")
+        return {'calls': calls, 'puts': puts}
+
+    def get_info(self, ticker: str) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        path = os.path.join(self.root, ticker, "info.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def record_snapshot(ticker: str, root: str, history: pd.DataFrame,
+                    intraday: pd.DataFrame = None, options_chain: Dict = None,
+                    info: Dict = None) -> str:
+    """
+    Graba un snapshot que ReplayProvider puede reproducir
+
+    Args:
+        ticker: Ticker (o símbolo de tasas como '^TNX')
+        root: Directorio de snapshots
+        history: Historia diaria
+        intraday: Barras de 1 minuto
+        options_chain: {vencimiento: {'calls': DataFrame, 'puts': DataFrame}}
+        info: Información de la empresa
+
+    Returns:
+        Directorio del snapshot del ticker
+    """
+    ticker_dir = os.path.join(root, ticker)
+    os.makedirs(ticker_dir, exist_ok=True)
+    history.to_parquet(os.path.join(ticker_dir, "history.parquet"))
+    if intraday is not None and not intraday.empty:
+        intraday.to_parquet(os.path.join(ticker_dir, "intraday.parquet"))
+    if options_chain:
+        chains_dir = os.path.join(ticker_dir, "chains")
+        os.makedirs(chains_dir, exist_ok=True)
+        for expiration, chain in options_chain.items():
+            chain['calls'].to_parquet(os.path.join(chains_dir, f"{expiration}_calls.parquet"))
+            chain['puts'].to_parquet(os.path.join(chains_dir, f"{expiration}_puts.parquet"))
+    if info:
+        with open(os.path.join(ticker_dir, "info.json"), 'w', encoding='utf-8') as f:
+            json.dump(info, f, default=str)
+    return ticker_dir
+
+
+def record_live_snapshot(ticker: str, root: str = None, provider: MarketDataProvider = None,
+                         period: str = "2y", max_expirations: int = None) -> str:
+    """Graba desde un proveedor en vivo el estado actual de un ticker"""
+    provider = provider or YFinanceProvider()
+    expirations = provider.get_expirations(ticker)[:max_expirations]
+    return record_snapshot(
+        ticker,
+        root or PROVIDER_CONFIG['REPLAY_DIR'],
+        history=provider.get_history(ticker, period=period),
+        intraday=provider.get_intraday(ticker),
+        options_chain={exp: provider.get_option_chain(ticker, exp) for exp in expirations},
+        info=provider.get_info(ticker)
+    )
+
+
+def get_provider(name: str = None) -> MarketDataProvider:
+    """Crea el proveedor configurado ('yfinance' o 'replay')"""
+    name = name or os.environ.get('MARKET_DATA_PROVIDER') or PROVIDER_CONFIG['DEFAULT']
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'replay':
+        return ReplayProvider()
+    raise ValueError(f"Proveedor de datos desconocido: {name}")
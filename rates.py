@@ -0,0 +1,126 @@
+"""
+Curva de tasas libres de riesgo compartida por todo el proceso.
+
+Los rendimientos del Tesoro de EE.UU. (^IRX, ^FVX, ^TNX, ^TYX) se descargan una
+sola vez por RATES_CONFIG['TTL'] para todos los tickers y se interpolan para
+obtener r(T) con capitalización continua, que es la que usa Black-Scholes.
+"""
+
+import time
+import threading
+import numpy as np
+from typing import Dict, Union
+from config import RATES_CONFIG
+from providers import MarketDataProvider, get_provider
+from utils import SingleFlight
+
+
+def to_continuous_rate(quote: float, symbol: str) -> float:
+    """
+    Convierte una cotización de Yahoo (en %) a tasa con capitalización continua
+
+    ^IRX cotiza la tasa de descuento de la letra a 13 semanas; el resto son
+    rendimientos de bonos con cupón semestral.
+    """
+    y = quote / 100
+    if symbol == '^IRX':
+        days = 91
+        price = 1 - y * days / 360
+        return -np.log(price) / (days / 365)
+    return 2 * np.log(1 + y / 2)
+
+
+class RateCurve:
+    """Curva r(T) interpolada linealmente (plana fuera del rango de plazos)"""
+
+    def __init__(self, tenors, rates, as_of: float = None):
+        order = np.argsort(tenors)
+        self.tenors = np.asarray(tenors, dtype=float)[order]
+        self.rates = np.asarray(rates, dtype=float)[order]
+        self.as_of = as_of
+
+    @classmethod
+    def flat(cls, rate: float) -> 'RateCurve':
+        """Curva constante"""
+        return cls([1.0], [rate])
+
+    def __call__(self, T: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Tasa para uno o varios plazos en años"""
+        rates = np.interp(np.asarray(T, dtype=float), self.tenors, self.rates)
+        return float(rates) if np.ndim(rates) == 0 else rates
+
+    def to_dict(self) -> Dict[float, float]:
+        """{plazo en años: tasa}"""
+        return dict(zip(self.tenors.tolist(), self.rates.tolist()))
+
+
+class RateService:
+    """Descarga y cachea la curva del Tesoro; pedidos concurrentes comparten la descarga"""
+
+    def __init__(self, provider: MarketDataProvider = None, ttl: float = None):
+        self.provider = provider or get_provider()
+        self.ttl = ttl if ttl is not None else RATES_CONFIG['TTL']
+        # (curva, momento de descarga, vigencia): se publica como una sola tupla para que
+        # get_curve, que lee sin lock, nunca vea una curva sin su marca de tiempo
+        self._state = None
+        self._flight = SingleFlight()
+
+    def get_curve(self) -> RateCurve:
+        """
+        Curva vigente (la descarga de nuevo si venció el TTL)
+
+        Si la última descarga no trajo datos, la curva de respaldo (la última conocida
+        o la plana en DEFAULT_RATE) solo se sirve RATES_CONFIG['FALLBACK_TTL'] segundos.
+        """
+        state = self._state
+        if state is not None:
+            curve, fetched_at, valid_for = state
+            if time.monotonic() - fetched_at < valid_for:
+                return curve
+        return self._flight.do('curve', self._refresh)
+
+    def rate(self, T: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """r(T) para uno o varios plazos en años"""
+        return self.get_curve()(T)
+
+    def _refresh(self) -> RateCurve:
+        tenors = RATES_CONFIG['TENORS']
+        try:
+            histories = self.provider.get_histories(list(tenors), period="5d")
+        except Exception as e:
+            print(f"Error obteniendo curva de tasas: {e}")
+            histories = {}
+
+        points = {}
+        for symbol, tenor in tenors.items():
+            data = histories.get(symbol)
+            if data is None or data.empty:
+                continue
+            close = data['Close'].dropna()
+            if not close.empty:
+                points[tenor] = to_continuous_rate(close.iloc[-1], symbol)
+
+        if points:
+            curve = RateCurve(list(points), list(points.values()), as_of=time.time())
+        elif self._state is not None:
+            # Sin datos nuevos: conservar la última curva conocida
+            curve = self._state[0]
+        else:
+            curve = RateCurve.flat(RATES_CONFIG['DEFAULT_RATE'])
+
+        valid_for = self.ttl if points else min(self.ttl, RATES_CONFIG['FALLBACK_TTL'])
+        self._state = (curve, time.monotonic(), valid_for)
+        return curve
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_rate_service(provider: MarketDataProvider = None) -> RateService:
+    """Servicio de tasas único por fuente de datos en todo el proceso"""
+    provider = provider or get_provider()
+    with _services_lock:
+        if provider.cache_key not in _services:
+            _services[provider.cache_key] = RateService(provider)
+        return _services[provider.cache_key]
@@ -0,0 +1,211 @@
+"""
+Cache de datos de referencia que cambian a lo sumo una vez por día.
+
+La información de la empresa (Ticker.info, uno de los endpoints más lentos de
+Yahoo) y los vencimientos listados se guardan en memoria y en disco:
+
+    market_data/reference/ticker=GGAL.json
+
+Una entrada vale REFERENCE_CONFIG['TTL'] segundos y nunca pasa de un día al
+siguiente. Al iniciar la app se precargan todos los MERVAL_TICKERS en paralelo.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+from config import REFERENCE_CONFIG, STORAGE_CONFIG, MERVAL_TICKERS
+from providers import MarketDataProvider, get_provider
+from utils import SingleFlight, unique_temp_path
+
+
+class ReferenceDataCache:
+    """
+    Información de la empresa y vencimientos por ticker, con TTL diario
+
+    Args:
+        provider: Fuente de datos
+        ttl: Vigencia de una entrada en segundos
+        root: Raíz del almacenamiento en disco
+        persist: Guardar en disco (por defecto solo con proveedores en vivo)
+    """
+
+    KINDS = ('info', 'expirations')
+
+    def __init__(self, provider: MarketDataProvider = None, ttl: float = None,
+                 root: str = None, persist: bool = None):
+        self.provider = provider or get_provider()
+        self.ttl = ttl if ttl is not None else REFERENCE_CONFIG['TTL']
+        self.root = os.path.join(root or STORAGE_CONFIG['DATA_DIR'], 'reference')
+        if persist is None:
+            persist = REFERENCE_CONFIG['DISK_ENABLED'] and self.provider.LIVE
+        self.persist = persist
+        # {ticker: {tipo: (valor, hora de la descarga en epoch)}}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._prefetch_thread = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'fetches': 0}
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"ticker={ticker}.json")
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        """Vigente por TTL y descargado hoy"""
+        return (time.time() - fetched_at < self.ttl and
+                date.fromtimestamp(fetched_at) == date.today())
+
+    def _load(self, ticker: str) -> Dict:
+        """Entradas guardadas en disco del ticker"""
+        path = self.path(ticker)
+        if not self.persist or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                return {kind: tuple(entry) for kind, entry in json.load(f).items()}
+        except Exception as e:
+            print(f"Error leyendo datos de referencia de {ticker}: {e}")
+            return {}
+
+    def _save(self, ticker: str, entries: Dict) -> None:
+        """Escritura atómica: archivo temporal y os.replace"""
+        if not self.persist:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(ticker)
+        tmp_path = unique_temp_path(path)
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({kind: list(entry) for kind, entry in entries.items()}, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error guardando datos de referencia de {ticker}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, kind: str, ticker: str):
+        """
+        Dato de referencia de un ticker: memoria, disco o proveedor, en ese orden
+
+        Si la descarga falla se devuelve el último valor conocido aunque esté vencido.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Dato de referencia desconocido: {kind}")
+
+        with self._lock:
+            entries = self._entries.get(ticker)
+        if entries is None:
+            entries = self._load(ticker)
+            with self._lock:
+                self._entries.setdefault(ticker, entries)
+            if kind in entries and self._is_fresh(entries[kind][1]):
+                self.stats['disk_hits'] += 1
+                return entries[kind][0]
+        elif kind in entries and self._is_fresh(entries[kind][1]):
+            self.stats['hits'] += 1
+            return entries[kind][0]
+
+        try:
+            return self._flight.do((kind, ticker), self._refresh, kind, ticker)
+        except Exception:
+            if kind in entries:
+                return entries[kind][0]
+            raise
+
+    def _refresh(self, kind: str, ticker: str):
+        if kind == 'info':
+            value = self.provider.get_info(ticker)
+        else:
+            value = list(self.provider.get_expirations(ticker))
+        self.stats['fetches'] += 1
+        if not value:
+            # Una respuesta vacía suele ser una falla transitoria: no se cachea
+            return value
+
+        with self._lock:
+            entries = self._entries.setdefault(ticker, {})
+            entries[kind] = (value, time.time())
+            snapshot = dict(entries)
+        self._save(ticker, snapshot)
+        return value
+
+    def get_info(self, ticker: str) -> Dict:
+        """Información de la empresa (campos de Ticker.info)"""
+        return self.get('info', ticker)
+
+    def get_expirations(self, ticker: str) -> List[str]:
+        """
+        Vencimientos listados que todavía no pasaron
+
+        Solo con proveedores en vivo: un snapshot reproducido devuelve los vencimientos
+        grabados sin importar la fecha de hoy, para que la reproducción sea determinista.
+        """
+        expirations = self.get('expirations', ticker)
+        if not self.provider.LIVE:
+            return list(expirations)
+        today = date.today().isoformat()
+        return [expiration for expiration in expirations if expiration >= today]
+
+    def invalidate(self, ticker: str = None) -> None:
+        """Descarta la memoria de un ticker (o de todos) para forzar la relectura"""
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ticker, None)
+
+    def prefetch(self, tickers: Iterable[str] = None, kinds: Iterable[str] = None,
+                 workers: int = None) -> Dict[str, str]:
+        """
+        Carga en paralelo los datos de referencia de varios tickers
+
+        Returns:
+            {ticker: motivo} de los tickers que fallaron
+        """
+        tickers = list(tickers or MERVAL_TICKERS.keys())
+        kinds = list(kinds or self.KINDS)
+        errors = {}
+
+        def load(ticker):
+            for kind in kinds:
+                try:
+                    self.get(kind, ticker)
+                except Exception as e:
+                    errors[ticker] = str(e)
+
+        with ThreadPoolExecutor(max_workers=workers or REFERENCE_CONFIG['PREFETCH_WORKERS'],
+                                thread_name_prefix='reference-prefetch') as executor:
+            list(executor.map(load, tickers))
+        if errors:
+            print(f"Datos de referencia sin precargar: {errors}")
+        return errors
+
+    def start_prefetch(self, tickers: Iterable[str] = None) -> threading.Thread:
+        """
+        Precarga en segundo plano (no bloquea el inicio de la app)
+
+        Solo la primera llamada lanza la precarga; las siguientes devuelven el mismo hilo,
+        así la app puede llamarla en cada rerun.
+        """
+        with self._lock:
+            if self._prefetch_thread is None:
+                self._prefetch_thread = threading.Thread(target=self.prefetch, args=(tickers,),
+                                                         name='reference-prefetch', daemon=True)
+                self._prefetch_thread.start()
+            return self._prefetch_thread
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_reference_cache(provider: MarketDataProvider = None) -> ReferenceDataCache:
+    """Cache de referencia único por fuente de datos en todo el proceso"""
+    provider = provider or get_provider()
+    with _caches_lock:
+        if provider.cache_key not in _caches:
+            _caches[provider.cache_key] = ReferenceDataCache(provider)
+        return _caches[provider.cache_key]
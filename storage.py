@@ -0,0 +1,435 @@
+"""
+Almacenamiento local en disco de datos de mercado.
+
+La historia diaria (OHLCV) se guarda en Parquet particionado por ticker:
+
+    market_data/ohlcv/ticker=GGAL/data.parquet
+
+de modo que al refrescar solo se piden a la red las ruedas posteriores a la
+última guardada.
+
+Las cadenas de opciones se guardan como snapshots particionados por ticker y día:
+
+    market_data/chains/ticker=GGAL/date=2025-01-15/part-<hora>.parquet
+    market_data/chains/ticker=GGAL/date=2025-01-14/data.parquet   (día compactado)
+
+Los archivos se escriben en un temporal único y se publican con os.replace, de modo
+que varios procesos (réplicas de la app) pueden compartir el mismo directorio.
+"""
+
+import os
+import glob
+import time
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from config import STORAGE_CONFIG
+from options_calculator import OptionsCalculator
+from utils import unique_temp_path
+
+
+class OHLCVStore:
+    """Historia diaria por ticker en Parquet con anexado incremental"""
+    
+    def __init__(self, root: str = None):
+        self.root = os.path.join(root or STORAGE_CONFIG['DATA_DIR'], 'ohlcv')
+    
+    def path_for(self, ticker: str) -> str:
+        """Ruta del archivo Parquet de un ticker"""
+        return os.path.join(self.root, f"ticker={ticker}", "data.parquet")
+    
+    def load(self, ticker: str) -> pd.DataFrame:
+        """Lee la historia guardada de un ticker (vacía si no existe o está dañada)"""
+        path = self.path_for(ticker)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"Error leyendo historia guardada de {ticker}: {e}")
+            return pd.DataFrame()
+    
+    def last_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        """Última rueda guardada de un ticker"""
+        data = self.load(ticker)
+        return data.index[-1] if not data.empty else None
+    
+    def write(self, ticker: str, data: pd.DataFrame) -> None:
+        """Reemplaza la historia de un ticker (escritura atómica vía archivo temporal)"""
+        if data.empty:
+            return
+        path = self.path_for(ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = unique_temp_path(path)
+        try:
+            data.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error guardando historia de {ticker}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @staticmethod
+    def merge(stored: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        """Une historia guardada y ruedas nuevas; ante fechas repetidas gana la más reciente"""
+        if stored.empty:
+            return new.sort_index()
+        if new.empty:
+            return stored
+        if stored.index.tz is not None and new.index.tz is not None:
+            new = new.tz_convert(stored.index.tz)
+        combined = pd.concat([stored, new[stored.columns.intersection(new.columns)]])
+        return combined[~combined.index.duplicated(keep='last')].sort_index()
+    
+    def append(self, ticker: str, new: pd.DataFrame) -> pd.DataFrame:
+        """Anexa ruedas nuevas a la historia guardada y devuelve la historia completa"""
+        merged = self.merge(self.load(ticker), new)
+        self.write(ticker, merged)
+        return merged
+    
+    def covers(self, data: pd.DataFrame, start: Optional[datetime]) -> bool:
+        """Indica si la historia guardada alcanza el inicio pedido (con MAX_GAP_DAYS de tolerancia)"""
+        if data.empty or start is None:
+            return False
+        first = data.index[0].tz_localize(None) if data.index.tz is not None else data.index[0]
+        return (first - pd.Timestamp(start)).days <= STORAGE_CONFIG['MAX_GAP_DAYS']
+
+
+# Esquema de los snapshots de cadenas: tipos compactos y diccionarios con índice fijo
+# (int32) para que todos los archivos compartan el mismo esquema
+CHAIN_SNAPSHOT_SCHEMA = pa.schema([
+    ('snapshot_time', pa.timestamp('ms', tz='UTC')),
+    ('expiration', pa.dictionary(pa.int32(), pa.string())),
+    ('optionType', pa.dictionary(pa.int32(), pa.string())),
+    ('contractSymbol', pa.dictionary(pa.int32(), pa.string())),
+    ('strike', pa.float32()),
+    ('underlyingPrice', pa.float32()),
+    ('lastPrice', pa.float32()),
+    ('bid', pa.float32()),
+    ('ask', pa.float32()),
+    ('volume', pa.float32()),
+    ('openInterest', pa.float32()),
+    ('impliedVolatility', pa.float32()),
+    ('delta', pa.float32()),
+    ('gamma', pa.float32()),
+    ('theta', pa.float32()),
+    ('vega', pa.float32()),
+])
+
+
+# Compactación de días anteriores fuera del camino de la descarga (un hilo para todo el proceso)
+_compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chain-compact')
+
+
+class ChainSnapshotStore:
+    """
+    Snapshots de cadenas de opciones (cotizaciones, IV y Greeks) a lo largo del tiempo
+
+    Cada snapshot se agrega como un archivo chico del día; los días anteriores se
+    compactan en segundo plano en un único archivo ordenado por (vencimiento, tipo,
+    strike, hora) para que las consultas por contrato o rango de strikes salteen grupos
+    de filas enteros. Un archivo de lock por día evita que dos procesos compacten el
+    mismo día a la vez.
+    """
+
+    ROW_GROUP_SIZE = 65536
+    LOCK_FILE = "compact.lock"
+    LOCK_STALE_SECONDS = 600  # lock de un proceso que murió a mitad de la compactación
+    QUERY_RETRIES = 3  # relecturas si una compactación borra partes durante una consulta
+
+    def __init__(self, root: str = None):
+        self.root = os.path.join(root or STORAGE_CONFIG['DATA_DIR'], 'chains')
+        # Último día para el que ya se compactaron los anteriores, por ticker
+        self._compacted = {}
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def day_dir(self, ticker: str, day: date) -> str:
+        return os.path.join(self.root, f"ticker={ticker}", f"date={day.isoformat()}")
+
+    @staticmethod
+    def build_snapshot(options_chain: Dict, S: float, r=0.05, snapshot_time: datetime = None) -> pd.DataFrame:
+        """
+        Aplana una cadena {vencimiento: {'calls', 'puts'}} con Greeks calculadas desde la IV
+
+        Args:
+            options_chain: Cadena de DataFetcher.get_options_chain
+            S: Precio del subyacente en el momento del snapshot
+            r: Tasa libre de riesgo o curva r(T)
+            snapshot_time: Momento del snapshot (por defecto ahora)
+        """
+        snapshot_time = pd.Timestamp(snapshot_time or datetime.now())
+        snapshot_time = snapshot_time.tz_localize('UTC') if snapshot_time.tz is None else snapshot_time.tz_convert('UTC')
+
+        frames = []
+        for expiration, chain in (options_chain or {}).items():
+            for option_type, key in (('call', 'calls'), ('put', 'puts')):
+                data = chain.get(key)
+                if data is None or data.empty:
+                    continue
+                frame = pd.DataFrame({
+                    column: data[column] if column in data else np.nan
+                    for column in ('contractSymbol', 'strike', 'lastPrice', 'bid', 'ask',
+                                   'volume', 'openInterest', 'impliedVolatility')
+                })
+                frame['expiration'] = expiration
+                frame['optionType'] = option_type
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=CHAIN_SNAPSHOT_SCHEMA.names)
+
+        snapshot = pd.concat(frames, ignore_index=True)
+        T = (pd.to_datetime(snapshot['expiration']).dt.tz_localize('UTC') + pd.Timedelta(hours=21)
+             - snapshot_time).dt.total_seconds().to_numpy() / (365.25 * 86400)
+        rates = r(np.maximum(T, 0)) if callable(r) else r
+        greeks = OptionsCalculator.greeks_vectorized(
+            S, snapshot['strike'].to_numpy(float), T, rates,
+            snapshot['impliedVolatility'].to_numpy(float), snapshot['optionType'].to_numpy() == 'call'
+        )
+        for name in ('delta', 'gamma', 'theta', 'vega'):
+            snapshot[name] = greeks[name]
+        snapshot['snapshot_time'] = snapshot_time
+        snapshot['underlyingPrice'] = S
+        # Tipos compactos: categorías para los textos repetidos y float32 para los números
+        for field in CHAIN_SNAPSHOT_SCHEMA:
+            if pa.types.is_dictionary(field.type):
+                snapshot[field.name] = snapshot[field.name].astype(str).astype('category')
+            elif pa.types.is_floating(field.type):
+                snapshot[field.name] = snapshot[field.name].astype('float32')
+        return snapshot[CHAIN_SNAPSHOT_SCHEMA.names]
+
+    def _to_table(self, snapshot: pd.DataFrame) -> pa.Table:
+        return pa.Table.from_pandas(snapshot, schema=CHAIN_SNAPSHOT_SCHEMA, preserve_index=False)
+
+    def append(self, ticker: str, snapshot: pd.DataFrame) -> Optional[str]:
+        """
+        Agrega un snapshot (de build_snapshot) como archivo del día
+
+        El archivo aparece completo (temporal y os.replace), así una compactación de
+        otro proceso nunca lee una parte a medio escribir. La compactación de los días
+        anteriores se encola en segundo plano, una vez por ticker y día.
+        """
+        if snapshot.empty:
+            return None
+        snapshot_time = snapshot['snapshot_time'].iloc[0]
+        day_dir = self.day_dir(ticker, snapshot_time.date())
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f"part-{snapshot_time.strftime('%H%M%S%f')}.parquet")
+        tmp_path = unique_temp_path(path)
+        try:
+            pq.write_table(self._to_table(snapshot), tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error guardando snapshot de cadena de {ticker}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        self._schedule_compaction(ticker, snapshot_time.date())
+        return path
+
+    def _schedule_compaction(self, ticker: str, today: date) -> None:
+        with self._lock:
+            if self._compacted.get(ticker) == today:
+                return
+            self._compacted[ticker] = today
+            self._pending = [future for future in self._pending if not future.done()]
+            self._pending.append(_compactor.submit(self.compact_previous_days, ticker, today))
+
+    def flush(self) -> None:
+        """Espera las compactaciones encoladas"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result()
+
+    def compact_previous_days(self, ticker: str, today: date) -> None:
+        """Compacta los días anteriores a today que todavía tengan archivos sueltos"""
+        for day_dir in glob.glob(os.path.join(self.root, f"ticker={ticker}", "date=*")):
+            day = date.fromisoformat(os.path.basename(day_dir)[len("date="):])
+            if day < today and glob.glob(os.path.join(day_dir, "part-*.parquet")):
+                try:
+                    self.compact(ticker, day)
+                except Exception as e:
+                    print(f"Error compactando snapshots de {ticker} del {day}: {e}")
+
+    def _acquire_lock(self, day_dir: str) -> Optional[str]:
+        """Crea el lock de compactación del día; None si otro proceso lo tiene"""
+        path = os.path.join(day_dir, self.LOCK_FILE)
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) < self.LOCK_STALE_SECONDS:
+                        return None
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return None
+
+    def compact(self, ticker: str, day: date) -> Optional[str]:
+        """
+        Une los snapshots de un día en data.parquet ordenado para consultas por contrato/strike
+
+        Solo borra las partes que leyó: las que otro proceso agregue mientras tanto quedan
+        para la próxima compactación. Devuelve None si otro proceso está compactando el día.
+        """
+        day_dir = self.day_dir(ticker, day)
+        lock = self._acquire_lock(day_dir)
+        if lock is None:
+            return None
+        try:
+            path = os.path.join(day_dir, "data.parquet")
+            files = sorted(glob.glob(os.path.join(day_dir, "*.parquet")))
+            if not files:
+                return None
+            data = ds.dataset(files, format='parquet', schema=CHAIN_SNAPSHOT_SCHEMA).to_table().to_pandas()
+            data = data.sort_values(['expiration', 'optionType', 'strike', 'snapshot_time'], kind='stable')
+            table = self._to_table(data)
+            tmp_path = unique_temp_path(path)
+            try:
+                pq.write_table(table, tmp_path, row_group_size=self.ROW_GROUP_SIZE)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            for file in files:
+                if file != path:
+                    os.remove(file)
+            return path
+        finally:
+            os.remove(lock)
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+
+    def _files(self, ticker: str, start: datetime = None, end: datetime = None) -> List[str]:
+        """
+        Archivos de los días dentro del rango (poda por partición de fecha)
+
+        Si el día tiene data.parquet, las partes anteriores a él ya están incluidas (las
+        está por borrar una compactación en curso) y se omiten para no duplicar filas.
+        """
+        files = []
+        start_day = pd.Timestamp(start).date() if start is not None else None
+        end_day = pd.Timestamp(end).date() if end is not None else None
+        for day_dir in sorted(glob.glob(os.path.join(self.root, f"ticker={ticker}", "date=*"))):
+            day = date.fromisoformat(os.path.basename(day_dir)[len("date="):])
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            day_files = sorted(glob.glob(os.path.join(day_dir, "*.parquet")))
+            compacted = os.path.join(day_dir, "data.parquet")
+            compacted_at = self._mtime(compacted) if compacted in day_files else None
+            if compacted_at is not None:
+                day_files = [file for file in day_files
+                             if file == compacted or (self._mtime(file) or 0) > compacted_at]
+            files.extend(day_files)
+        return files
+
+    @staticmethod
+    def _utc(value) -> pd.Timestamp:
+        value = pd.Timestamp(value)
+        return value.tz_localize('UTC') if value.tz is None else value.tz_convert('UTC')
+
+    def query(self, ticker: str, start: datetime = None, end: datetime = None,
+              contract: str = None, expiration: str = None, option_type: str = None,
+              strike_range: Tuple[float, float] = None, columns: List[str] = None) -> pd.DataFrame:
+        """
+        Serie temporal de cotizaciones, IV y Greeks
+
+        Args:
+            ticker: Ticker del subyacente
+            start, end: Rango de tiempo de los snapshots
+            contract: contractSymbol de un contrato puntual
+            expiration: Vencimiento (YYYY-MM-DD)
+            option_type: 'call' o 'put'
+            strike_range: (strike mínimo, strike máximo)
+            columns: Columnas a leer (por defecto todas)
+
+        Returns:
+            DataFrame ordenado por snapshot_time
+        """
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field('snapshot_time') >= pa.scalar(self._utc(start), CHAIN_SNAPSHOT_SCHEMA.field('snapshot_time').type))
+        if end is not None:
+            conditions.append(ds.field('snapshot_time') <= pa.scalar(self._utc(end), CHAIN_SNAPSHOT_SCHEMA.field('snapshot_time').type))
+        if contract is not None:
+            conditions.append(ds.field('contractSymbol') == contract)
+        if expiration is not None:
+            conditions.append(ds.field('expiration') == expiration)
+        if option_type is not None:
+            conditions.append(ds.field('optionType') == option_type)
+        if strike_range is not None:
+            conditions.append((ds.field('strike') >= strike_range[0]) & (ds.field('strike') <= strike_range[1]))
+
+        condition = None
+        for item in conditions:
+            condition = item if condition is None else condition & item
+
+        if columns is not None and 'snapshot_time' not in columns:
+            columns = ['snapshot_time'] + list(columns)
+
+        for attempt in range(self.QUERY_RETRIES):
+            files = self._files(ticker, start, end)
+            if not files:
+                return pd.DataFrame(columns=columns or CHAIN_SNAPSHOT_SCHEMA.names)
+            try:
+                table = ds.dataset(files, format='parquet', schema=CHAIN_SNAPSHOT_SCHEMA).to_table(
+                    columns=columns, filter=condition
+                )
+                break
+            except FileNotFoundError:
+                # Una compactación borró partes entre el listado y la lectura: volver a listar
+                if attempt == self.QUERY_RETRIES - 1:
+                    raise
+        return table.to_pandas().sort_values('snapshot_time', kind='stable').reset_index(drop=True)
+
+    def atm_iv_history(self, ticker: str, start: datetime = None, end: datetime = None,
+                       min_days: int = 7) -> pd.Series:
+        """
+        IV at-the-money por snapshot: promedio de call y put del strike más cercano al
+        subyacente en el primer vencimiento con al menos min_days días
+        """
+        data = self.query(ticker, start, end, columns=['expiration', 'optionType', 'strike',
+                                                       'underlyingPrice', 'impliedVolatility'])
+        if data.empty:
+            return pd.Series(dtype='float32', name='atm_iv')
+
+        expiration = pd.to_datetime(data['expiration'].astype(str)).dt.tz_localize('UTC')
+        days = (expiration - data['snapshot_time']).dt.total_seconds() / 86400
+        data = data[(days >= min_days) & (data['impliedVolatility'] > 0)].copy()
+        if data.empty:
+            return pd.Series(dtype='float32', name='atm_iv')
+
+        data['expiration'] = data['expiration'].astype(str)
+        data['distance'] = (data['strike'] - data['underlyingPrice']).abs()
+        nearest_expiration = data.groupby('snapshot_time')['expiration'].transform('min')
+        data = data[data['expiration'] == nearest_expiration]
+        nearest_strike = data.groupby('snapshot_time')['distance'].transform('min')
+        atm = data[data['distance'] == nearest_strike]
+        return atm.groupby('snapshot_time')['impliedVolatility'].mean().rename('atm_iv')
+
+    @staticmethod
+    def iv_rank(iv_history: pd.Series, current_iv: float = None) -> Dict[str, float]:
+        """IV rank (posición en el rango mín-máx) e IV percentile (fracción de valores menores)"""
+        values = iv_history.dropna().to_numpy(dtype=float)
+        if len(values) == 0:
+            return {'iv_rank': np.nan, 'iv_percentile': np.nan}
+        current_iv = values[-1] if current_iv is None else current_iv
+        low, high = values.min(), values.max()
+        return {
+            'iv_rank': (current_iv - low) / (high - low) * 100 if high > low else 50.0,
+            'iv_percentile': (values < current_iv).mean() * 100
+        }
@@ -1,21 +1,228 @@
 import numpy as np
 import pandas as pd
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Optional
 from options_calculator import OptionsCalculator
 from datetime import datetime, timedelta
 
+class StrategySweep:
+    """
+    Métricas precalculadas de estrategias sobre una grilla de días x volatilidad
+    
+    Las métricas siguen las convenciones de cada método de OptionsStrategies: 'cost'
+    es el valor que la estrategia informa en su propia clave (cost_keys, ej.
+    'net_credit' en el iron condor o 'premium_paid' en el straddle), y max_profit y
+    max_loss tienen el mismo signo que en el diccionario de la estrategia.
+    """
+    
+    METRICS = ('cost', 'max_profit', 'max_loss', 'probability_profit', 'expected_payoff')
+    
+    def __init__(self, names: List[str], labels: List[str], days: np.ndarray, sigmas: np.ndarray,
+                 values: np.ndarray, cost_keys: List[str] = None):
+        self.names = list(names)
+        self.labels = list(labels)
+        self.cost_keys = list(cost_keys) if cost_keys is not None else ['net_cost'] * len(self.names)
+        self.days = np.asarray(days, dtype=float)
+        self.sigmas = np.asarray(sigmas, dtype=float)
+        # Tensor (estrategias, métricas, días, volatilidades)
+        self.values = values
+    
+    def _nearest(self, grid: np.ndarray, value: float) -> int:
+        """Índice del punto de la grilla más cercano (búsqueda binaria)"""
+        i = int(np.searchsorted(grid, value).clip(1, len(grid) - 1)) if len(grid) > 1 else 0
+        return i - 1 if len(grid) > 1 and abs(grid[i - 1] - value) <= abs(grid[i] - value) else i
+    
+    def slice(self, days: float, sigma: float) -> pd.DataFrame:
+        """Métricas de todas las estrategias para (días, volatilidad) sin recalcular"""
+        i, j = self._nearest(self.days, days), self._nearest(self.sigmas, sigma)
+        table = pd.DataFrame(self.values[:, :, i, j], index=pd.Index(self.names, name='name'),
+                             columns=list(self.METRICS))
+        table.insert(0, 'strategy', self.labels)
+        table.insert(1, 'cost_key', self.cost_keys)
+        return table
+    
+    def metrics(self, days: float, sigma: float) -> Dict[str, Dict]:
+        """
+        Métricas para (días, volatilidad) con las mismas claves que los diccionarios
+        de analyze_all_strategies (sin payoffs ni patas), para mezclarlas en una tabla
+        """
+        table = self.slice(days, sigma)
+        return {
+            name: {
+                'strategy': row['strategy'],
+                row['cost_key']: row['cost'],
+                'max_profit': row['max_profit'],
+                'max_loss': row['max_loss'],
+                'probability_profit': row['probability_profit'],
+                'expected_payoff': row['expected_payoff']
+            }
+            for name, row in table.iterrows()
+        }
+    
+    def metric_curve(self, name: str, metric: str, sigma: float) -> pd.Series:
+        """Evolución de una métrica a lo largo de los días para una volatilidad"""
+        j = self._nearest(self.sigmas, sigma)
+        values = self.values[self.names.index(name), self.METRICS.index(metric), :, j]
+        return pd.Series(values, index=pd.Index(self.days, name='days'), name=metric)
+
 class OptionsStrategies:
     """Implementación de estrategias de opciones financieras"""
     
-    def __init__(self):
+    def __init__(self, sweep_cache_size: int = 8):
         self.calculator = OptionsCalculator()
+        self._sweep_cache = OrderedDict()
+        self._sweep_cache_size = sweep_cache_size
+        self._sweep_lock = threading.Lock()
+    
+    @staticmethod
+    def payoff_statistics(S, T, r, sigma, strikes, quantities, is_call, premiums,
+                          stock_quantity=0.0, stock_price=None) -> Dict[str, np.ndarray]:
+        """
+        Probabilidad de ganancia y payoff esperado exactos bajo distribución lognormal
+        
+        El payoff a expiración es lineal por tramos con quiebres en los strikes, por lo
+        que la probabilidad de ganancia se obtiene sumando términos N(d2) entre breakevens
+        y el payoff esperado sumando términos N(d1)/N(d2) por tramo.
+        
+        Args:
+            S, T, r, sigma: Escalares o arrays (n_estrategias,) con los parámetros de mercado
+            strikes, quantities, is_call, premiums: Arrays (n_patas,) o (n_estrategias, n_patas).
+                Las patas sin uso se rellenan con quantity = 0.
+            stock_quantity: Acciones por estrategia (escalar o (n_estrategias,))
+            stock_price: Precio de entrada de las acciones (por defecto S)
+        
+        Returns:
+            Diccionario con 'probability_profit', 'expected_payoff', 'max_payoff' y
+            'min_payoff' (arrays de n_estrategias, o escalares si la entrada es 1D)
+        """
+        strikes = np.asarray(strikes, dtype=float)
+        single = strikes.ndim == 1
+        strikes = np.atleast_2d(strikes)
+        n = strikes.shape[0]
+        quantities = np.broadcast_to(np.atleast_2d(np.asarray(quantities, dtype=float)), strikes.shape)
+        is_call = np.broadcast_to(np.atleast_2d(np.asarray(is_call, dtype=bool)), strikes.shape)
+        premiums = np.broadcast_to(np.atleast_2d(np.asarray(premiums, dtype=float)), strikes.shape)
+        
+        S = np.broadcast_to(np.asarray(S, dtype=float), (n,))
+        T = np.broadcast_to(np.asarray(T, dtype=float), (n,))
+        r = np.broadcast_to(np.asarray(r, dtype=float), (n,))
+        sigma = np.broadcast_to(np.asarray(sigma, dtype=float), (n,))
+        stock_quantity = np.broadcast_to(np.asarray(stock_quantity, dtype=float), (n,))
+        stock_price = S if stock_price is None else np.broadcast_to(np.asarray(stock_price, dtype=float), (n,))
+        
+        # Nodos del payoff: 0 y los strikes ordenados -> tramos [x_j, x_{j+1}] y cola [x_m, inf)
+        nodes = np.concatenate([np.zeros((n, 1)), np.sort(strikes, axis=1)], axis=1)
+        x = nodes[:, :, None]
+        leg_values = np.where(is_call[:, None, :],
+                              np.maximum(x - strikes[:, None, :], 0),
+                              np.maximum(strikes[:, None, :] - x, 0))
+        values = ((leg_values - premiums[:, None, :]) * quantities[:, None, :]).sum(axis=2)
+        values += stock_quantity[:, None] * (nodes - stock_price[:, None])
+        
+        tail_slope = stock_quantity + np.where(is_call, quantities, 0).sum(axis=1)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Tramos finitos: pendiente, ordenada y sub-intervalo con payoff positivo
+            x_lo, x_hi = nodes[:, :-1], nodes[:, 1:]
+            v_lo, v_hi = values[:, :-1], values[:, 1:]
+            width = x_hi - x_lo
+            slope = np.where(width > 0, (v_hi - v_lo) / width, 0.0)
+            intercept = v_lo - slope * x_lo
+            root = np.where(v_hi != v_lo, x_lo - v_lo * width / (v_hi - v_lo), x_lo)
+            pos_lo = np.where(v_lo > 0, x_lo, np.where(v_hi > 0, root, x_hi))
+            pos_hi = np.where(v_hi > 0, x_hi, np.where(v_lo > 0, root, x_hi))
+            
+            # Cola derecha
+            x_m, v_m = nodes[:, -1], values[:, -1]
+            tail_root = x_m - v_m / np.where(tail_slope != 0, tail_slope, np.nan)
+            tail_lo = np.where(v_m > 0, x_m, np.where(tail_slope > 0, tail_root, np.inf))
+            tail_hi = np.where(tail_slope >= 0, np.inf, np.where(v_m > 0, tail_root, np.inf))
+            
+            seg_lo = np.concatenate([x_lo, x_m[:, None]], axis=1)
+            seg_hi = np.concatenate([x_hi, np.full((n, 1), np.inf)], axis=1)
+            seg_slope = np.concatenate([slope, tail_slope[:, None]], axis=1)
+            seg_intercept = np.concatenate([intercept, (v_m - tail_slope * x_m)[:, None]], axis=1)
+            pos_lo = np.concatenate([pos_lo, tail_lo[:, None]], axis=1)
+            pos_hi = np.concatenate([pos_hi, tail_hi[:, None]], axis=1)
+            
+            vol = (sigma * np.sqrt(np.maximum(T, 0)))[:, None]
+            drift = ((r - 0.5 * sigma**2) * T)[:, None]
+            log_s = np.log(S)[:, None]
+            
+            def d2(level):
+                return (log_s - np.log(level) + drift) / vol
+            
+            # P(lo < S_T < hi) = N(d2(lo)) - N(d2(hi)); E[S_T; lo < S_T < hi] = S e^{rT} (N(d1(lo)) - N(d1(hi)))
+            prob_profit = (ndtr(d2(pos_lo)) - ndtr(d2(pos_hi))).clip(min=0).sum(axis=1)
+            seg_prob = ndtr(d2(seg_lo)) - ndtr(d2(seg_hi))
+            seg_mean = (S * np.exp(r * T))[:, None] * (ndtr(d2(seg_lo) + vol) - ndtr(d2(seg_hi) + vol))
+            expected = np.nansum(seg_intercept * seg_prob + seg_slope * seg_mean, axis=1)
+        
+        # Vencidas o sin volatilidad: el payoff es determinístico en S * e^{rT}
+        degenerate = (T <= 0) | (sigma <= 0)
+        if degenerate.any():
+            terminal = (S * np.exp(r * np.maximum(T, 0)))[:, None, None]
+            legs = np.where(is_call[:, None, :], np.maximum(terminal - strikes[:, None, :], 0),
+                            np.maximum(strikes[:, None, :] - terminal, 0))
+            final = ((legs - premiums[:, None, :]) * quantities[:, None, :]).sum(axis=(1, 2))
+            final += stock_quantity * (terminal[:, 0, 0] - stock_price)
+            prob_profit = np.where(degenerate, (final > 0).astype(float), prob_profit)
+            expected = np.where(degenerate, final, expected)
+        
+        max_payoff = np.where(tail_slope > 0, np.inf, values.max(axis=1))
+        min_payoff = np.where(tail_slope < 0, -np.inf, values.min(axis=1))
+        
+        stats = {
+            'probability_profit': np.clip(prob_profit, 0, 1),
+            'expected_payoff': expected,
+            'max_payoff': max_payoff,
+            'min_payoff': min_payoff
+        }
+        if single:
+            return {key: float(value[0]) for key, value in stats.items()}
+        return stats
+    
+    def _legs_statistics(self, S: float, T: float, r: float, sigma: float, legs: List[Tuple],
+                         stock_quantity: float = 0.0) -> Dict[str, float]:
+        """
+        Estadísticas de payoff para una estrategia dada como lista de (tipo, cantidad, strike, prima)
+        """
+        return self.payoff_statistics(
+            S, T, r, sigma,
+            strikes=[leg[2] for leg in legs],
+            quantities=[leg[1] for leg in legs],
+            is_call=[leg[0] == 'call' for leg in legs],
+            premiums=[leg[3] for leg in legs],
+            stock_quantity=stock_quantity
+        )
+    
+    def price_leg_table(self, S: float, strikes: List[float], T: float, r: float, sigma: float) -> pd.DataFrame:
+        """
+        Precia una sola vez la grilla strike x {call, put} con Black-Scholes vectorizado
+        
+        Returns:
+            DataFrame indexado por strike con columnas 'call' y 'put'
+        """
+        strikes = np.unique(np.asarray(strikes, dtype=float))
+        prices = self.calculator.black_scholes_price(S, strikes[:, None], T, r, sigma, np.array([True, False]))
+        return pd.DataFrame(prices, index=pd.Index(strikes, name='strike'), columns=['call', 'put'])
+    
+    def _leg_price(self, leg_prices: Optional[pd.DataFrame], option_type: str, S: float, K: float,
+                   T: float, r: float, sigma: float) -> float:
+        """Precio de una pata desde la tabla compartida, o con Black-Scholes si no está"""
+        if leg_prices is not None and K in leg_prices.index and pd.notna(leg_prices.at[K, option_type]):
+            return float(leg_prices.at[K, option_type])
+        if option_type == 'call':
+            return self.calculator.black_scholes_call(S, K, T, r, sigma)
+        return self.calculator.black_scholes_put(S, K, T, r, sigma)
     
     def covered_call(self, S: float, K: float, T: float, r: float, sigma: float, 
-                    shares_owned: int = 100) -> Dict:
+                    shares_owned: int = 100, leg_prices: pd.DataFrame = None, stats: Dict = None) -> Dict:
         """
         Estrategia Covered Call: Poseer acciones + vender call
         """
-        call_price = self.calculator.black_scholes_call(S, K, T, r, sigma)
+        call_price = self._leg_price(leg_prices, 'call', S, K, T, r, sigma)
         
         # Posición larga en acciones + posición corta en call
         stock_value = shares_owned * S
@@ -34,6 +241,7 @@ class OptionsStrategies:
         max_profit = call_premium + shares_owned * max(K - S, 0)
         max_loss = -stock_value + call_premium  # Pérdida teórica ilimitada
         breakeven = S - call_price
+        stats = stats or self._legs_statistics(S, T, r, sigma, [('call', -1, K, call_price)], stock_quantity=1)
         
         return {
             'strategy': 'Covered Call',
@@ -44,19 +252,20 @@ class OptionsStrategies:
             'breakeven': breakeven,
             'prices': prices.tolist(),
             'payoffs': payoffs,
-            'probability_profit': self.calculator.probability_analysis(S, breakeven, T, r, sigma)['prob_itm_put'],
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': shares_owned * stats['expected_payoff'],
             'components': [
                 {'type': 'stock', 'quantity': shares_owned, 'price': S},
-                {'type': 'call', 'quantity': -shares_owned//100, 'strike': K, 'price': call_price}
+                {'type': 'call', 'quantity': -shares_owned//100, 'strike': K, 'price': call_price, 'multiplier': 100}
             ]
         }
     
     def protective_put(self, S: float, K: float, T: float, r: float, sigma: float,
-                      shares_owned: int = 100) -> Dict:
+                      shares_owned: int = 100, leg_prices: pd.DataFrame = None, stats: Dict = None) -> Dict:
         """
         Estrategia Protective Put: Poseer acciones + comprar put
         """
-        put_price = self.calculator.black_scholes_put(S, K, T, r, sigma)
+        put_price = self._leg_price(leg_prices, 'put', S, K, T, r, sigma)
         
         stock_value = shares_owned * S
         put_cost = shares_owned * put_price
@@ -72,8 +281,9 @@ class OptionsStrategies:
             payoffs.append(total_pnl)
         
         max_profit = float('inf')  # Ilimitado
-        max_loss = put_cost + shares_owned * (S - K) if S > K else put_cost
+        max_loss = put_cost + shares_owned * (S - K)
         breakeven = S + put_price
+        stats = stats or self._legs_statistics(S, T, r, sigma, [('put', 1, K, put_price)], stock_quantity=1)
         
         return {
             'strategy': 'Protective Put',
@@ -84,19 +294,21 @@ class OptionsStrategies:
             'breakeven': breakeven,
             'prices': prices.tolist(),
             'payoffs': payoffs,
-            'probability_profit': self.calculator.probability_analysis(S, breakeven, T, r, sigma)['prob_itm_call'],
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': shares_owned * stats['expected_payoff'],
             'components': [
                 {'type': 'stock', 'quantity': shares_owned, 'price': S},
-                {'type': 'put', 'quantity': shares_owned//100, 'strike': K, 'price': put_price}
+                {'type': 'put', 'quantity': shares_owned//100, 'strike': K, 'price': put_price, 'multiplier': 100}
             ]
         }
     
-    def long_straddle(self, S: float, K: float, T: float, r: float, sigma: float) -> Dict:
+    def long_straddle(self, S: float, K: float, T: float, r: float, sigma: float,
+                      leg_prices: pd.DataFrame = None) -> Dict:
         """
         Estrategia Long Straddle: Comprar call y put con mismo strike
         """
-        call_price = self.calculator.black_scholes_call(S, K, T, r, sigma)
-        put_price = self.calculator.black_scholes_put(S, K, T, r, sigma)
+        call_price = self._leg_price(leg_prices, 'call', S, K, T, r, sigma)
+        put_price = self._leg_price(leg_prices, 'put', S, K, T, r, sigma)
         
         total_premium = call_price + put_price
         
@@ -114,6 +326,7 @@ class OptionsStrategies:
         max_loss = -total_premium
         breakeven_up = K + total_premium
         breakeven_down = K - total_premium
+        stats = self._legs_statistics(S, T, r, sigma, [('call', 1, K, call_price), ('put', 1, K, put_price)])
         
         return {
             'strategy': 'Long Straddle',
@@ -125,7 +338,8 @@ class OptionsStrategies:
             'breakeven_down': breakeven_down,
             'prices': prices.tolist(),
             'payoffs': payoffs,
-            'probability_profit': 1 - self.calculator.probability_analysis(S, K, T, r, sigma)['prob_touch'],
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': stats['expected_payoff'],
             'components': [
                 {'type': 'call', 'quantity': 1, 'strike': K, 'price': call_price},
                 {'type': 'put', 'quantity': 1, 'strike': K, 'price': put_price}
@@ -133,16 +347,16 @@ class OptionsStrategies:
         }
     
     def iron_condor(self, S: float, K1: float, K2: float, K3: float, K4: float, 
-                   T: float, r: float, sigma: float) -> Dict:
+                   T: float, r: float, sigma: float, leg_prices: pd.DataFrame = None) -> Dict:
         """
         Estrategia Iron Condor: K1 < K2 < K3 < K4
         Vender call spread (K3-K4) + vender put spread (K1-K2)
         """
         # Calcular precios de las opciones
-        put_K1 = self.calculator.black_scholes_put(S, K1, T, r, sigma)
-        put_K2 = self.calculator.black_scholes_put(S, K2, T, r, sigma)
-        call_K3 = self.calculator.black_scholes_call(S, K3, T, r, sigma)
-        call_K4 = self.calculator.black_scholes_call(S, K4, T, r, sigma)
+        put_K1 = self._leg_price(leg_prices, 'put', S, K1, T, r, sigma)
+        put_K2 = self._leg_price(leg_prices, 'put', S, K2, T, r, sigma)
+        call_K3 = self._leg_price(leg_prices, 'call', S, K3, T, r, sigma)
+        call_K4 = self._leg_price(leg_prices, 'call', S, K4, T, r, sigma)
         
         # Crédito neto recibido
         net_credit = (put_K2 - put_K1) + (call_K3 - call_K4)
@@ -161,9 +375,13 @@ class OptionsStrategies:
             payoffs.append(total_pnl)
         
         max_profit = net_credit
-        max_loss = min(K2 - K1, K4 - K3) - net_credit
+        max_loss = max(K2 - K1, K4 - K3) - net_credit
         breakeven_down = K2 - net_credit
         breakeven_up = K3 + net_credit
+        stats = self._legs_statistics(S, T, r, sigma, [
+            ('put', 1, K1, put_K1), ('put', -1, K2, put_K2),
+            ('call', -1, K3, call_K3), ('call', 1, K4, call_K4)
+        ])
         
         return {
             'strategy': 'Iron Condor',
@@ -175,8 +393,8 @@ class OptionsStrategies:
             'breakeven_up': breakeven_up,
             'prices': prices.tolist(),
             'payoffs': payoffs,
-            'probability_profit': (norm.cdf((np.log(breakeven_up/S))/(sigma*np.sqrt(T))) - 
-                                 norm.cdf((np.log(breakeven_down/S))/(sigma*np.sqrt(T)))),
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': stats['expected_payoff'],
             'components': [
                 {'type': 'put', 'quantity': 1, 'strike': K1, 'price': put_K1},
                 {'type': 'put', 'quantity': -1, 'strike': K2, 'price': put_K2},
@@ -186,18 +404,19 @@ class OptionsStrategies:
         }
     
     def butterfly_spread(self, S: float, K1: float, K2: float, K3: float, 
-                        T: float, r: float, sigma: float, option_type: str = 'call') -> Dict:
+                        T: float, r: float, sigma: float, option_type: str = 'call',
+                        leg_prices: pd.DataFrame = None) -> Dict:
         """
         Estrategia Butterfly Spread: K1 < K2 < K3, donde K2 = (K1 + K3) / 2
         """
         if option_type.lower() == 'call':
-            price_K1 = self.calculator.black_scholes_call(S, K1, T, r, sigma)
-            price_K2 = self.calculator.black_scholes_call(S, K2, T, r, sigma)
-            price_K3 = self.calculator.black_scholes_call(S, K3, T, r, sigma)
+            price_K1 = self._leg_price(leg_prices, 'call', S, K1, T, r, sigma)
+            price_K2 = self._leg_price(leg_prices, 'call', S, K2, T, r, sigma)
+            price_K3 = self._leg_price(leg_prices, 'call', S, K3, T, r, sigma)
         else:
-            price_K1 = self.calculator.black_scholes_put(S, K1, T, r, sigma)
-            price_K2 = self.calculator.black_scholes_put(S, K2, T, r, sigma)
-            price_K3 = self.calculator.black_scholes_put(S, K3, T, r, sigma)
+            price_K1 = self._leg_price(leg_prices, 'put', S, K1, T, r, sigma)
+            price_K2 = self._leg_price(leg_prices, 'put', S, K2, T, r, sigma)
+            price_K3 = self._leg_price(leg_prices, 'put', S, K3, T, r, sigma)
         
         # Costo neto (comprar 1 K1, vender 2 K2, comprar 1 K3)
         net_cost = price_K1 - 2 * price_K2 + price_K3
@@ -219,6 +438,10 @@ class OptionsStrategies:
         max_loss = -net_cost
         breakeven_down = K1 + net_cost
         breakeven_up = K3 - net_cost
+        leg_type = option_type.lower()
+        stats = self._legs_statistics(S, T, r, sigma, [
+            (leg_type, 1, K1, price_K1), (leg_type, -2, K2, price_K2), (leg_type, 1, K3, price_K3)
+        ])
         
         return {
             'strategy': f'{option_type.title()} Butterfly Spread',
@@ -230,7 +453,8 @@ class OptionsStrategies:
             'breakeven_up': breakeven_up,
             'prices': prices.tolist(),
             'payoffs': payoffs,
-            'probability_profit': 0.5,  # Simplificación
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': stats['expected_payoff'],
             'components': [
                 {'type': option_type, 'quantity': 1, 'strike': K1, 'price': price_K1},
                 {'type': option_type, 'quantity': -2, 'strike': K2, 'price': price_K2},
@@ -239,12 +463,12 @@ class OptionsStrategies:
         }
     
     def collar(self, S: float, put_strike: float, call_strike: float, T: float, r: float, sigma: float,
-              shares_owned: int = 100) -> Dict:
+              shares_owned: int = 100, leg_prices: pd.DataFrame = None) -> Dict:
         """
         Estrategia Collar: Poseer acciones + comprar put + vender call
         """
-        put_price = self.calculator.black_scholes_put(S, put_strike, T, r, sigma)
-        call_price = self.calculator.black_scholes_call(S, call_strike, T, r, sigma)
+        put_price = self._leg_price(leg_prices, 'put', S, put_strike, T, r, sigma)
+        call_price = self._leg_price(leg_prices, 'call', S, call_strike, T, r, sigma)
         
         net_cost = put_price - call_price
         
@@ -261,6 +485,9 @@ class OptionsStrategies:
         
         max_profit = shares_owned * (call_strike - S) + shares_owned * (call_price - put_price)
         max_loss = shares_owned * (put_strike - S) + shares_owned * (call_price - put_price)
+        stats = self._legs_statistics(S, T, r, sigma, [
+            ('put', 1, put_strike, put_price), ('call', -1, call_strike, call_price)
+        ], stock_quantity=1)
         
         return {
             'strategy': 'Collar',
@@ -270,61 +497,485 @@ class OptionsStrategies:
             'max_loss': max_loss,
             'prices': prices.tolist(),
             'payoffs': payoffs,
-            'probability_profit': 0.5,  # Simplificación
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': shares_owned * stats['expected_payoff'],
             'components': [
                 {'type': 'stock', 'quantity': shares_owned, 'price': S},
-                {'type': 'put', 'quantity': shares_owned//100, 'strike': put_strike, 'price': put_price},
-                {'type': 'call', 'quantity': -shares_owned//100, 'strike': call_strike, 'price': call_price}
+                {'type': 'put', 'quantity': shares_owned//100, 'strike': put_strike, 'price': put_price, 'multiplier': 100},
+                {'type': 'call', 'quantity': -shares_owned//100, 'strike': call_strike, 'price': call_price, 'multiplier': 100}
             ]
         }
     
+    def diagonal_spread(self, S: float, K_near: float, K_far: float, T_near: float, T_far: float,
+                        r: float, sigma_near: float, sigma_far: float = None,
+                        option_type: str = 'call', leg_prices: pd.DataFrame = None,
+                        far_leg_prices: pd.DataFrame = None) -> Dict:
+        """
+        Estrategia Diagonal Spread: vender opción con vencimiento cercano (K_near) y
+        comprar opción con vencimiento lejano (K_far)
+        
+        Cada pata toma su precio de mercado de la tabla de su vencimiento (leg_prices
+        para la cercana, far_leg_prices para la lejana) o, si no cotiza, de
+        Black-Scholes. El P&L se mide a la expiración cercana, revaluando la pata
+        lejana con la volatilidad de su propio vencimiento.
+        """
+        sigma_far = sigma_near if sigma_far is None else sigma_far
+        leg_type = option_type.lower()
+        is_call = leg_type == 'call'
+        near_price = self._leg_price(leg_prices, leg_type, S, K_near, T_near, r, sigma_near)
+        far_price = float(self._leg_price(far_leg_prices, leg_type, S, K_far, T_far, r, sigma_far))
+        net_cost = far_price - near_price
+        remaining = T_far - T_near
+        
+        def near_expiry_pnl(prices):
+            far_value = self.calculator.black_scholes_price(prices, K_far, remaining, r, sigma_far, is_call)
+            near_value = np.maximum(prices - K_near, 0) if is_call else np.maximum(K_near - prices, 0)
+            return far_value - near_value - net_cost
+        
+        # Cálculo de P&L a la expiración cercana
+        prices = np.linspace(S * 0.7, S * 1.3, 100)
+        payoffs = near_expiry_pnl(prices)
+        
+        # Extremos: con S -> 0 y S -> inf solo queda el valor intrínseco descontado
+        intrinsic_tail = K_near - K_far * np.exp(-r * remaining)
+        tails = [-net_cost + (0 if is_call else -intrinsic_tail), -net_cost + (intrinsic_tail if is_call else 0)]
+        
+        if T_near <= 0 or sigma_near <= 0:
+            # Vencida o sin volatilidad: el P&L es determinístico en S * e^{rT}
+            mids = np.array([S * np.exp(r * max(T_near, 0))])
+            mass = np.ones(1)
+        else:
+            # Probabilidad y payoff esperado integrando la lognormal sobre una grilla fina en log-precio
+            width = 6 * sigma_near * np.sqrt(T_near)
+            drift = (r - 0.5 * sigma_near**2) * T_near
+            edges = S * np.exp(drift + np.linspace(-width, width, 4001))
+            mids = np.sqrt(edges[:-1] * edges[1:])
+            mass = np.diff(norm.cdf((np.log(edges / S) - drift) / (sigma_near * np.sqrt(T_near))))
+        grid_pnl = near_expiry_pnl(mids)
+        
+        is_calendar = np.isclose(K_near, K_far)
+        name = 'Calendar Spread' if is_calendar else 'Diagonal Spread'
+        description = (f'Vender {leg_type} {K_near} ({T_near * 365.25:.0f}d), '
+                       f'comprar {leg_type} {K_far} ({T_far * 365.25:.0f}d)')
+        
+        return {
+            'strategy': f'{leg_type.title()} {name}',
+            'description': description,
+            'net_cost': net_cost,
+            'max_profit': float(max(payoffs.max(), grid_pnl.max(), *tails)),
+            'max_loss': float(min(payoffs.min(), grid_pnl.min(), *tails)),
+            'prices': prices.tolist(),
+            'payoffs': payoffs.tolist(),
+            'probability_profit': float(mass[grid_pnl > 0].sum() / mass.sum()),
+            'expected_payoff': float((mass * grid_pnl).sum() / mass.sum()),
+            'components': [
+                {'type': leg_type, 'quantity': -1, 'strike': K_near, 'price': near_price,
+                 'T': T_near, 'sigma': sigma_near},
+                {'type': leg_type, 'quantity': 1, 'strike': K_far, 'price': far_price,
+                 'T': T_far, 'sigma': sigma_far}
+            ]
+        }
+    
+    def calendar_spread(self, S: float, K: float, T_near: float, T_far: float, r: float,
+                        sigma_near: float, sigma_far: float = None, option_type: str = 'call',
+                        leg_prices: pd.DataFrame = None, far_leg_prices: pd.DataFrame = None) -> Dict:
+        """
+        Estrategia Calendar Spread: vender vencimiento cercano y comprar lejano con el mismo strike
+        """
+        return self.diagonal_spread(S, K, K, T_near, T_far, r, sigma_near, sigma_far, option_type,
+                                    leg_prices, far_leg_prices)
+    
+    def pnl_surface(self, strategy_data: Dict, T: float, r: float, sigma: float,
+                    days_elapsed: List[float] = None, prices: np.ndarray = None) -> Dict:
+        """
+        P&L de la estrategia antes de expiración (T+n) sobre una grilla precio x fecha
+        
+        Revalúa todas las patas con Black-Scholes en una sola llamada vectorizada.
+        Las patas pueden traer su propio 'T', 'sigma' y 'multiplier'; si no, se usan
+        T, sigma y 1.
+        
+        Args:
+            strategy_data: Estrategia con 'components' (y 'prices' como grilla por defecto)
+            T: Tiempo hasta expiración en años al momento de abrir la posición
+            r: Tasa libre de riesgo
+            sigma: Volatilidad para revaluar las patas
+            days_elapsed: Días transcurridos a evaluar (por defecto hoy, T+7, T+14, T+30 y la
+                primera expiración)
+            prices: Grilla de precios del subyacente
+        
+        Returns:
+            Diccionario con 'days', 'prices' y 'pnl' (matriz n_días x n_precios)
+        """
+        components = strategy_data.get('components', [])
+        prices = np.asarray(prices if prices is not None else strategy_data.get('prices', []), dtype=float)
+        
+        # Horizonte: la primera expiración de la estrategia (la cercana en calendars/diagonals)
+        expiry_days = max(min([c.get('T', T) for c in components if c['type'] != 'stock'], default=T) * 365.25, 0)
+        if days_elapsed is None:
+            days_elapsed = [d for d in (0, 7, 14, 30) if d < expiry_days] + [expiry_days]
+        days = np.asarray(days_elapsed, dtype=float)
+        
+        options = [c for c in components if c['type'] in ('call', 'put')]
+        stock_pnl = sum(c['quantity'] * (prices - c['price']) for c in components if c['type'] == 'stock')
+        
+        pnl = np.zeros((len(days), len(prices))) + stock_pnl
+        if options:
+            strikes = np.array([c['strike'] for c in options], dtype=float)
+            quantities = np.array([c['quantity'] * c.get('multiplier', 1) for c in options], dtype=float)
+            is_call = np.array([c['type'] == 'call' for c in options])
+            premiums = np.array([c['price'] for c in options], dtype=float)
+            leg_T = np.array([c.get('T', T) for c in options], dtype=float)
+            leg_sigma = np.array([c.get('sigma', sigma) for c in options], dtype=float)
+            
+            # Broadcast (días, precios, patas)
+            remaining = np.maximum(leg_T[None, None, :] - days[:, None, None] / 365.25, 0)
+            values = self.calculator.black_scholes_price(prices[None, :, None], strikes, remaining, r,
+                                                         leg_sigma, is_call)
+            pnl += ((values - premiums) * quantities).sum(axis=2)
+        
+        return {
+            'days': days,
+            'prices': prices,
+            'pnl': pnl
+        }
+    
     def analyze_all_strategies(self, S: float, T: float, r: float, sigma: float, 
-                             strikes: List[float] = None) -> Dict:
+                             strikes: List[float] = None, T_far: float = None,
+                             sigma_far: float = None, leg_prices: pd.DataFrame = None,
+                             names: List[str] = None, far_leg_prices: pd.DataFrame = None) -> Dict:
         """
         Analiza múltiples estrategias y devuelve un resumen
+        
+        Con T_far (y opcionalmente sigma_far y far_leg_prices, los precios de mercado
+        del vencimiento lejano) agrega calendar y diagonal spreads entre el
+        vencimiento T y el lejano T_far.
+        
+        leg_prices permite usar precios de mercado por strike (ej.
+        StrikeIndex.leg_prices); las patas sin precio se valúan con Black-Scholes.
+        
+        names limita el análisis a esas estrategias (mismos nombres que las claves
+        del resultado, ej. 'covered_call_100.0' o 'iron_condor').
         """
         if strikes is None:
             strikes = [S * 0.95, S, S * 1.05]
         
+        def wanted(name):
+            return names is None or name in names
+        
+        # Precios compartidos: cada (strike, tipo) se calcula una sola vez
+        model_prices = self.price_leg_table(S, strikes, T, r, sigma)
+        if leg_prices is None:
+            leg_prices = model_prices
+        else:
+            leg_prices = leg_prices.reindex(model_prices.index).combine_first(model_prices)
+        
         strategies = {}
         
+        # Estadísticas de las estrategias por strike en una sola evaluación vectorizada
+        strike_column = np.asarray(strikes, dtype=float)[:, None]
+        call_stats = self.payoff_statistics(S, T, r, sigma, strike_column, -1, True,
+                                            leg_prices.loc[strikes, 'call'].to_numpy()[:, None], stock_quantity=1)
+        put_stats = self.payoff_statistics(S, T, r, sigma, strike_column, 1, False,
+                                           leg_prices.loc[strikes, 'put'].to_numpy()[:, None], stock_quantity=1)
+        
         # Single leg strategies
-        for strike in strikes:
-            strategies[f'covered_call_{strike}'] = self.covered_call(S, strike, T, r, sigma)
-            strategies[f'protective_put_{strike}'] = self.protective_put(S, strike, T, r, sigma)
+        for i, strike in enumerate(strikes):
+            if wanted(f'covered_call_{strike}'):
+                strategies[f'covered_call_{strike}'] = self.covered_call(
+                    S, strike, T, r, sigma, leg_prices=leg_prices,
+                    stats={key: float(values[i]) for key, values in call_stats.items()}
+                )
+            if wanted(f'protective_put_{strike}'):
+                strategies[f'protective_put_{strike}'] = self.protective_put(
+                    S, strike, T, r, sigma, leg_prices=leg_prices,
+                    stats={key: float(values[i]) for key, values in put_stats.items()}
+                )
         
         # Multi-leg strategies
         if len(strikes) >= 3:
-            strategies['long_straddle'] = self.long_straddle(S, strikes[1], T, r, sigma)
-            strategies['butterfly_call'] = self.butterfly_spread(S, strikes[0], strikes[1], strikes[2], T, r, sigma, 'call')
-            strategies['collar'] = self.collar(S, strikes[0], strikes[2], T, r, sigma)
+            if wanted('long_straddle'):
+                strategies['long_straddle'] = self.long_straddle(S, strikes[1], T, r, sigma, leg_prices=leg_prices)
+            if wanted('butterfly_call'):
+                strategies['butterfly_call'] = self.butterfly_spread(S, strikes[0], strikes[1], strikes[2], T, r, sigma,
+                                                                     'call', leg_prices=leg_prices)
+            if wanted('collar'):
+                strategies['collar'] = self.collar(S, strikes[0], strikes[2], T, r, sigma, leg_prices=leg_prices)
+        
+        if len(strikes) >= 4 and wanted('iron_condor'):
+            strategies['iron_condor'] = self.iron_condor(S, strikes[0], strikes[1], strikes[2], strikes[3], T, r, sigma,
+                                                         leg_prices=leg_prices)
+        
+        # Multi-expiration strategies
+        if T_far is not None and T_far > T and len(strikes) >= 3:
+            if wanted('calendar_call'):
+                strategies['calendar_call'] = self.calendar_spread(S, strikes[1], T, T_far, r, sigma, sigma_far,
+                                                                   leg_prices=leg_prices,
+                                                                   far_leg_prices=far_leg_prices)
+            if wanted('diagonal_call'):
+                strategies['diagonal_call'] = self.diagonal_spread(S, strikes[2], strikes[1], T, T_far, r, sigma,
+                                                                   sigma_far, leg_prices=leg_prices,
+                                                                   far_leg_prices=far_leg_prices)
+        
+        return strategies
+    
+    @staticmethod
+    def _sweep_leg_specs(S: float, strikes: List[float], shares_owned: int = 100) -> List[Tuple]:
+        """
+        Patas por acción de las estrategias de un solo vencimiento de analyze_all_strategies
         
+        Returns:
+            Lista de (nombre, etiqueta, [(tipo, cantidad, strike)], acciones, escala,
+            clave del costo, conventions). conventions(p) recibe las primas por acción
+            (..., patas) y devuelve (costo, max_profit, max_loss) con las mismas fórmulas
+            que el método de la estrategia.
+        """
+        n = shares_owned
+        specs = []
+        for K in strikes:
+            specs.append((f'covered_call_{K}', 'Covered Call', [('call', -1, K)], 1, n, 'premium_received',
+                          lambda p, K=K: (n * p[..., 0], n * p[..., 0] + n * max(K - S, 0), n * (p[..., 0] - S))))
+            specs.append((f'protective_put_{K}', 'Protective Put', [('put', 1, K)], 1, n, 'premium_paid',
+                          lambda p, K=K: (n * p[..., 0], np.full(p.shape[:-1], np.inf), n * p[..., 0] + n * (S - K))))
+        if len(strikes) >= 3:
+            K1, K2, K3 = strikes[:3]
+            
+            def butterfly(p):
+                net_cost = p[..., 0] - 2 * p[..., 1] + p[..., 2]
+                return net_cost, (K2 - K1) - net_cost, -net_cost
+            
+            def collar(p):
+                net_premium = n * (p[..., 1] - p[..., 0])
+                return -net_premium, n * (K3 - S) + net_premium, n * (K1 - S) + net_premium
+            
+            specs.append(('long_straddle', 'Long Straddle', [('call', 1, K2), ('put', 1, K2)], 0, 1, 'premium_paid',
+                          lambda p: (p[..., 0] + p[..., 1], np.full(p.shape[:-1], np.inf), -(p[..., 0] + p[..., 1]))))
+            specs.append(('butterfly_call', 'Call Butterfly Spread', [('call', 1, K1), ('call', -2, K2), ('call', 1, K3)],
+                          0, 1, 'net_cost', butterfly))
+            specs.append(('collar', 'Collar', [('put', 1, K1), ('call', -1, K3)], 1, n, 'net_cost', collar))
         if len(strikes) >= 4:
-            strategies['iron_condor'] = self.iron_condor(S, strikes[0], strikes[1], strikes[2], strikes[3], T, r, sigma)
+            width = max(strikes[1] - strikes[0], strikes[3] - strikes[2])
+            
+            def iron_condor(p):
+                net_credit = (p[..., 1] - p[..., 0]) + (p[..., 2] - p[..., 3])
+                return net_credit, net_credit, width - net_credit
+            
+            specs.append(('iron_condor', 'Iron Condor',
+                          [('put', 1, strikes[0]), ('put', -1, strikes[1]),
+                           ('call', -1, strikes[2]), ('call', 1, strikes[3])], 0, 1, 'net_credit', iron_condor))
+        return specs
+    
+    def sweep_strategy_metrics(self, S: float, r, strikes: List[float],
+                               days: List[float] = None, sigmas: List[float] = None) -> StrategySweep:
+        """
+        Calcula las métricas de todas las estrategias para todo el rango de días y una
+        grilla gruesa de volatilidades en una sola evaluación vectorizada
+        
+        El resultado se cachea por (S, tasas, strikes, días, volatilidades), de modo que
+        mover el slider de días es una búsqueda en el tensor y no un recálculo.
+        
+        Args:
+            S: Precio actual del subyacente
+            r: Tasa libre de riesgo, o curva r(T) (ej. rates.RateCurve) evaluada en cada día
+            strikes: Strikes usados por analyze_all_strategies
+            days: Días hasta expiración (por defecto 7 a 365)
+            sigmas: Volatilidades (por defecto 10% a 100% cada 5%)
+        """
+        days = np.asarray(days if days is not None else np.arange(7, 366), dtype=float)
+        sigmas = np.asarray(sigmas if sigmas is not None else np.round(np.arange(0.10, 1.001, 0.05), 4), dtype=float)
+        T = days / 365.25
+        rates = np.broadcast_to(np.asarray(r(T) if callable(r) else r, dtype=float), T.shape)
+        key = (float(S), rates.tobytes(), tuple(float(k) for k in strikes), days.tobytes(), sigmas.tobytes())
+        
+        with self._sweep_lock:
+            if key in self._sweep_cache:
+                self._sweep_cache.move_to_end(key)
+                return self._sweep_cache[key]
+        
+        specs = self._sweep_leg_specs(float(S), list(strikes))
+        n_legs = max(len(spec[2]) for spec in specs)
+        
+        # Tabla de precios (días, vols, strikes únicos, {call, put}) en un solo broadcast
+        unique_strikes = np.unique(np.asarray(strikes, dtype=float))
+        table = self.calculator.black_scholes_price(
+            S, unique_strikes[None, None, :, None], T[:, None, None, None], rates[:, None, None, None],
+            sigmas[None, :, None, None], np.array([True, False])
+        )
+        
+        # Patas (estrategias, patas): índices sobre la tabla, rellenando con cantidad 0
+        strike_idx = np.zeros((len(specs), n_legs), dtype=int)
+        type_idx = np.zeros((len(specs), n_legs), dtype=int)
+        quantities = np.zeros((len(specs), n_legs))
+        for i, (_, _, legs, *_) in enumerate(specs):
+            for j, (option_type, quantity, strike) in enumerate(legs):
+                strike_idx[i, j] = np.searchsorted(unique_strikes, strike)
+                type_idx[i, j] = 0 if option_type == 'call' else 1
+                quantities[i, j] = quantity
+        stock = np.array([spec[3] for spec in specs], dtype=float)
+        scale = np.array([spec[4] for spec in specs], dtype=float)
+        
+        # premiums: (días, vols, estrategias, patas) -> filas aplanadas en orden (estrategia, día, vol)
+        premiums = table[:, :, strike_idx, type_idx].transpose(2, 0, 1, 3)
+        n_rows = len(specs) * len(days) * len(sigmas)
+        grid_T = np.broadcast_to(T[None, :, None], premiums.shape[:3]).ravel()
+        grid_r = np.broadcast_to(rates[None, :, None], premiums.shape[:3]).ravel()
+        grid_sigma = np.broadcast_to(sigmas[None, None, :], premiums.shape[:3]).ravel()
+        stats = self.payoff_statistics(
+            S, grid_T, grid_r, grid_sigma,
+            np.broadcast_to(unique_strikes[strike_idx][:, None, None, :], premiums.shape).reshape(n_rows, n_legs),
+            np.broadcast_to(quantities[:, None, None, :], premiums.shape).reshape(n_rows, n_legs),
+            np.broadcast_to((type_idx == 0)[:, None, None, :], premiums.shape).reshape(n_rows, n_legs),
+            premiums.reshape(n_rows, n_legs),
+            stock_quantity=np.repeat(stock, len(days) * len(sigmas))
+        )
+        
+        shape = (len(specs), len(days), len(sigmas))
+        row_scale = scale[:, None, None]
+        # Costo, máxima ganancia y máxima pérdida con las convenciones de cada método
+        conventions = np.array([np.broadcast_arrays(*spec[6](premiums[i]))
+                                for i, spec in enumerate(specs)], dtype=float)
+        values = np.stack([
+            conventions[:, 0],
+            conventions[:, 1],
+            conventions[:, 2],
+            stats['probability_profit'].reshape(shape),
+            stats['expected_payoff'].reshape(shape) * row_scale
+        ], axis=1)
+        
+        sweep = StrategySweep([spec[0] for spec in specs], [spec[1] for spec in specs], days, sigmas, values,
+                              cost_keys=[spec[5] for spec in specs])
+        with self._sweep_lock:
+            self._sweep_cache[key] = sweep
+            while len(self._sweep_cache) > self._sweep_cache_size:
+                self._sweep_cache.popitem(last=False)
+        return sweep
+    
+    # Nombres aceptados por rank_strategies -> columna de strategies_table
+    RANKING_CRITERIA = {
+        'risk_reward': 'risk_reward',
+        'probability': 'probability_profit',
+        'max_profit': 'max_profit',
+        'expected_payoff': 'expected_payoff'
+    }
+    
+    @staticmethod
+    def strategies_table(strategies: Dict) -> pd.DataFrame:
+        """
+        Calcula una sola vez todas las columnas de criterios de ranking
         
-        return strategies
+        Las estrategias con ganancia ilimitada conservan max_profit = inf, pero su
+        risk_reward se calcula con la máxima ganancia del rango de precios evaluado.
+        """
+        rows = []
+        for name, strategy in strategies.items():
+            max_profit = strategy.get('max_profit', 0)
+            payoffs = strategy.get('payoffs', [])
+            unlimited = np.isinf(max_profit) and max_profit > 0
+            rows.append({
+                'name': name,
+                'strategy': strategy.get('strategy', name),
+                'max_profit': max_profit,
+                'reference_profit': max(payoffs) if unlimited and len(payoffs) else max_profit,
+                'max_loss': abs(strategy.get('max_loss', 0)),
+                'probability_profit': strategy.get('probability_profit', 0),
+                'expected_payoff': strategy.get('expected_payoff', 0),
+                'net_cost': strategy.get('net_cost', strategy.get('net_credit', strategy.get('premium_paid', 0))),
+                'unlimited_profit': unlimited
+            })
+        
+        table = pd.DataFrame(rows, columns=['name', 'strategy', 'max_profit', 'reference_profit', 'max_loss',
+                                            'probability_profit', 'expected_payoff', 'net_cost', 'unlimited_profit'])
+        max_loss = table['max_loss'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['risk_reward'] = np.where(max_loss > 0, table['reference_profit'].to_numpy(dtype=float) / max_loss, 0.0)
+        return table.set_index('name')
+    
+    @staticmethod
+    def weighted_scores(table: pd.DataFrame, weights: Dict[str, float]) -> np.ndarray:
+        """
+        Score multi-criterio: suma ponderada de percentiles por columna (mayor es mejor).
+        Un peso negativo penaliza la columna (por ejemplo max_loss). Los valores
+        faltantes (NaN) reciben el peor percentil.
+        """
+        n = len(table)
+        scores = np.zeros(n)
+        if n == 0:
+            return scores
+        for column, weight in weights.items():
+            values = table[column].to_numpy(dtype=float)
+            values = np.where(np.isnan(values), -np.inf if weight >= 0 else np.inf, values)
+            ranks = np.empty(n)
+            ranks[np.argsort(values, kind='stable')] = np.arange(n)
+            scores += weight * ranks / max(n - 1, 1)
+        return scores
+    
+    @staticmethod
+    def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """Índices de los k mayores scores, ordenados, usando selección parcial (argpartition)"""
+        scores = np.asarray(scores, dtype=float)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.array([], dtype=int)
+        best = np.argpartition(-scores, k - 1)[:k]
+        return best[np.argsort(-scores[best], kind='stable')]
+    
+    def top_strategies(self, strategies, criteria='risk_reward', k: int = 10) -> pd.DataFrame:
+        """
+        Top-k de estrategias por uno o varios criterios
+        
+        Args:
+            strategies: Diccionario de estrategias o tabla de strategies_table
+            criteria: Nombre de criterio o diccionario {columna: peso}
+            k: Cantidad de estrategias a devolver
+        """
+        table = strategies if isinstance(strategies, pd.DataFrame) else self.strategies_table(strategies)
+        if isinstance(criteria, str):
+            column = self.RANKING_CRITERIA.get(criteria, criteria)
+            scores = table[column].to_numpy(dtype=float)
+        else:
+            scores = self.weighted_scores(table, criteria)
+        best = self.top_k_indices(scores, k)
+        return table.iloc[best].assign(score=scores[best])
+    
+    @staticmethod
+    def pareto_front(table: pd.DataFrame, criteria: List[str] = None, chunk_size: int = 1024) -> pd.DataFrame:
+        """
+        Estrategias no dominadas, maximizando todas las columnas de criteria
+        (usar valores negados en la tabla para minimizar)
+        """
+        criteria = criteria or ['risk_reward', 'probability_profit', 'expected_payoff']
+        values = table[criteria].to_numpy(dtype=float)
+        if len(values) == 0:
+            return table.iloc[[]]
+        
+        # En orden lexicográfico descendente un candidato solo puede ser dominado por uno anterior,
+        # así que se procesa por bloques contra el frente acumulado
+        order = np.lexsort(-values.T[::-1])
+        front = np.empty((0, values.shape[1]))
+        front_idx = []
+        for start in range(0, len(order), chunk_size):
+            idx = order[start:start + chunk_size]
+            block = values[idx]
+            if len(front):
+                dominated = np.all(front[None, :, :] >= block[:, None, :], axis=2).any(axis=1)
+                idx, block = idx[~dominated], block[~dominated]
+            # Dentro del bloque: descartar los dominados (o repetidos) por uno anterior
+            weakly_dominated = np.all(block[None, :, :] >= block[:, None, :], axis=2)
+            keep = ~np.tril(weakly_dominated, k=-1).any(axis=1)
+            front = np.vstack([front, block[keep]])
+            front_idx.extend(idx[keep])
+        return table.iloc[front_idx]
     
     def rank_strategies(self, strategies: Dict, ranking_criteria: str = 'risk_reward') -> List[Tuple[str, Dict, float]]:
         """
         Rankea estrategias basado en diferentes criterios
         """
-        ranked = []
-        
-        for name, strategy in strategies.items():
-            if ranking_criteria == 'risk_reward':
-                max_profit = strategy.get('max_profit', 0)
-                max_loss = abs(strategy.get('max_loss', 1))
-                score = max_profit / max_loss if max_loss > 0 else 0
-            elif ranking_criteria == 'probability':
-                score = strategy.get('probability_profit', 0)
-            elif ranking_criteria == 'max_profit':
-                score = strategy.get('max_profit', 0)
-            else:
-                score = 0
-            
-            ranked.append((name, strategy, score))
+        table = self.strategies_table(strategies)
+        column = self.RANKING_CRITERIA.get(ranking_criteria)
+        scores = table[column].to_numpy(dtype=float) if column else np.zeros(len(table))
+        order = np.argsort(-scores, kind='stable')
         
-        return sorted(ranked, key=lambda x: x[2], reverse=True)
+        return [(table.index[i], strategies[table.index[i]], scores[i]) for i in order]
 
-# Importar norm para iron_condor
+# Importar distribución normal (diagonal_spread y payoff_statistics)
 from scipy.stats import norm
+from scipy.special import ndtr
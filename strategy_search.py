@@ -0,0 +1,408 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from options_calculator import OptionsCalculator
+from strategies import OptionsStrategies
+from config import SEARCH_CONFIG
+from utils import widen_frame
+
+# Estructuras soportadas: nombre -> tipo de cada pata ('call'/'put') y cantidades
+STRUCTURES = {
+    'bull_call_spread': ('Bull Call Spread', ('call', 'call'), (1, -1)),
+    'bear_call_spread': ('Bear Call Spread', ('call', 'call'), (-1, 1)),
+    'bull_put_spread': ('Bull Put Spread', ('put', 'put'), (1, -1)),
+    'bear_put_spread': ('Bear Put Spread', ('put', 'put'), (-1, 1)),
+    'call_butterfly': ('Call Butterfly', ('call', 'call', 'call'), (1, -2, 1)),
+    'put_butterfly': ('Put Butterfly', ('put', 'put', 'put'), (1, -2, 1)),
+    'iron_condor': ('Iron Condor', ('put', 'put', 'call', 'call'), (1, -1, -1, 1))
+}
+
+MAX_LEGS = 4
+
+# Criterios que puede ponderar el score compuesto (claves válidas de los pesos)
+SCORE_CRITERIA = ('credit', 'max_profit', 'max_loss', 'risk_reward', 'probability_profit',
+                  'expected_payoff', 'liquidity')
+
+
+class StrategySearchEngine:
+    """Motor de búsqueda de estrategias sobre los strikes y vencimientos listados"""
+
+    def __init__(self, strategies: OptionsStrategies = None):
+        self.strategies = strategies or OptionsStrategies()
+        self.calculator = OptionsCalculator()
+
+    @staticmethod
+    def prepare_quotes(chain_frame: pd.DataFrame, min_open_interest: float = 0,
+                       max_spread_pct: float = np.inf) -> pd.DataFrame:
+        """
+        Normaliza una cadena (calls o puts) a strike, mid, spread e IV, descartando
+        opciones sin precio o ilíquidas
+        """
+        if chain_frame is None or chain_frame.empty or 'strike' not in chain_frame.columns:
+            return pd.DataFrame(columns=['strike', 'mid', 'spread_pct', 'iv', 'open_interest', 'volume'])
+        # Cadenas compactas: strikes y precios en float64 tal como cotizaron
+        chain_frame = widen_frame(chain_frame)
+
+        def column(name):
+            if name in chain_frame.columns:
+                return pd.to_numeric(chain_frame[name], errors='coerce').fillna(0).to_numpy(dtype=float)
+            return np.zeros(len(chain_frame))
+
+        bid, ask, last = column('bid'), column('ask'), column('lastPrice')
+        has_quote = (bid > 0) & (ask >= bid)
+        mid = np.where(has_quote, (bid + ask) / 2, last)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_pct = np.where(has_quote & (mid > 0), (ask - bid) / mid, np.inf)
+
+        quotes = pd.DataFrame({
+            'strike': column('strike'),
+            'mid': mid,
+            'spread_pct': spread_pct,
+            'iv': column('impliedVolatility'),
+            'open_interest': column('openInterest'),
+            'volume': column('volume')
+        })
+
+        keep = ((quotes['strike'] > 0) & (quotes['mid'] > 0) &
+                (quotes['open_interest'] >= min_open_interest) &
+                ((quotes['spread_pct'] <= max_spread_pct) | ~np.isfinite(max_spread_pct)))
+        return quotes[keep].drop_duplicates('strike').sort_values('strike').reset_index(drop=True)
+
+    @staticmethod
+    def _strike_pairs(strikes: np.ndarray, max_width: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Pares (i, j) con strike_i < strike_j y ancho acotado"""
+        i, j = np.triu_indices(len(strikes), k=1)
+        keep = strikes[j] - strikes[i] <= max_width
+        return i[keep], j[keep]
+
+    def _enumerate(self, puts: pd.DataFrame, calls: pd.DataFrame, S: float,
+                   max_width: float, structures: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Enumera las combinaciones de una expiración como índices sobre la tabla
+        [puts; calls]. Las patas sobrantes se rellenan con cantidad 0.
+        """
+        n_puts = len(puts)
+        offsets = {'put': 0, 'call': n_puts}
+        strikes = {'put': puts['strike'].to_numpy(), 'call': calls['strike'].to_numpy()}
+        mids = {'put': puts['mid'].to_numpy(), 'call': calls['mid'].to_numpy()}
+
+        blocks = []
+
+        def add_block(name, legs):
+            legs = [offsets[leg_type] + idx for leg_type, idx in zip(STRUCTURES[name][1], legs)]
+            if len(legs[0]) == 0:
+                return
+            idx = np.zeros((len(legs[0]), MAX_LEGS), dtype=np.int64)
+            qty = np.zeros((len(legs[0]), MAX_LEGS))
+            for k, leg in enumerate(legs):
+                idx[:, k] = leg
+                qty[:, k] = STRUCTURES[name][2][k]
+            blocks.append((np.full(len(idx), list(STRUCTURES).index(name)), idx, qty))
+
+        for option_type in ('call', 'put'):
+            i, j = self._strike_pairs(strikes[option_type], max_width)
+            for name in (f'bull_{option_type}_spread', f'bear_{option_type}_spread'):
+                if name in structures:
+                    add_block(name, [i, j])
+
+            name = f'{option_type}_butterfly'
+            if name in structures and len(i):
+                # Alas simétricas: buscar K_k = K_j + (K_j - K_i) en los strikes listados
+                k_strikes = strikes[option_type]
+                target = 2 * k_strikes[j] - k_strikes[i]
+                k = np.searchsorted(k_strikes, target).clip(max=len(k_strikes) - 1)
+                keep = np.isclose(k_strikes[k], target) & (k > j) & (target - k_strikes[i] <= max_width)
+                add_block(name, [i[keep], j[keep], k[keep]])
+
+        if 'iron_condor' in structures:
+            # Poda: solo spreads OTM que cobran crédito antes del producto cartesiano
+            pi, pj = self._strike_pairs(strikes['put'], max_width)
+            put_ok = (strikes['put'][pj] <= S) & (mids['put'][pj] > mids['put'][pi])
+            ci, cj = self._strike_pairs(strikes['call'], max_width)
+            call_ok = (strikes['call'][ci] >= S) & (mids['call'][ci] > mids['call'][cj])
+            pi, pj, ci, cj = pi[put_ok], pj[put_ok], ci[call_ok], cj[call_ok]
+            put_side, call_side = np.meshgrid(np.arange(len(pi)), np.arange(len(ci)), indexing='ij')
+            put_side, call_side = put_side.ravel(), call_side.ravel()
+            add_block('iron_condor', [pi[put_side], pj[put_side], ci[call_side], cj[call_side]])
+
+        if not blocks:
+            return {}
+
+        return {
+            'structure': np.concatenate([b[0] for b in blocks]),
+            'idx': np.concatenate([b[1] for b in blocks]),
+            'qty': np.concatenate([b[2] for b in blocks])
+        }
+
+    def search(self, options_chain: Dict, S: float, r, default_sigma: float = 0.3,
+               top_k: int = None, filters: Dict = None, weights: Dict = None,
+               structures: List[str] = None) -> pd.DataFrame:
+        """
+        Busca las mejores estrategias sobre la cadena de opciones real
+
+        Args:
+            options_chain: Diccionario {expiración: {'calls': df, 'puts': df}} de DataFetcher
+            S: Precio actual del subyacente
+            r: Tasa libre de riesgo, o curva r(T) (rates.RateCurve) para usar la tasa
+                de cada vencimiento
+            default_sigma: Volatilidad a usar cuando la cadena no trae IV
+            top_k: Cantidad de estrategias a devolver
+            filters: Sobrescribe claves de SEARCH_CONFIG (días, OI mínimo, spread, ancho)
+            weights: Pesos del score compuesto por criterio (claves de SCORE_CRITERIA; otra
+                clave da ValueError)
+            structures: Subconjunto de STRUCTURES a enumerar
+
+        Returns:
+            DataFrame con las top_k estrategias ordenadas por score
+        """
+        config = {**SEARCH_CONFIG, **(filters or {})}
+        top_k = top_k or config['TOP_K']
+        weights = weights or config['WEIGHTS']
+        unknown = sorted(set(weights) - set(SCORE_CRITERIA))
+        if unknown:
+            raise ValueError(f"Criterios de score desconocidos: {', '.join(unknown)} "
+                             f"(permitidos: {', '.join(SCORE_CRITERIA)})")
+        structures = structures or list(STRUCTURES)
+        max_width = config['MAX_WIDTH_PCT'] * S
+
+        quote_tables, candidates, expirations = [], [], []
+        offset = 0
+        for expiration, chain in (options_chain or {}).items():
+            days = self.calculator.time_to_expiration(expiration) * 365.25
+            if not config['MIN_DAYS_TO_EXPIRATION'] <= days <= config['MAX_DAYS_TO_EXPIRATION']:
+                continue
+
+            puts = self.prepare_quotes(chain.get('puts'), config['MIN_OPEN_INTEREST'], config['MAX_SPREAD_PCT'])
+            calls = self.prepare_quotes(chain.get('calls'), config['MIN_OPEN_INTEREST'], config['MAX_SPREAD_PCT'])
+            block = self._enumerate(puts, calls, S, max_width, structures)
+            if not block:
+                continue
+
+            table = pd.concat([puts.assign(is_call=False), calls.assign(is_call=True)], ignore_index=True)
+            block['idx'] += offset
+            block['expiration'] = np.full(len(block['idx']), len(expirations))
+            offset += len(table)
+            quote_tables.append(table)
+            candidates.append(block)
+            expirations.append((expiration, days))
+
+        if not candidates:
+            return pd.DataFrame()
+
+        quotes = pd.concat(quote_tables, ignore_index=True)
+        idx = np.concatenate([c['idx'] for c in candidates])
+        qty = np.concatenate([c['qty'] for c in candidates])
+        structure = np.concatenate([c['structure'] for c in candidates])
+        exp_index = np.concatenate([c['expiration'] for c in candidates])
+
+        strikes = quotes['strike'].to_numpy()[idx]
+        mids = quotes['mid'].to_numpy()[idx]
+        is_call = quotes['is_call'].to_numpy()[idx]
+        active = qty != 0
+
+        # Volatilidad por candidato: IV promedio de sus patas
+        leg_iv = np.where(active, quotes['iv'].to_numpy()[idx], np.nan)
+        leg_iv = np.where(leg_iv > 0, leg_iv, np.nan)
+        with np.errstate(invalid='ignore'):
+            sigma = np.nanmean(leg_iv, axis=1)
+        sigma = np.where(np.isfinite(sigma), sigma, default_sigma)
+        T = np.array([days for _, days in expirations])[exp_index] / 365.25
+
+        if callable(r):
+            r = r(T)
+        stats = self.strategies.payoff_statistics(S, T, r, sigma, strikes, qty, is_call, mids)
+
+        credit = -(qty * mids).sum(axis=1)
+        max_profit = stats['max_payoff']
+        max_loss = -stats['min_payoff']
+        open_interest = np.where(active, quotes['open_interest'].to_numpy()[idx], np.inf).min(axis=1)
+        spread_pct = np.where(active, quotes['spread_pct'].to_numpy()[idx], 0).max(axis=1)
+
+        # Poda: descartar combinaciones sin riesgo o sin ganancia posible (cotizaciones incoherentes)
+        valid = (max_profit > 0) & (max_loss > 0) & np.isfinite(max_profit) & np.isfinite(max_loss)
+        if not valid.any():
+            return pd.DataFrame()
+
+        metrics = {
+            'credit': credit,
+            'max_profit': max_profit,
+            'max_loss': max_loss,
+            'risk_reward': np.where(valid, max_profit / np.where(max_loss > 0, max_loss, 1), 0),
+            'probability_profit': stats['probability_profit'],
+            'expected_payoff': stats['expected_payoff'],
+            'liquidity': np.log1p(np.where(np.isfinite(open_interest), open_interest, 0))
+        }
+
+        # Score compuesto sobre percentiles, robusto a valores extremos de risk/reward
+        criteria = pd.DataFrame({criterion: metrics[criterion][valid] for criterion in weights})
+        score = np.full(len(credit), -np.inf)
+        score[valid] = self.strategies.weighted_scores(criteria, weights)
+        best = self.strategies.top_k_indices(score, min(top_k, int(valid.sum())))
+
+        names = list(STRUCTURES)
+        rows = []
+        for i in best:
+            legs = [(('call' if is_call[i, j] else 'put'), qty[i, j], strikes[i, j], mids[i, j])
+                    for j in range(MAX_LEGS) if qty[i, j] != 0]
+            expiration, days = expirations[exp_index[i]]
+            rows.append({
+                'expiration': expiration,
+                'days': int(days),
+                'strategy': STRUCTURES[names[structure[i]]][0],
+                'legs': ' / '.join(f"{q:+g} {t} {k:.2f}" for t, q, k, _ in legs),
+                'credit': credit[i],
+                'max_profit': max_profit[i],
+                'max_loss': max_loss[i],
+                'risk_reward': metrics['risk_reward'][i],
+                'probability_profit': stats['probability_profit'][i],
+                'expected_payoff': stats['expected_payoff'][i],
+                'min_open_interest': open_interest[i],
+                'max_spread_pct': spread_pct[i],
+                'implied_vol': sigma[i],
+                'score': score[i],
+                'components': [{'type': t, 'quantity': q, 'strike': k, 'price': p} for t, q, k, p in legs]
+            })
+
+        result = pd.DataFrame(rows)
+        result.attrs['candidates_evaluated'] = int(len(credit))
+        return result
+
+
+class StrikeIndex:
+    """
+    Strikes listados de un vencimiento, ordenados para búsquedas O(log n)
+
+    Permite llevar strikes teóricos (ej. 0.95 x spot) a los que realmente cotizan y
+    reutilizar sus precios de mercado (mid) e IV en lugar de precios de modelo.
+
+    Args:
+        chain: Cadena de un vencimiento {'calls': DataFrame, 'puts': DataFrame}
+        expiration: Fecha de vencimiento (YYYY-MM-DD)
+    """
+
+    def __init__(self, chain: Dict, expiration: str = None):
+        self.expiration = expiration
+        self.quotes = {
+            'call': StrategySearchEngine.prepare_quotes(chain.get('calls')).set_index('strike'),
+            'put': StrategySearchEngine.prepare_quotes(chain.get('puts')).set_index('strike')
+        }
+        # Strikes con cotización en al menos uno de los lados
+        self.strikes = np.union1d(self.quotes['call'].index.to_numpy(dtype=float),
+                                  self.quotes['put'].index.to_numpy(dtype=float))
+
+    @classmethod
+    def for_chain(cls, options_chain: Dict) -> Dict[str, 'StrikeIndex']:
+        """Un índice por vencimiento de la cadena"""
+        return {expiration: cls(chain, expiration) for expiration, chain in options_chain.items()}
+
+    @staticmethod
+    def nearest_expiration(options_chain: Dict, days: float) -> Optional[str]:
+        """Vencimiento listado más cercano a la cantidad de días pedida"""
+        if not options_chain:
+            return None
+        return min(options_chain,
+                   key=lambda expiration: abs(OptionsCalculator.time_to_expiration(expiration) * 365.25 - days))
+
+    @staticmethod
+    def next_expiration(options_chain: Dict, expiration: str) -> Optional[str]:
+        """Primer vencimiento listado posterior a expiration (None si es el último)"""
+        later = sorted(candidate for candidate in (options_chain or {}) if candidate > expiration)
+        return later[0] if later else None
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def _nearest_position(self, K) -> np.ndarray:
+        """Posición del strike listado más cercano (empates hacia el menor)"""
+        K = np.asarray(K, dtype=float)
+        upper = np.clip(np.searchsorted(self.strikes, K), 1, len(self.strikes) - 1)
+        lower = upper - 1
+        return np.where(K - self.strikes[lower] <= self.strikes[upper] - K, lower, upper)
+
+    def nearest(self, K):
+        """Strike listado más cercano a K (escalar o arreglo)"""
+        if len(self.strikes) == 1:
+            return np.full(np.shape(K), self.strikes[0]) if np.ndim(K) else float(self.strikes[0])
+        strikes = self.strikes[self._nearest_position(K)]
+        return float(strikes) if np.ndim(strikes) == 0 else strikes
+
+    def bracket(self, K: float) -> Tuple[Optional[float], Optional[float]]:
+        """Strikes listados inmediatamente por debajo (<=) y por encima (>=) de K"""
+        i = np.searchsorted(self.strikes, K, side='right')
+        lower = float(self.strikes[i - 1]) if i > 0 else None
+        j = np.searchsorted(self.strikes, K, side='left')
+        upper = float(self.strikes[j]) if j < len(self.strikes) else None
+        return lower, upper
+
+    def snap(self, targets: List[float], max_shift: float = None) -> Optional[List[float]]:
+        """
+        Lleva una escalera de strikes teóricos a strikes listados distintos y crecientes
+
+        Elige los listados que minimizan la distancia total a los objetivos respetando
+        el orden, así un objetivo cuyo listado más cercano ya está tomado pasa al libre
+        más cercano de cualquiera de los dos lados. Devuelve None (usar los teóricos)
+        si no alcanzan los listados o si algún strike se aleja del objetivo más de
+        max_shift (por defecto medio paso de la escalera).
+        """
+        targets = np.sort(np.asarray(targets, dtype=float))
+        n, m = len(targets), len(self.strikes)
+        if n == 0:
+            return []
+        if m < n:
+            return None
+        if max_shift is None:
+            max_shift = 0.5 * (targets[-1] - targets[0]) / (n - 1) if n > 1 else np.inf
+
+        # Programación dinámica objetivos x listados: total[j] es el mejor costo con el
+        # objetivo actual en el listado j; back[i][j] el listado del objetivo anterior
+        cost = np.abs(targets[:, None] - self.strikes[None, :])
+        positions = np.arange(m)
+        total = cost[0]
+        back = []
+        for i in range(1, n):
+            best = np.minimum.accumulate(total)
+            # Índice del mínimo de total[:j + 1] (empates hacia el menor)
+            improved = np.concatenate([[True], total[1:] < best[:-1]])
+            best_at = np.maximum.accumulate(np.where(improved, positions, 0))
+            total = cost[i] + np.concatenate([[np.inf], best[:-1]])
+            back.append(np.concatenate([[0], best_at[:-1]]))
+
+        chosen = [int(np.argmin(total))]
+        for previous in reversed(back):
+            chosen.append(int(previous[chosen[-1]]))
+        chosen.reverse()
+        if cost[np.arange(n), chosen].max() > max_shift + 1e-9:
+            return None
+        return [float(self.strikes[position]) for position in chosen]
+
+    def quote(self, option_type: str, K: float) -> Optional[Dict]:
+        """Cotización de mercado (mid, spread_pct, iv, open_interest, volume) de un strike listado"""
+        quotes = self.quotes[option_type]
+        if K not in quotes.index:
+            return None
+        return quotes.loc[K].to_dict()
+
+    def leg_prices(self, strikes: List[float] = None) -> pd.DataFrame:
+        """
+        Precios de mercado (mid) por strike con el formato de
+        OptionsStrategies.price_leg_table: índice strike, columnas 'call' y 'put'
+        (NaN donde un lado no cotiza)
+        """
+        index = pd.Index(np.unique(np.asarray(self.strikes if strikes is None else strikes, dtype=float)),
+                         name='strike')
+        return pd.DataFrame({side: self.quotes[side]['mid'].reindex(index) for side in ('call', 'put')})
+
+    def implied_vol(self, option_type: str, K: float) -> Optional[float]:
+        """IV de mercado de un strike listado (None si no cotiza o no informa IV)"""
+        quote = self.quote(option_type, K)
+        if quote is None or not quote['iv'] > 0:
+            return None
+        return float(quote['iv'])
+
+    def atm_iv(self, S: float) -> Optional[float]:
+        """IV at-the-money: promedio de call y put en el strike listado más cercano a S"""
+        if len(self.strikes) == 0:
+            return None
+        K = self.nearest(S)
+        ivs = [iv for iv in (self.implied_vol('call', K), self.implied_vol('put', K)) if iv is not None]
+        return float(np.mean(ivs)) if ivs else None
@@ -6,6 +6,7 @@ antes de ejecutar la aplicación principal.
 import sys
 import traceback
 from datetime import datetime
+from fixtures import build_synthetic_chain, build_synthetic_snapshot
 
 def test_imports():
     """Prueba que todas las importaciones funcionen"""
@@ -41,29 +42,34 @@ def test_imports():
     return True
 
 def test_data_fetcher():
-    """Prueba el módulo de obtención de datos"""
+    """Prueba el módulo de obtención de datos (sobre un snapshot reproducido, sin red)"""
     print("\n📊 Probando DataFetcher...")
     
     try:
+        import tempfile
         from data_fetcher import DataFetcher
+        from providers import ReplayProvider
+        
+        root = tempfile.mkdtemp()
+        intraday = build_synthetic_snapshot(root, r=0.045)
         
         # Crear instancia
-        fetcher = DataFetcher('GGAL')
+        fetcher = DataFetcher('GGAL', provider=ReplayProvider(root))
         print("✅ DataFetcher creado correctamente")
         
         # Probar obtención de precio actual
         current_price = fetcher.get_current_price()
-        if current_price and current_price > 0:
-            print(f"✅ Precio actual obtenido: ${current_price:.2f}")
-        else:
-            print("⚠️ No se pudo obtener precio actual (posible problema de conectividad)")
+        assert abs(current_price - intraday['Close'].iloc[-1]) < 1e-9
+        print(f"✅ Precio actual obtenido: ${current_price:.2f}")
         
         # Probar volatilidad histórica
         historical_vol = fetcher.calculate_historical_volatility()
+        assert 0 < historical_vol < 1
         print(f"✅ Volatilidad histórica: {historical_vol*100:.1f}%")
         
         # Probar tasa libre de riesgo
         risk_free = fetcher.get_risk_free_rate()
+        assert abs(risk_free - 0.045) < 1e-3
         print(f"✅ Tasa libre de riesgo: {risk_free*100:.1f}%")
         
         return True
@@ -142,6 +148,1348 @@ def test_strategies():
         traceback.print_exc()
         return False
 
+def test_shared_leg_prices():
+    """Prueba que la tabla de patas compartida y las estadísticas por lote den lo mismo que cada estrategia sola"""
+    print("\n🔗 Probando precios de patas compartidos...")
+    
+    try:
+        import numpy as np
+        from strategies import OptionsStrategies
+        from strategy_search import StrikeIndex
+        
+        strategies = OptionsStrategies()
+        S, T, r, sigma, T_far, sigma_far = 100.0, 30 / 365.25, 0.05, 0.3, 90 / 365.25, 0.25
+        strikes = [90.0, 95.0, 100.0, 105.0, 110.0]
+        chain = build_synthetic_chain(S, r=r)
+        expiration = sorted(chain)[0]
+        market = StrikeIndex(chain[expiration], expiration).leg_prices(strikes)
+        market.loc[105.0, 'call'] = np.nan  # sin cotización: Black-Scholes para esa pata
+        
+        for leg_prices in (None, market):
+            batched = strategies.analyze_all_strategies(S, T, r, sigma, strikes, T_far=T_far,
+                                                        sigma_far=sigma_far, leg_prices=leg_prices)
+            single = {}
+            for K in strikes:
+                single[f'covered_call_{K}'] = strategies.covered_call(S, K, T, r, sigma, leg_prices=leg_prices)
+                single[f'protective_put_{K}'] = strategies.protective_put(S, K, T, r, sigma, leg_prices=leg_prices)
+            single['long_straddle'] = strategies.long_straddle(S, strikes[1], T, r, sigma, leg_prices=leg_prices)
+            single['butterfly_call'] = strategies.butterfly_spread(S, *strikes[:3], T, r, sigma, 'call',
+                                                                   leg_prices=leg_prices)
+            single['collar'] = strategies.collar(S, strikes[0], strikes[2], T, r, sigma, leg_prices=leg_prices)
+            single['iron_condor'] = strategies.iron_condor(S, *strikes[:4], T, r, sigma, leg_prices=leg_prices)
+            single['calendar_call'] = strategies.calendar_spread(S, strikes[1], T, T_far, r, sigma, sigma_far,
+                                                                 leg_prices=leg_prices)
+            single['diagonal_call'] = strategies.diagonal_spread(S, strikes[2], strikes[1], T, T_far, r, sigma,
+                                                                 sigma_far, leg_prices=leg_prices)
+            
+            assert set(batched) == set(single)
+            for name, strategy in single.items():
+                for key, value in strategy.items():
+                    shared = batched[name][key]
+                    if key == 'components':
+                        assert [leg['price'] for leg in shared] == [leg['price'] for leg in value], name
+                    elif isinstance(value, (int, float, list)) and not isinstance(value, bool):
+                        assert np.allclose(shared, value, rtol=1e-9, atol=1e-9), (name, key)
+                    else:
+                        assert shared == value, (name, key)
+        
+        print(f"✅ {len(single)} estrategias iguales con y sin la tabla de patas compartida")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en precios de patas compartidos: {e}")
+        traceback.print_exc()
+        return False
+
+def test_payoff_statistics():
+    """Prueba la probabilidad de ganancia cerrada contra Monte Carlo"""
+    print("\n🎲 Probando probabilidad de ganancia lognormal...")
+    
+    try:
+        from strategies import OptionsStrategies
+        import numpy as np
+        
+        strategies = OptionsStrategies()
+        S, T, r, sigma = 100, 0.25, 0.05, 0.3
+        
+        butterfly = strategies.butterfly_spread(S, 95, 100, 105, T, r, sigma)
+        
+        # Referencia Monte Carlo sobre el precio terminal
+        rng = np.random.default_rng(42)
+        final_prices = S * np.exp((r - 0.5 * sigma**2) * T + sigma * np.sqrt(T) * rng.standard_normal(200000))
+        payoffs = sum(
+            c['quantity'] * (np.maximum(final_prices - c['strike'], 0) - c['price'])
+            for c in butterfly['components']
+        )
+        mc_prob = (payoffs > 0).mean()
+        
+        assert abs(butterfly['probability_profit'] - mc_prob) < 0.01
+        assert abs(butterfly['expected_payoff'] - payoffs.mean()) < 0.05
+        print(f"✅ Butterfly - Prob. cerrada: {butterfly['probability_profit']:.3f}, Monte Carlo: {mc_prob:.3f}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en probabilidad de ganancia: {e}")
+        traceback.print_exc()
+        return False
+
+def test_pnl_surface():
+    """Prueba Black-Scholes vectorizado y la superficie de P&L antes de expiración"""
+    print("\n🗺️ Probando P&L a T+n días...")
+    
+    try:
+        import numpy as np
+        from options_calculator import OptionsCalculator
+        from strategies import OptionsStrategies
+        
+        calc = OptionsCalculator()
+        S = np.array([80.0, 100.0, 125.0])[:, None, None]
+        K = np.array([90.0, 100.0, 110.0])[None, :, None]
+        T = np.array([0.0, 0.1, 1.0])[None, None, :]
+        calls = calc.black_scholes_price(S, K, T, 0.05, 0.3, True)
+        puts = calc.black_scholes_price(S, K, T, 0.05, 0.3, False)
+        for (i, j, k), value in np.ndenumerate(calls):
+            s, strike, t = S[i, 0, 0], K[0, j, 0], T[0, 0, k]
+            assert np.isclose(value, calc.black_scholes_call(s, strike, t, 0.05, 0.3))
+            assert np.isclose(puts[i, j, k], calc.black_scholes_put(s, strike, t, 0.05, 0.3))
+        
+        strategies = OptionsStrategies()
+        S, T, r, sigma = 100.0, 30 / 365.25, 0.05, 0.3
+        for strategy in (strategies.covered_call(S, 105, T, r, sigma),
+                         strategies.iron_condor(S, 90, 95, 105, 110, T, r, sigma),
+                         strategies.butterfly_spread(S, 95, 100, 105, T, r, sigma, 'put')):
+            surface = strategies.pnl_surface(strategy, T, r, sigma, days_elapsed=[0, 10, 30])
+            assert surface['pnl'].shape == (3, len(strategy['prices']))
+            # En la expiración la superficie es el payoff; hoy, al precio actual, el P&L es nulo
+            assert np.allclose(surface['pnl'][-1], strategy['payoffs'])
+            assert abs(strategies.pnl_surface(strategy, T, r, sigma, [0], [S])['pnl'][0, 0]) < 1e-9
+        print(f"✅ {calls.size * 2} precios vectorizados y superficies {surface['pnl'].shape}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en superficie de P&L: {e}")
+        traceback.print_exc()
+        return False
+
+def test_calendar_spreads():
+    """Prueba calendar y diagonal spreads: P&L a la expiración cercana con IV por vencimiento"""
+    print("\n📆 Probando calendar y diagonal spreads...")
+    
+    try:
+        import numpy as np
+        from options_calculator import OptionsCalculator
+        from strategies import OptionsStrategies
+        from strategy_search import StrikeIndex
+        
+        bs = OptionsCalculator.black_scholes_price
+        strategies = OptionsStrategies()
+        S, r, T_near, T_far, sigma_near, sigma_far = 100.0, 0.05, 30 / 365.25, 90 / 365.25, 0.30, 0.25
+        
+        diagonal = strategies.diagonal_spread(S, 105, 100, T_near, T_far, r, sigma_near, sigma_far)
+        net_cost = bs(S, 100, T_far, r, sigma_far) - bs(S, 105, T_near, r, sigma_near)
+        prices = np.array(diagonal['prices'])
+        expected = bs(prices, 100, T_far - T_near, r, sigma_far) - np.maximum(prices - 105, 0) - net_cost
+        assert np.isclose(diagonal['net_cost'], net_cost)
+        assert np.allclose(diagonal['payoffs'], expected)
+        # La superficie T+n revalúa cada pata con su propio vencimiento y volatilidad
+        surface = strategies.pnl_surface(diagonal, T_near, r, sigma_near, days_elapsed=[30])
+        assert np.allclose(surface['pnl'][0], diagonal['payoffs'])
+        
+        # Calendar de ancho nulo (mismo vencimiento y volatilidad): P&L idénticamente cero
+        flat = strategies.calendar_spread(S, 100, T_near, T_near, r, sigma_near, option_type='put')
+        assert abs(flat['net_cost']) < 1e-12 and np.allclose(flat['payoffs'], 0)
+        assert flat['probability_profit'] == 0 and abs(flat['expected_payoff']) < 1e-9
+        
+        # Un calendar comprado gana si el subyacente queda cerca del strike
+        calendar = strategies.calendar_spread(S, 100, T_near, T_far, r, sigma_near, sigma_far)
+        assert calendar['max_loss'] < 0 < calendar['max_profit'] and 0 < calendar['probability_profit'] < 1
+        
+        # Pata cercana vencida o sin volatilidad: P&L determinístico en S * e^{rT}, sin NaN
+        for near_T, near_sigma in ((0.0, sigma_near), (T_near, 0.0)):
+            degenerate = strategies.diagonal_spread(S, 105, 100, near_T, T_far, r, near_sigma, sigma_far)
+            terminal = S * np.exp(r * near_T)
+            pnl = bs(terminal, 100, T_far - near_T, r, sigma_far) - max(terminal - 105, 0) - degenerate['net_cost']
+            assert np.isfinite(degenerate['payoffs']).all()
+            assert np.isclose(degenerate['expected_payoff'], pnl)
+            assert degenerate['probability_profit'] == float(pnl > 0)
+            assert degenerate['max_loss'] <= pnl <= degenerate['max_profit']
+        
+        all_strategies = strategies.analyze_all_strategies(S, T_near, r, sigma_near, [95, 100, 105],
+                                                           T_far=T_far, sigma_far=sigma_far)
+        ranked = [name for name, _, _ in strategies.rank_strategies(all_strategies)]
+        assert {'calendar_call', 'diagonal_call'} <= set(ranked)
+        assert all_strategies['calendar_call']['components'][1]['sigma'] == sigma_far
+        
+        # IV ATM de la cadena para la pata lejana (sonrisa sintética con mínimo 30% en S)
+        chain = build_synthetic_chain(S, r=r)
+        far = StrikeIndex.nearest_expiration(chain, 90)
+        assert abs(StrikeIndex(chain[far], far).atm_iv(S) - 0.30) < 1e-9
+        
+        # Pata lejana a precio de mercado: el mid del siguiente vencimiento listado
+        expirations = sorted(chain)
+        near_index = StrikeIndex(chain[expirations[0]], expirations[0])
+        far_expiration = StrikeIndex.next_expiration(chain, expirations[0])
+        assert far_expiration == expirations[1] and StrikeIndex.next_expiration(chain, expirations[-1]) is None
+        far_index = StrikeIndex(chain[far_expiration], far_expiration)
+        K_short, K_long = near_index.nearest(S * 1.05), near_index.nearest(S)
+        listed = strategies.diagonal_spread(
+            S, K_short, K_long, OptionsCalculator.time_to_expiration(expirations[0]),
+            OptionsCalculator.time_to_expiration(far_expiration), r, near_index.atm_iv(S), far_index.atm_iv(S),
+            leg_prices=near_index.leg_prices([K_short, K_long]), far_leg_prices=far_index.leg_prices([K_short, K_long])
+        )
+        near_leg, far_leg = listed['components']
+        assert np.isclose(near_leg['price'], near_index.leg_prices([K_short]).loc[K_short, 'call'])
+        assert np.isclose(far_leg['price'], far_index.leg_prices([K_long]).loc[K_long, 'call'])
+        assert np.isclose(listed['net_cost'], far_leg['price'] - near_leg['price'])
+        print(f"✅ Calendar: prob. {calendar['probability_profit']:.2f}, costo ${calendar['net_cost']:.2f}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en calendar/diagonal spreads: {e}")
+        traceback.print_exc()
+        return False
+
+def test_strategy_ranking():
+    """Prueba el ranking multi-criterio, la selección top-k y el frente de Pareto"""
+    print("\n🏅 Probando ranking de estrategias...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from strategies import OptionsStrategies
+        
+        table = pd.DataFrame({
+            'risk_reward':        [2.0, 1.0, 3.0, np.nan, 0.5],
+            'probability_profit': [0.6, 0.7, 0.5, 0.9,    0.4],
+            'max_loss':           [100, 50,  200, 10,     300]
+        }, index=list('abcde'))
+        
+        # Un dato faltante recibe el peor percentil, no el mejor
+        scores = OptionsStrategies.weighted_scores(table, {'risk_reward': 1.0})
+        assert scores[3] == scores.min() and scores[2] == scores.max()
+        penalized = OptionsStrategies.weighted_scores(table.assign(max_loss=[100, 50, 200, np.nan, 300]),
+                                                      {'max_loss': -1.0})
+        assert penalized[3] == penalized.min() and penalized[1] == penalized.max()
+        
+        values = np.array([0.3, 0.9, 0.1, 0.8, 0.5])
+        assert list(OptionsStrategies.top_k_indices(values, 3)) == [1, 3, 4]
+        assert list(OptionsStrategies.top_k_indices(values, 10)) == [1, 3, 4, 0, 2]
+        assert len(OptionsStrategies.top_k_indices(values, 0)) == 0
+        
+        # 'e' está dominada por 'a'; el resto negocia un criterio contra otro
+        front = OptionsStrategies.pareto_front(table.fillna(0).assign(max_loss=-table['max_loss']),
+                                               ['risk_reward', 'probability_profit', 'max_loss'])
+        assert set(front.index) == {'a', 'b', 'c', 'd'}
+        
+        # Bloques chicos: mismo frente que la comparación de todos contra todos
+        rng = np.random.default_rng(3)
+        cloud = pd.DataFrame(rng.normal(size=(500, 3)), columns=['x', 'y', 'z'])
+        fast = OptionsStrategies.pareto_front(cloud, ['x', 'y', 'z'], chunk_size=64)
+        values = cloud.to_numpy()
+        dominated = [(np.all(values >= row, axis=1) & np.any(values > row, axis=1)).any() for row in values]
+        assert set(fast.index) == set(cloud.index[~np.array(dominated)])
+        print(f"✅ Frente de Pareto con {len(fast)} de {len(cloud)} estrategias")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en ranking de estrategias: {e}")
+        traceback.print_exc()
+        return False
+
+def test_strategy_sweep():
+    """Prueba que el corte del barrido coincide con las métricas calculadas estrategia por estrategia"""
+    print("\n🧮 Probando barrido de estrategias...")
+    
+    try:
+        import numpy as np
+        from strategies import OptionsStrategies
+        from rates import RateCurve
+        
+        strategies = OptionsStrategies()
+        S, sigma = 100.0, 0.3
+        strikes = [90.0, 95.0, 100.0, 105.0, 110.0]
+        curve = RateCurve([0.25, 1.0, 2.0], [0.040, 0.045, 0.050])
+        
+        for rate in (0.05, curve):
+            sweep = strategies.sweep_strategy_metrics(S, rate, strikes, sigmas=[0.2, sigma, 0.4])
+            for days in (30, 90):
+                T = days / 365.25
+                r = float(curve(T)) if callable(rate) else rate
+                direct = strategies.analyze_all_strategies(S, T, r, sigma, strikes)
+                metrics = sweep.metrics(days, sigma)
+                assert set(metrics) == set(direct)
+                
+                # Cada métrica con la misma clave y convención de signo que el método de la estrategia
+                for name, row in metrics.items():
+                    assert row['strategy'] == direct[name]['strategy'], name
+                    for key, value in row.items():
+                        if key == 'strategy':
+                            continue
+                        expected = direct[name][key]
+                        assert np.isclose(value, expected, rtol=1e-6, atol=1e-9) or value == expected, (name, key)
+                
+                table = sweep.slice(days, sigma)
+                assert table.loc['iron_condor', 'cost_key'] == 'net_credit'
+                assert np.isclose(table.loc['iron_condor', 'cost'], direct['iron_condor']['net_credit'])
+        
+        # Las tablas resumen de "Todas" y de una sola estrategia muestran lo mismo
+        from visualizations import OptionsVisualizer
+        summary = OptionsVisualizer().create_strategy_summary_table
+        swept = summary(sweep.metrics(90, sigma)).drop(columns='Descripción')
+        single = summary(strategies.analyze_all_strategies(S, 90 / 365.25, float(curve(90 / 365.25)), sigma,
+                                                           strikes)).drop(columns='Descripción')
+        assert swept.equals(single)
+        
+        print(f"✅ Barrido de {len(sweep.names)} estrategias coincide con el cálculo directo")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en barrido de estrategias: {e}")
+        traceback.print_exc()
+        return False
+
+def test_replay_provider():
+    """Prueba DataFetcher sin red sobre un snapshot grabado"""
+    print("\n📼 Probando ReplayProvider...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from data_fetcher import DataFetcher
+        from options_calculator import OptionsCalculator
+        from providers import MarketDataProvider, ReplayProvider
+        from utils import widen_frame
+        
+        # La interfaz es abstracta: un proveedor incompleto no se puede instanciar
+        try:
+            MarketDataProvider()
+            raise AssertionError("MarketDataProvider no debería instanciarse")
+        except TypeError:
+            pass
+        
+        root = tempfile.mkdtemp()
+        intraday = build_synthetic_snapshot(root)
+        
+        fetcher = DataFetcher('GGAL', provider=ReplayProvider(root))
+        assert fetcher.store is None  # los datos reproducidos no se guardan
+        market_data = fetcher.get_market_data()
+        
+        assert abs(market_data['current_price'] - intraday['Close'].iloc[-1]) < 1e-9
+        assert len(market_data['options_chain']) == 3
+        # Solo se grabó ^TNX: curva plana en su tasa continua
+        assert abs(market_data['risk_free_rate'] - 0.045) < 1e-3
+        assert market_data['rate_curve'](10.0) == market_data['risk_free_rate']
+        assert 0 < market_data['historical_volatility'] < 1
+        assert fetcher.get_company_info()['beta'] == 1.2
+        print(f"✅ Datos reproducidos: precio ${market_data['current_price']:.2f}, "
+              f"{len(market_data['options_chain'])} vencimientos")
+        
+        # Cadena analizada: ticks dentro del mismo paso de precio comparten el análisis,
+        # una nueva descarga de la cadena no reutiliza el anterior
+        expiration = list(market_data['options_chain'])[0]
+        S = market_data['current_price']
+        analyzed = fetcher.get_analyzed_chain(expiration, 'calls', S, 0.045)
+        assert fetcher.get_analyzed_chain(expiration, 'calls', S * 1.0002, 0.045) is analyzed
+        # Se cachea compacto y se amplía para mostrarlo, igual al análisis sin compactar
+        memory = fetcher.analyzed_memory[(expiration, 'calls')]
+        assert analyzed['delta'].dtype == np.float32 and memory['after_bytes'] < memory['before_bytes']
+        wide = OptionsCalculator.analyze_option_chain(market_data['options_chain'][expiration]['calls'],
+                                                      DataFetcher.price_bucket(S), 0.045, expiration)
+        assert widen_frame(analyzed)['delta'].dtype == np.float64
+        assert np.allclose(widen_frame(analyzed)['delta'], wide['delta'], atol=1e-6)
+        print(f"✅ Memoria de la cadena analizada: {memory['before_bytes']:,} → {memory['after_bytes']:,} bytes")
+        assert DataFetcher.price_bucket(S * 1.01) != DataFetcher.price_bucket(S)
+        fetcher.invalidate_cache()
+        assert fetcher.get_analyzed_chain(expiration, 'calls', S, 0.045) is not analyzed
+        print("✅ Análisis de la cadena cacheado por descarga y paso de precio")
+        
+        # A velocidad de reproducción solo se ven las primeras barras
+        live = DataFetcher('GGAL', provider=ReplayProvider(root, speed=60))
+        assert len(live.provider.get_intraday('GGAL')) < len(intraday)
+        print("✅ Reproducción a velocidad configurable")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en ReplayProvider: {e}")
+        traceback.print_exc()
+        return False
+
+def test_chain_errors():
+    """Prueba que un vencimiento fallido o lento queda en chain_errors sin perder el resto"""
+    print("\n⏱️ Probando errores por vencimiento...")
+    
+    try:
+        import time
+        import tempfile
+        import threading
+        from config import API_CONFIG
+        from data_fetcher import DataFetcher
+        from providers import ReplayProvider
+        
+        root = tempfile.mkdtemp()
+        build_synthetic_snapshot(root)
+        expirations = ReplayProvider(root).get_expirations('GGAL')
+        
+        class FlakyProvider(ReplayProvider):
+            def get_option_chain(self, ticker, expiration):
+                if expiration == expirations[0]:
+                    raise ValueError("sin cotizaciones")
+                time.sleep(1.0 if expiration == expirations[1] else 0.2)
+                return super().get_option_chain(ticker, expiration)
+        
+        saved = dict(API_CONFIG)
+        API_CONFIG.update(TIMEOUT=0.5, MAX_WORKERS=1)
+        try:
+            fetcher = DataFetcher('GGAL', provider=FlakyProvider(root))
+            chain = fetcher.get_options_chain()
+        finally:
+            API_CONFIG.update(saved)
+        
+        # Con un solo worker el último vencimiento termina después de 0.5s de lote, pero
+        # dentro de su propio plazo
+        assert list(chain) == [expirations[2]]
+        assert fetcher.chain_errors[expirations[0]] == "sin cotizaciones"
+        assert fetcher.chain_errors[expirations[1]].startswith("timeout")
+        print(f"✅ {len(chain)} vencimiento descargado, errores: {fetcher.chain_errors}")
+        
+        # Workers colgados y más vencimientos que workers: los que nunca empiezan vencen
+        # con el plazo total y la descarga termina igual
+        release = threading.Event()
+        
+        class HungProvider(ReplayProvider):
+            def get_option_chain(self, ticker, expiration):
+                release.wait()
+                return super().get_option_chain(ticker, expiration)
+        
+        API_CONFIG.update(TIMEOUT=0.2, MAX_WORKERS=1)
+        hung = DataFetcher('GGAL', provider=HungProvider(root))
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(zip(
+            ('chain', 'errors', 'memory', 'fetched_at'), hung._fetch_options_chain(len(expirations))
+        )), daemon=True)
+        try:
+            worker.start()
+            worker.join(timeout=10)
+            assert not worker.is_alive()
+        finally:
+            API_CONFIG.update(saved)
+            release.set()
+        assert result['chain'] == {} and sorted(result['errors']) == sorted(expirations)
+        assert result['errors'][expirations[0]] == "timeout (0.2s)"
+        assert all(result['errors'][exp].startswith("timeout (sin empezar") for exp in expirations[1:])
+        print("✅ Vencimientos encolados detrás de workers colgados vencen con el plazo total")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en errores por vencimiento: {e}")
+        traceback.print_exc()
+        return False
+
+def test_consolidated_history():
+    """Prueba que la historia descargada una vez coincide con pedir cada período por separado"""
+    print("\n🗂️ Probando historia consolidada...")
+    
+    try:
+        import tempfile
+        import pandas as pd
+        from data_fetcher import DataFetcher
+        from providers import ReplayProvider
+        
+        root = tempfile.mkdtemp()
+        build_synthetic_snapshot(root)
+        
+        class CountingProvider(ReplayProvider):
+            calls = []
+            
+            def get_history(self, ticker, period="1y", start=None):
+                self.calls.append((ticker, period, start))
+                return super().get_history(ticker, period=period, start=start)
+        
+        provider = CountingProvider(root)
+        fetcher = DataFetcher('GGAL', provider=provider)
+        market_data = fetcher.get_market_data()
+        
+        assert [call for call in provider.calls if call[0] == 'GGAL'] == [('GGAL', fetcher.HISTORY_PERIOD, None)]
+        full_history = fetcher.get_historical_data(period=fetcher.HISTORY_PERIOD)
+        reference = ReplayProvider(root)
+        pd.testing.assert_frame_equal(market_data['historical_data'], reference.get_history('GGAL', period="1y"))
+        for period in ("6mo", "1y", fetcher.HISTORY_PERIOD):
+            pd.testing.assert_frame_equal(DataFetcher.slice_period(full_history, period),
+                                          reference.get_history('GGAL', period=period))
+        assert abs(market_data['current_price'] - reference.get_intraday('GGAL')['Close'].iloc[-1]) < 1e-9
+        print(f"✅ Una descarga de {fetcher.HISTORY_PERIOD} sirve a todos los períodos ({len(full_history)} ruedas)")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en historia consolidada: {e}")
+        traceback.print_exc()
+        return False
+
+def test_rate_curve():
+    """Prueba la curva de tasas, la conversión a tasa continua y el respaldo sin datos"""
+    print("\n🏦 Probando curva de tasas...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from config import RATES_CONFIG
+        from providers import ReplayProvider
+        from rates import RateCurve, RateService, to_continuous_rate
+        
+        curve = RateCurve([5.0, 0.25, 10.0], [0.040, 0.050, 0.045])
+        assert curve(0.25) == 0.050 and curve(5.0) == 0.040
+        assert np.isclose(curve(7.5), 0.0425)
+        # Plana fuera del rango de plazos
+        assert curve(0.01) == 0.050 and curve(30.0) == 0.045
+        assert np.allclose(curve(np.array([0.25, 7.5])), [0.050, 0.0425])
+        assert curve.to_dict() == {0.25: 0.050, 5.0: 0.040, 10.0: 0.045}
+        assert RateCurve.flat(0.03)(12.0) == 0.03
+        
+        # Bono con cupón semestral: (1 + y/2)^2 = e^r
+        assert np.isclose(np.exp(to_continuous_rate(4.0, '^TNX')), 1.02 ** 2)
+        # Letra a 13 semanas: precio por tasa de descuento, rendimiento continuo en base 365
+        price = 1 - 0.05 * 91 / 360
+        assert np.isclose(to_continuous_rate(5.0, '^IRX') * 91 / 365, -np.log(price))
+        assert to_continuous_rate(5.0, '^IRX') > 0.05
+        print(f"✅ r(7.5) = {curve(7.5):.4f}, ^TNX 4% = {to_continuous_rate(4.0, '^TNX'):.4%} continua")
+        
+        # Sin datos: la curva plana de respaldo se reintenta pronto, no a la hora
+        class CountingProvider(ReplayProvider):
+            calls = 0
+            
+            def get_histories(self, tickers, period="1y", start=None, interval="1d"):
+                CountingProvider.calls += 1
+                return super().get_histories(tickers, period=period, start=start, interval=interval)
+        
+        service = RateService(CountingProvider(tempfile.mkdtemp()), ttl=3600)
+        saved = RATES_CONFIG['FALLBACK_TTL']
+        RATES_CONFIG['FALLBACK_TTL'] = 0
+        try:
+            assert service.get_curve()(1.0) == RATES_CONFIG['DEFAULT_RATE']
+            service.get_curve()
+        finally:
+            RATES_CONFIG['FALLBACK_TTL'] = saved
+        assert CountingProvider.calls == 2
+        
+        root = tempfile.mkdtemp()
+        build_synthetic_snapshot(root, r=0.045)
+        service = RateService(CountingProvider(root), ttl=3600)
+        service.get_curve()
+        service.get_curve()
+        assert CountingProvider.calls == 3
+        print("✅ Curva de respaldo con TTL corto; curva descargada con TTL completo")
+        
+        # Primeras consultas concurrentes: ninguna ve la curva sin su marca de tiempo
+        import threading
+        service = RateService(CountingProvider(root), ttl=3600)
+        errors, curves = [], []
+        def read_curve():
+            try:
+                for _ in range(200):
+                    curves.append(service.get_curve())
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=read_curve) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors and len({id(curve) for curve in curves}) == 1
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en curva de tasas: {e}")
+        traceback.print_exc()
+        return False
+
+def test_strategy_search():
+    """Prueba el motor de búsqueda de estrategias sobre una cadena sintética"""
+    print("\n🔎 Probando StrategySearchEngine...")
+    
+    try:
+        from strategy_search import StrategySearchEngine
+        
+        engine = StrategySearchEngine()
+        results = engine.search(build_synthetic_chain(), S=100.0, r=0.05, top_k=10)
+        
+        assert len(results) == 10
+        assert results['score'].is_monotonic_decreasing
+        assert (results['max_loss'] > 0).all()
+        
+        # Un peso sobre un criterio inexistente se rechaza antes de buscar
+        try:
+            engine.search(build_synthetic_chain(), S=100.0, r=0.05, weights={'risk_reward': 1, 'theta': 1})
+            raise AssertionError("se aceptó un criterio de score desconocido")
+        except ValueError as e:
+            assert 'theta' in str(e) and 'liquidity' in str(e)
+        print(f"✅ {results.attrs['candidates_evaluated']} combinaciones evaluadas, mejor: "
+              f"{results.iloc[0]['strategy']} ({results.iloc[0]['legs']})")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en StrategySearchEngine: {e}")
+        traceback.print_exc()
+        return False
+
+def test_universe_split():
+    """Prueba la separación por ticker de una descarga masiva (sin red)"""
+    print("\n🌐 Probando UniverseFetcher...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from data_fetcher import UniverseFetcher
+        
+        idx = pd.bdate_range(end=datetime.now(), periods=30)
+        close = pd.DataFrame({'Close': np.linspace(10, 12, 30), 'Volume': 1.0}, index=idx)
+        # Un ADR y un ticker local con feriados distintos: huecos en NaN
+        local = close.copy()
+        local.iloc[::7] = np.nan
+        bulk = pd.concat({'GGAL': close, 'GGAL.BA': local}, axis=1)
+        
+        frames = UniverseFetcher.split_bulk_download(bulk, ['GGAL', 'GGAL.BA', 'YPF'])
+        assert len(frames['GGAL']) == 30
+        assert len(frames['GGAL.BA']) == 30 - len(local.index[::7])
+        assert frames['YPF'].empty
+        print(f"✅ Descarga masiva separada en {len(frames)} tickers")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en UniverseFetcher: {e}")
+        traceback.print_exc()
+        return False
+
+def test_ohlcv_store():
+    """Prueba el almacenamiento de historia en disco con anexado incremental"""
+    print("\n💾 Probando OHLCVStore...")
+    
+    try:
+        import os
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from concurrent.futures import ThreadPoolExecutor
+        from storage import OHLCVStore
+        
+        store = OHLCVStore(tempfile.mkdtemp())
+        idx = pd.bdate_range(end=datetime.now(), periods=40)
+        history = pd.DataFrame({'Close': np.linspace(10, 14, 40), 'Volume': 1.0}, index=idx)
+        
+        store.append('GGAL', history.iloc[:30])
+        # La última rueda guardada se vuelve a pedir y se reemplaza por la más reciente
+        update = history.iloc[29:].copy()
+        update.iloc[0, 0] = 99.0
+        merged = store.append('GGAL', update)
+        
+        assert len(merged) == 40
+        assert store.load('GGAL')['Close'].iloc[29] == 99.0
+        assert store.last_date('GGAL') == idx[-1]
+        print(f"✅ Historia guardada e incrementada: {len(merged)} ruedas")
+        
+        # Escrituras concurrentes del mismo ticker: cada una con su propio temporal
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda n: store.write('YPF', history.iloc[:n]), range(20, 40)))
+        ticker_dir = os.path.dirname(store.path_for('YPF'))
+        assert os.listdir(ticker_dir) == ['data.parquet']
+        assert 20 <= len(store.load('YPF')) < 40
+        print("✅ Escrituras concurrentes sin temporales compartidos")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en OHLCVStore: {e}")
+        traceback.print_exc()
+        return False
+
+def test_single_flight():
+    """Prueba que pedidos concurrentes con la misma clave compartan una descarga"""
+    print("\n🛬 Probando SingleFlight...")
+    
+    try:
+        import time
+        import threading
+        from utils import SingleFlight
+        
+        flight = SingleFlight()
+        calls = []
+        
+        def slow_fetch(ticker):
+            calls.append(ticker)
+            time.sleep(0.2)
+            return {'ticker': ticker}
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do(('GGAL', 'market_data'), slow_fetch, 'GGAL')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1 and len(results) == 8
+        assert all(result is results[0] for result in results)
+        assert flight.in_flight() == 0
+        print(f"✅ 8 pedidos concurrentes, {len(calls)} descarga ({flight.stats['shared']} compartidos)")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en SingleFlight: {e}")
+        traceback.print_exc()
+        return False
+
+def test_stale_while_revalidate():
+    """Prueba que ante fallas se sirvan los últimos datos válidos con backoff por ticker"""
+    print("\n🛟 Probando stale-while-revalidate...")
+    
+    try:
+        import time
+        import tempfile
+        import data_fetcher
+        from data_fetcher import DataFetcher, UniverseFetcher
+        from providers import ReplayProvider
+        from utils import CircuitBreaker
+        
+        breaker = CircuitBreaker(failure_threshold=2, base_delay=10)
+        breaker.record_failure('BYMA.BA', 'timeout')
+        assert not breaker.allow('BYMA.BA') and breaker.status('BYMA.BA')['state'] == 'backoff'
+        breaker.record_failure('BYMA.BA', 'timeout')
+        assert breaker.status('BYMA.BA')['state'] == 'open'
+        breaker.record_success('BYMA.BA')
+        assert breaker.allow('BYMA.BA')
+        print("✅ Backoff y circuito por ticker")
+        
+        root = tempfile.mkdtemp()
+        build_synthetic_snapshot(root, 'SWR')
+        provider = ReplayProvider(root)
+        fetcher = DataFetcher('SWR', provider=provider)
+        fresh = fetcher.get_market_data()
+        assert not fresh['is_stale'] and fresh['fetch_status']['state'] == 'closed'
+        
+        def failing(*args, **kwargs):
+            raise RuntimeError("429 Too Many Requests")
+        provider.get_intraday = provider.get_history = failing
+        # Simular que ya vencieron los TTL del cache de datos
+        data_fetcher._cache.clear()
+        
+        fresh_seconds = data_fetcher.FETCH_CONFIG['FRESH_SECONDS']
+        data_fetcher.FETCH_CONFIG['FRESH_SECONDS'] = 0
+        try:
+            stale = fetcher.get_market_data()
+            assert stale['current_price'] == fresh['current_price'] and stale['is_stale']
+            for _ in range(50):
+                if fetcher.fetch_status()['failures']:
+                    break
+                time.sleep(0.05)
+            assert fetcher.fetch_status()['state'] == 'backoff'
+        finally:
+            data_fetcher.FETCH_CONFIG['FRESH_SECONDS'] = fresh_seconds
+        print(f"✅ Datos de hace {stale['age_seconds']:.2f}s servidos mientras falla la descarga")
+        
+        # Primera descarga con excepción: datos vacíos y la falla cuenta para el circuito
+        first = DataFetcher('SWR2', provider=ReplayProvider(root))
+        first._fetch_market_data = lambda: failing()
+        empty = first.get_market_data()
+        assert empty['current_price'] is None and empty['is_stale']
+        assert empty['fetch_status']['failures'] == 1 and empty['fetch_status']['state'] == 'backoff'
+        print("✅ Falla en la primera descarga registrada en el circuito")
+        
+        # Universo con el circuito abierto: el ticker no se consulta y conserva su cadena
+        build_synthetic_snapshot(root, 'SWR3')
+        universe = UniverseFetcher(['SWR3'], provider=ReplayProvider(root))
+        good = universe.get_market_data()['SWR3']
+        assert good['options_chain'] and good['fetch_status']['state'] == 'closed'
+        breaker_key = universe.fetchers['SWR3']._breaker_key
+        for _ in range(data_fetcher.FETCH_CONFIG['FAILURE_THRESHOLD']):
+            data_fetcher._breaker.record_failure(breaker_key, 'timeout')
+        skipped = universe.get_market_data()['SWR3']
+        assert 'SWR3' in universe.skipped and skipped['fetch_status']['state'] == 'open'
+        assert len(skipped['options_chain']) == len(good['options_chain'])
+        assert DataFetcher('SWR3', provider=universe.provider).get_market_data()['options_chain']
+        
+        # Cadena fallida con precio e historia: cuenta como falla y no pisa la última buena
+        data_fetcher._breaker.record_success(breaker_key)
+        data_fetcher._cache.clear()
+        universe.provider.get_option_chain = failing
+        failed = universe.get_market_data()['SWR3']
+        assert failed['fetch_status']['failures'] == 1 and failed['fetch_status']['error'] == "sin cadena de opciones"
+        assert len(failed['options_chain']) == len(good['options_chain'])
+        print("✅ Tickers en backoff y cadenas fallidas conservan la última cadena válida")
+        
+        # Errores por vencimiento copiados al terminar: un worker vencido no los modifica después
+        data_fetcher._breaker.record_success(breaker_key)
+        universe = UniverseFetcher(['SWR3'], provider=ReplayProvider(root))
+        data = universe.get_market_data()['SWR3']
+        universe.fetchers['SWR3'].chain_errors['2099-01-01'] = "timeout"
+        assert data['options_chain_errors'] == universe.chain_errors['SWR3'] == {}
+        
+        # Período 'max' con historia en disco: sin inicio fijo se baja el período completo
+        from storage import OHLCVStore
+        universe = UniverseFetcher(['SWR3'], provider=ReplayProvider(root), store=OHLCVStore(tempfile.mkdtemp()))
+        assert not universe.update_histories('max')['SWR3'].empty
+        assert not universe.update_histories('max')['SWR3'].empty
+        print("✅ Errores de cadena copiados al terminar y período 'max' sin chequeo de cobertura")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en stale-while-revalidate: {e}")
+        traceback.print_exc()
+        return False
+
+def test_indicator_engine():
+    """Prueba que las actualizaciones O(1) coincidan con el cálculo en bloque"""
+    print("\n📐 Probando IndicatorEngine...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from indicators import IndicatorEngine
+        
+        rng = np.random.default_rng(7)
+        idx = pd.bdate_range(end=datetime.now(), periods=400)
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 400))), index=idx)
+        
+        bulk = IndicatorEngine().backfill(close)
+        assert np.allclose(bulk['sma_20'], close.rolling(20).mean(), equal_nan=True)
+        log_returns = np.log(close / close.shift(1))
+        assert np.allclose(bulk['vol_100'], log_returns.rolling(100).std() * np.sqrt(252), equal_nan=True)
+        
+        # Backfill parcial y luego barras nuevas (con una revisión de la rueda en curso)
+        engine = IndicatorEngine()
+        engine.backfill(close.iloc[:300])
+        for timestamp, price in close.iloc[300:].items():
+            engine.update(price * 1.02, timestamp)
+            engine.update(price, timestamp)
+        assert np.allclose(engine.frame, bulk, equal_nan=True)
+        assert 0 <= engine.snapshot()['rsi'] <= 100
+        print(f"✅ {len(close) - 300} barras incrementales iguales al cálculo en bloque "
+              f"(RSI {engine.snapshot()['rsi']:.1f})")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en IndicatorEngine: {e}")
+        traceback.print_exc()
+        return False
+
+def test_intraday_poller():
+    """Prueba que el sondeo intradía pida y publique solo las barras nuevas"""
+    print("\n⏲️ Probando IntradayPoller...")
+    
+    try:
+        import tempfile
+        from intraday import IntradayPoller
+        from providers import ReplayProvider
+        
+        root = tempfile.mkdtemp()
+        intraday = build_synthetic_snapshot(root, 'POLL')
+        provider = ReplayProvider(root, speed=1)
+        poller = IntradayPoller(provider)
+        deltas = []
+        poller.subscribe(lambda ticker, delta: deltas.append(delta), 'POLL')
+        
+        first = poller.poll('POLL')
+        # Adelantar el reloj de la reproducción 10 minutos de mercado
+        provider._started -= 600
+        second = poller.poll('POLL')
+        
+        assert len(second) <= 11 and second.index[0] >= first.index[-1]
+        assert poller.stats['rows_received'] < len(intraday)
+        assert poller.last_price('POLL') == second['Close'].iloc[-1]
+        assert len(deltas) == 2 and poller.poll('POLL').empty
+        print(f"✅ {poller.stats['polls']} sondeos, {poller.stats['rows_received']} filas recibidas "
+              f"({len(poller.series('POLL'))} barras en memoria)")
+        
+        # El suscriptor de indicadores solo revisa la rueda en curso, en cualquier zona horaria
+        import numpy as np
+        import pandas as pd
+        from data_fetcher import DataFetcher
+        from indicators import IndicatorEngine
+        
+        days = pd.bdate_range(end='2025-03-14', periods=300, tz='America/New_York')
+        engine = IndicatorEngine()
+        engine.backfill(pd.Series(np.linspace(90, 110, 300), index=days))
+        on_delta = DataFetcher._intraday_listener(engine)
+        minute = pd.Timestamp('2025-03-14 15:30', tz='America/New_York')
+        
+        on_delta('POLL', pd.DataFrame({'Close': [111.0]}, index=[minute.tz_convert('UTC')]))
+        assert engine.last_close == 111.0 and engine.last_timestamp == days[-1]
+        on_delta('POLL', pd.DataFrame({'Close': [112.0]}, index=[minute.tz_localize(None)]))
+        assert engine.last_close == 112.0
+        # Rueda siguiente todavía fuera de la historia diaria: no se agrega una barra sintética
+        on_delta('POLL', pd.DataFrame({'Close': [120.0]}, index=[minute + pd.Timedelta(days=3)]))
+        assert engine.last_close == 112.0 and engine.last_timestamp == days[-1]
+        assert len(engine.frame) == 300
+        print("✅ Rueda en curso revisada con barras UTC y sin zona horaria")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en IntradayPoller: {e}")
+        traceback.print_exc()
+        return False
+
+def test_chain_snapshot_store():
+    """Prueba que los snapshots de cadenas se guarden compactos y se consulten por contrato"""
+    print("\n🗂️ Probando ChainSnapshotStore...")
+    
+    try:
+        import os
+        import tempfile
+        from datetime import datetime, timedelta
+        from storage import ChainSnapshotStore
+        
+        store = ChainSnapshotStore(tempfile.mkdtemp())
+        chain = build_synthetic_chain()
+        start = datetime(2025, 1, 13, 15, 0)
+        for day in range(3):
+            for i in range(10):
+                snapshot_time = start + timedelta(days=day, seconds=30 * i)
+                snapshot = ChainSnapshotStore.build_snapshot(chain, 100.0 + i * 0.1, 0.05, snapshot_time)
+                store.append('SNAP', snapshot)
+        
+        # Los días anteriores quedan compactados en un solo archivo (en segundo plano)
+        store.flush()
+        assert len(store._files('SNAP', end=start + timedelta(days=1))) == 2
+        assert store._compacted == {'SNAP': (start + timedelta(days=2)).date()}
+        
+        # Un día con lock de otro proceso no se toca; un lock abandonado se recupera
+        day = (start + timedelta(days=2)).date()
+        lock_path = os.path.join(store.day_dir('SNAP', day), ChainSnapshotStore.LOCK_FILE)
+        open(lock_path, 'w').close()
+        assert store.compact('SNAP', day) is None
+        os.utime(lock_path, (0, 0))
+        assert store.compact('SNAP', day) is not None
+        assert os.listdir(store.day_dir('SNAP', day)) == ['data.parquet']
+        contract = chain[list(chain)[0]]['calls']['contractSymbol'].iloc[10]
+        series = store.query('SNAP', contract=contract)
+        assert len(series) == 30 and series['snapshot_time'].is_monotonic_increasing
+        assert str(series['impliedVolatility'].dtype) == 'float32'
+        # Delta de un call: crece con el subyacente dentro del día
+        assert (series['delta'].iloc[:10].diff().dropna() > 0).all()
+        
+        # Compactación a medio terminar: data.parquet y partes viejas sin borrar no duplican filas
+        import shutil
+        day_dir = store.day_dir('SNAP', day)
+        data_path = os.path.join(day_dir, 'data.parquet')
+        leftover = os.path.join(day_dir, 'part-leftover.parquet')
+        shutil.copy(data_path, leftover)
+        os.utime(leftover, (os.path.getmtime(data_path) - 60,) * 2)
+        assert len(store.query('SNAP', contract=contract)) == 30
+        os.remove(leftover)
+        
+        # Una parte borrada entre el listado y la lectura se resuelve volviendo a listar
+        list_files = store._files
+        calls = []
+        def racing_files(*args):
+            calls.append(args)
+            files = list_files(*args)
+            return files + [os.path.join(day_dir, 'part-gone.parquet')] if len(calls) == 1 else files
+        store._files = racing_files
+        assert len(store.query('SNAP', contract=contract)) == 30 and len(calls) == 2
+        del store._files
+        
+        puts = store.query('SNAP', option_type='put', strike_range=(95, 105),
+                           start=start + timedelta(days=2))
+        assert set(puts['optionType']) == {'put'} and puts['strike'].between(95, 105).all()
+        
+        atm_iv = store.atm_iv_history('SNAP')
+        rank = ChainSnapshotStore.iv_rank(atm_iv)
+        assert len(atm_iv) == 30 and 0 <= rank['iv_rank'] <= 100
+        print(f"✅ {len(series)} snapshots del contrato, {len(puts)} filas de puts filtradas")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en ChainSnapshotStore: {e}")
+        traceback.print_exc()
+        return False
+
+def test_compact_chain():
+    """Prueba que la cadena compacta ocupe menos memoria y analice igual que la original"""
+    print("\n🗜️ Probando cadenas con tipos compactos...")
+    
+    try:
+        import numpy as np
+        from data_fetcher import DataFetcher
+        from options_calculator import OptionsCalculator
+        from strategy_search import StrikeIndex
+        
+        chain = build_synthetic_chain()
+        expiration = list(chain)[0]
+        raw = chain[expiration]['calls'].assign(currency='USD', contractSize='REGULAR', inTheMoney=False)
+        compact, memory = DataFetcher.compact_chain({expiration: {'calls': raw}})
+        calls = compact[expiration]['calls']
+        
+        assert memory['after_bytes'] < memory['before_bytes']
+        assert 'currency' not in calls.columns and calls['strike'].dtype == np.float32
+        
+        full = OptionsCalculator.analyze_option_chain(raw, 100.0, 0.05, expiration)
+        small = OptionsCalculator.analyze_option_chain(calls, 100.0, 0.05, expiration)
+        assert np.allclose(full['delta'], small['delta'], atol=1e-4)
+        # El análisis y los strikes listados salen en float64 con los valores cotizados
+        assert small['impliedVolatility'].dtype == np.float64 and small['strike'].dtype == np.float64
+        assert small['strike'].tolist() == raw['strike'].tolist()
+        assert np.array_equal(StrikeIndex(compact[expiration]).strikes, raw['strike'].to_numpy())
+        print(f"✅ Memoria de la cadena: {memory['before_bytes']:,} → {memory['after_bytes']:,} bytes")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en cadenas compactas: {e}")
+        traceback.print_exc()
+        return False
+
+def test_reference_cache():
+    """Prueba que los datos de referencia se descarguen una vez y se relean de disco"""
+    print("\n📇 Probando ReferenceDataCache...")
+    
+    try:
+        import tempfile
+        from providers import ReplayProvider
+        from reference import ReferenceDataCache
+        
+        root = tempfile.mkdtemp()
+        build_synthetic_snapshot(root, 'REF')
+        provider = ReplayProvider(root)
+        data_dir = tempfile.mkdtemp()
+        
+        cache = ReferenceDataCache(provider, root=data_dir, persist=True)
+        assert cache.prefetch(['REF']) == {}
+        assert cache.get_info('REF')['beta'] == 1.2
+        assert cache.get_expirations('REF') == provider.get_expirations('REF')
+        assert cache.stats['fetches'] == 2 and cache.stats['hits'] == 2
+        
+        # Otro proceso (otra instancia) lee de disco sin consultar al proveedor
+        other = ReferenceDataCache(provider, root=data_dir, persist=True)
+        assert other.get_info('REF')['beta'] == 1.2
+        assert other.stats['disk_hits'] == 1 and other.stats['fetches'] == 0
+        print(f"✅ {cache.stats['fetches']} descargas, {other.stats['disk_hits']} lectura de disco")
+        
+        # La precarga se lanza una sola vez aunque se pida en cada rerun
+        thread = other.start_prefetch(['REF'])
+        assert other.start_prefetch(['REF']) is thread
+        thread.join()
+        
+        # Reproducción de un snapshot viejo: los vencimientos ya pasados se conservan
+        from data_fetcher import DataFetcher
+        from providers import record_snapshot
+        
+        old_root = tempfile.mkdtemp()
+        chain = build_synthetic_chain()
+        past = {f"2024-0{i + 1}-19": expiration_chain for i, expiration_chain in enumerate(chain.values())}
+        record_snapshot('OLD', old_root, provider.get_history('REF'), options_chain=past)
+        replay = ReplayProvider(old_root)
+        assert ReferenceDataCache(replay, persist=False).get_expirations('OLD') == list(past)
+        old_chain = DataFetcher('OLD', provider=replay).get_options_chain()
+        assert list(old_chain) == list(past)
+        print(f"✅ Reproducción con {len(old_chain)} vencimientos pasados")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en ReferenceDataCache: {e}")
+        traceback.print_exc()
+        return False
+
+def test_data_cache():
+    """Prueba el cache LRU con TTL: límites, desalojo, vencimientos y concurrencia"""
+    print("\n🧠 Probando DataCache...")
+    
+    try:
+        import time
+        import threading
+        import numpy as np
+        from utils import DataCache
+        
+        cache = DataCache(ttl_seconds=60, max_entries=3)
+        for key in 'abc':
+            cache.set(key, key.upper())
+        cache.get('a')                      # 'a' pasa a ser la más usada
+        cache.set('d', 'D')                 # desaloja 'b', la menos usada
+        assert 'b' not in cache and cache.get('a') == 'A' and cache.stats['evictions'] == 1
+        
+        cache.set('short', 1, ttl=0.01)     # TTL propio de la clave
+        time.sleep(0.02)
+        assert cache.get('short') is None and cache.stats['expirations'] == 1
+        
+        sized = DataCache(max_bytes=100_000)
+        for i in range(5):
+            sized.set(i, np.zeros(4_000))   # 32 KB cada uno
+        assert sized.nbytes <= 100_000 and sized.size() == 3
+        sized.set('huge', np.zeros(20_000))  # más grande que todo el cache
+        assert 'huge' not in sized
+        # Un valor nuevo que no entra descarta el anterior de la misma clave
+        sized.set('k', np.zeros(10))
+        sized.set('k', np.zeros(20_000))
+        assert sized.get('k') is None and sized.size() == 3
+        
+        shared = DataCache(max_entries=50)
+        def worker(offset):
+            for i in range(1000):
+                shared.set((offset + i) % 80, i)
+                shared.get(i % 80)
+        threads = [threading.Thread(target=worker, args=(n * 10,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(shared) == 50 and shared.stats['hits'] + shared.stats['misses'] == 8000
+        print(f"✅ Aciertos {shared.stats['hits']}, fallos {shared.stats['misses']}, "
+              f"desalojos {shared.stats['evictions']}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en DataCache: {e}")
+        traceback.print_exc()
+        return False
+
+def test_disk_cache():
+    """Prueba que el cache en disco se comparta entre instancias (procesos) con TTL"""
+    print("\n💽 Probando DiskCache y TieredCache...")
+    
+    try:
+        import os
+        import time
+        import tempfile
+        from utils import DataCache
+        from disk_cache import DiskCache, TieredCache
+        
+        path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+        chain = build_synthetic_chain()
+        key = ('YFinanceProvider', 'GGAL', 'options_chain', 6)
+        
+        writer = TieredCache(DataCache(), DiskCache(path))
+        writer.set(key, chain, ttl=60)
+        writer.set(('YFinanceProvider', 'GGAL', 'price'), 100.0, ttl=0.05)
+        
+        # Otra réplica: memoria vacía, mismo archivo
+        reader = TieredCache(DataCache(), DiskCache(path))
+        shared = reader.get(key)
+        expiration = list(chain)[0]
+        assert shared[expiration]['calls'].equals(chain[expiration]['calls'])
+        assert reader.stats['disk_hits'] == 1
+        reader.get(key)
+        assert reader.stats['hits'] == 1 and reader.stats['disk_hits'] == 1  # promovido a memoria
+        
+        time.sleep(0.06)
+        assert reader.get(('YFinanceProvider', 'GGAL', 'price')) is None
+        assert reader.disk.prune() == 1 and len(reader.disk) == 1
+        stored_bytes = writer.disk.nbytes
+        
+        # Limpieza por ticker: clear solo toca la memoria, clear_disk el disco compartido
+        other_key = ('YFinanceProvider', 'YPF', 'options_chain', 6)
+        writer.set(other_key, chain, ttl=60)
+        writer.clear('GGAL')
+        assert writer.memory.get(key) is None and writer.memory.get(other_key) is not None
+        assert key in DiskCache(path)
+        writer.clear_disk('GGAL')
+        assert key not in DiskCache(path) and other_key in DiskCache(path)
+        print(f"✅ Cadena compartida entre réplicas ({stored_bytes:,} bytes en disco)")
+        
+        # Cambiar de ticker limpia solo la memoria; el refresco explícito también el disco
+        import data_fetcher
+        from data_fetcher import DataFetcher
+        from providers import ReplayProvider
+        from storage import OHLCVStore, ChainSnapshotStore
+        
+        class LiveReplay(ReplayProvider):
+            LIVE = True
+        
+        root = tempfile.mkdtemp()
+        fetcher = DataFetcher('GGAL', provider=LiveReplay(root), store=OHLCVStore(root),
+                              chain_store=ChainSnapshotStore(root))
+        shared_cache = data_fetcher._cache
+        data_fetcher._cache = writer
+        try:
+            price_key = fetcher._flight_key('price')
+            writer.set(price_key, 100.0, ttl=60)
+            fetcher.invalidate_cache()
+            assert writer.memory.get(price_key) is None and price_key in DiskCache(path)
+            fetcher.invalidate_cache(disk=True)
+            assert price_key not in DiskCache(path) and other_key in DiskCache(path)
+        finally:
+            data_fetcher._cache = shared_cache
+        print("✅ Navegar entre tickers no borra el disco compartido")
+        
+        # Contadores consistentes con varios hilos
+        from concurrent.futures import ThreadPoolExecutor
+        counted = DiskCache(path)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: counted.set(('P', 'T', 'x', i % 50), i), range(400)))
+            list(executor.map(lambda i: counted.get(('P', 'T', 'x', i)), range(400)))
+        assert counted.stats['writes'] == 400 and counted._writes == 400
+        assert counted.stats['hits'] + counted.stats['misses'] == 400 and counted.stats['hits'] == 50
+        print(f"✅ Estadísticas del disco con 8 hilos: {counted.stats}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en DiskCache: {e}")
+        traceback.print_exc()
+        return False
+
+def test_payoff_matrix():
+    """Prueba el payoff vectorizado contra las estrategias y el esquema anterior de componentes"""
+    print("\n🧮 Probando payoff_matrix...")
+    
+    try:
+        import numpy as np
+        from strategies import OptionsStrategies
+        from utils import payoff_matrix, create_payoff_data
+        
+        strategies = OptionsStrategies()
+        S, T, r, sigma = 100.0, 30 / 365.25, 0.05, 0.3
+        built = [
+            strategies.covered_call(S, 105, T, r, sigma),
+            strategies.long_straddle(S, 100, T, r, sigma),
+            strategies.iron_condor(S, 90, 95, 105, 110, T, r, sigma)
+        ]
+        prices = np.array(built[0]['prices'])
+        matrix = payoff_matrix(built, prices)
+        assert matrix.shape == (3, len(prices))
+        for strategy in built:
+            # Cada estrategia trae su propia grilla de precios
+            assert np.allclose(payoff_matrix([strategy], strategy['prices'])[0], strategy['payoffs'])
+        
+        # Esquema anterior: 'entry_price' para acciones y 'premium' para opciones
+        legacy = [{'type': 'stock', 'quantity': 100, 'entry_price': 100.0},
+                  {'type': 'call', 'quantity': -1, 'strike': 105.0, 'premium': 2.0}]
+        grid, payoffs = create_payoff_data(legacy, (90, 110), 5)
+        assert payoffs == [-998.0, -498.0, 2.0, 502.0, 997.0]
+        print(f"✅ {matrix.shape[0]} estrategias x {matrix.shape[1]} precios en una pasada")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en payoff_matrix: {e}")
+        traceback.print_exc()
+        return False
+
+def test_portfolio_metrics_batch():
+    """Prueba las métricas por lote y móviles contra calculate_portfolio_metrics por serie"""
+    print("\n📐 Probando métricas de portafolio por lote...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from utils import (calculate_portfolio_metrics, calculate_portfolio_metrics_batch,
+                           rolling_portfolio_metrics)
+        
+        rng = np.random.default_rng(7)
+        returns = pd.DataFrame(rng.normal(0.0005, 0.02, (300, 20)),
+                               index=pd.bdate_range('2024-01-01', periods=300),
+                               columns=[f"T{i:02d}" for i in range(20)])
+        
+        batch = calculate_portfolio_metrics_batch(returns)
+        for column in ('T00', 'T13'):
+            single = calculate_portfolio_metrics(returns[column])
+            for metric, value in single.items():
+                assert np.isclose(batch.loc[column, metric], value)
+        
+        window = 63
+        rolling = rolling_portfolio_metrics(returns, window)
+        last = calculate_portfolio_metrics_batch(returns.iloc[-window:])
+        for metric in ('annual_return', 'annual_volatility', 'sharpe_ratio', 'max_drawdown', 'total_return'):
+            assert rolling[metric].shape == returns.shape
+            assert np.allclose(rolling[metric].iloc[-1], last[metric])
+        assert rolling['max_drawdown'].iloc[:window - 1].isna().all().all()
+        print(f"✅ {batch.shape[0]} series, Sharpe medio {batch['sharpe_ratio'].mean():.2f}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en métricas por lote: {e}")
+        traceback.print_exc()
+        return False
+
+def test_strike_index():
+    """Prueba StrikeIndex: búsqueda de strikes listados y precios de mercado por pata"""
+    print("\n🎯 Probando StrikeIndex...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from strategy_search import StrikeIndex
+        from strategies import OptionsStrategies
+        from utils import generate_strike_ladder
+        
+        S, r = 100.0, 0.05
+        chain = build_synthetic_chain(S, r=r)
+        expiration = StrikeIndex.nearest_expiration(chain, 45)
+        assert expiration == sorted(chain)[1]
+        index = StrikeIndex(chain[expiration], expiration)
+        
+        assert index.nearest(101.0) == 100.0
+        assert index.nearest(101.5) == 102.5
+        assert list(index.nearest([60.0, 98.0, 200.0])) == [70.0, 97.5, 130.0]
+        assert index.bracket(101.0) == (100.0, 102.5)
+        assert index.bracket(100.0) == (100.0, 100.0)
+        assert index.bracket(10.0) == (None, 70.0)
+        
+        # Objetivos que caen en el mismo strike listado se separan hacia el libre más cercano,
+        # de cualquier lado, y sin alejarse más de medio paso de la escalera
+        assert index.snap([100.0, 100.4, 100.8]) is None
+        assert index.snap([100.0, 100.4, 100.8], max_shift=2.5) == [97.5, 100.0, 102.5]
+        
+        def listed(strikes):
+            quotes = pd.DataFrame({'strike': strikes, 'bid': 1.0, 'ask': 1.2, 'lastPrice': 1.1,
+                                   'volume': 10, 'openInterest': 100, 'impliedVolatility': 0.3})
+            return StrikeIndex({'calls': quotes, 'puts': quotes})
+        
+        crowded = listed([96.9, 99.0, 101.2, 103.4])
+        assert crowded.snap([98.0, 100.0, 102.0], max_shift=1.5) == [96.9, 99.0, 101.2]
+        # Cadena rala o de un solo lado del spot: se vuelve a los strikes teóricos
+        targets = [90.0, 95.0, 100.0, 105.0, 110.0]
+        assert listed([50.0, 100.0, 101.0, 102.0, 103.0, 200.0]).snap(targets) is None
+        assert listed(np.arange(100.0, 130.1, 2.5)).snap(targets) is None
+        assert generate_strike_ladder(S, 5, 0.1, strike_index=listed(np.arange(100.0, 130.1, 2.5))) == targets
+        ladder = generate_strike_ladder(S, 5, 0.1, strike_index=index)
+        assert ladder == [90.0, 95.0, 100.0, 105.0, 110.0]
+        assert generate_strike_ladder(S, 5, 0.1, strike_index=StrikeIndex(
+            {'calls': chain[expiration]['calls'].head(2), 'puts': chain[expiration]['puts'].head(2)})) == \
+            [90.0, 95.0, 100.0, 105.0, 110.0]
+        
+        prices = index.leg_prices(ladder)
+        calls = chain[expiration]['calls'].set_index('strike')
+        mids = (calls['bid'] + calls['ask']) / 2
+        for K in ladder:
+            assert abs(prices.at[K, 'call'] - mids[K]) < 1e-9
+        assert index.implied_vol('put', 100.0) > 0
+        
+        # Las estrategias usan los precios de mercado y Black-Scholes donde falta el dato
+        strategies = OptionsStrategies()
+        T = strategies.calculator.time_to_expiration(expiration)
+        market = prices.copy()
+        market.loc[105.0, 'call'] = float('nan')
+        covered = strategies.covered_call(S, 100.0, T, r, 0.3, leg_prices=market)
+        assert abs(covered['premium_received'] - 100 * mids[100.0]) < 1e-9
+        fallback = strategies.covered_call(S, 105.0, T, r, 0.3, leg_prices=market)
+        model = strategies.covered_call(S, 105.0, T, r, 0.3)
+        assert abs(fallback['premium_received'] - model['premium_received']) < 1e-9
+        results = strategies.analyze_all_strategies(S, T, r, 0.3, ladder, leg_prices=prices)
+        assert abs(results[f'covered_call_{ladder[2]}']['premium_received'] - 100 * mids[ladder[2]]) < 1e-9
+        print(f"✅ {len(index)} strikes listados en {expiration}, escalera {ladder}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error en StrikeIndex: {e}")
+        traceback.print_exc()
+        return False
+
 def test_visualizations():
     """Prueba el módulo de visualizaciones"""
     print("\n📈 Probando OptionsVisualizer...")
@@ -295,8 +1643,33 @@ def main():
     tests = [
         ("Importaciones", test_imports),
         ("DataFetcher", test_data_fetcher),
+        ("UniverseFetcher", test_universe_split),
+        ("OHLCVStore", test_ohlcv_store),
+        ("ReplayProvider", test_replay_provider),
+        ("Errores por Vencimiento", test_chain_errors),
+        ("Historia Consolidada", test_consolidated_history),
+        ("Curva de Tasas", test_rate_curve),
+        ("SingleFlight", test_single_flight),
+        ("Stale-While-Revalidate", test_stale_while_revalidate),
+        ("IndicatorEngine", test_indicator_engine),
+        ("IntradayPoller", test_intraday_poller),
+        ("ChainSnapshotStore", test_chain_snapshot_store),
+        ("Cadenas compactas", test_compact_chain),
+        ("ReferenceDataCache", test_reference_cache),
+        ("DataCache", test_data_cache),
+        ("DiskCache", test_disk_cache),
+        ("payoff_matrix", test_payoff_matrix),
+        ("Métricas de portafolio por lote", test_portfolio_metrics_batch),
+        ("Índice de strikes listados", test_strike_index),
         ("OptionsCalculator", test_options_calculator),
         ("OptionsStrategies", test_strategies),
+        ("Patas Compartidas", test_shared_leg_prices),
+        ("Probabilidad de Ganancia", test_payoff_statistics),
+        ("P&L a T+n días", test_pnl_surface),
+        ("Calendar y Diagonal Spreads", test_calendar_spreads),
+        ("Ranking de Estrategias", test_strategy_ranking),
+        ("Barrido de Estrategias", test_strategy_sweep),
+        ("Búsqueda de Estrategias", test_strategy_search),
         ("OptionsVisualizer", test_visualizations),
         ("RiskAnalyzer", test_risk_analyzer),
         ("Configuración", test_config),
@@ -3,6 +3,12 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 
 def setup_logger(name: str) -> logging.Logger:
     """Configura un logger para el módulo"""
@@ -32,6 +38,18 @@ def validate_market_data(data: Dict) -> bool:
     
     return True
 
+def period_to_offset(period: str) -> Optional[pd.DateOffset]:
+    """Convierte un período de yfinance ('5d', '3mo', '1y', 'max') en un DateOffset"""
+    if period in (None, 'max'):
+        return None
+    if period == 'ytd':
+        return pd.DateOffset(days=datetime.now().timetuple().tm_yday - 1)
+    units = {'mo': 'months', 'wk': 'weeks', 'd': 'days', 'y': 'years'}
+    for suffix, unit in units.items():
+        if period.endswith(suffix):
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Período no soportado: {period}")
+
 def format_currency(amount: float, decimals: int = 2) -> str:
     """Formatea un número como moneda"""
     if amount == float('inf'):
@@ -55,8 +73,13 @@ def calculate_returns(prices: pd.Series, method: str = 'simple') -> pd.Series:
         raise ValueError("Method must be 'simple' or 'log'")
 
 def generate_strike_ladder(current_price: float, num_strikes: int = 5, 
-                          range_pct: float = 0.2) -> List[float]:
-    """Genera una escalera de strikes alrededor del precio actual"""
+                          range_pct: float = 0.2, strike_index=None) -> List[float]:
+    """
+    Genera una escalera de strikes alrededor del precio actual
+    
+    Con strike_index (strategy_search.StrikeIndex) los strikes se llevan a los
+    listados del vencimiento; si no alcanzan, se devuelven los teóricos.
+    """
     strikes = []
     step = (range_pct * 2) / (num_strikes - 1)
     
@@ -65,6 +88,10 @@ def generate_strike_ladder(current_price: float, num_strikes: int = 5,
         strike = current_price * multiplier
         strikes.append(round(strike, 2))
     
+    if strike_index is not None:
+        snapped = strike_index.snap(strikes)
+        if snapped is not None:
+            return snapped
     return strikes
 
 def calculate_moneyness(spot_price: float, strike_price: float) -> float:
@@ -107,35 +134,69 @@ def interpolate_volatility(strikes: List[float], vols: List[float],
     # Interpolación linear simple
     return np.interp(target_strike, strikes, vols)
 
+def _strategy_legs(strategy) -> List[Dict]:
+    """Patas de una estrategia: lista de componentes o diccionario con 'components'"""
+    if isinstance(strategy, dict):
+        return strategy.get('components', [])
+    return list(strategy)
+
+def payoff_matrix(strategies: List, prices) -> np.ndarray:
+    """
+    Payoff al vencimiento de muchas estrategias sobre una misma grilla de precios
+    
+    Todas las patas de todas las estrategias se evalúan juntas con broadcasting
+    (patas x precios) y se suman por estrategia.
+    
+    Los componentes aceptan el esquema de OptionsStrategies ('price' y 'multiplier')
+    y el anterior ('entry_price' para acciones, 'premium' para opciones):
+    
+        {'type': 'stock', 'quantity': 100, 'price': 50.0}
+        {'type': 'call', 'quantity': -1, 'strike': 55.0, 'price': 1.2, 'multiplier': 100}
+        {'type': 'put', 'quantity': 1, 'strike': 45.0, 'premium': 0.8}
+    
+    Args:
+        strategies: Lista de estrategias (listas de componentes o diccionarios con 'components')
+        prices: Grilla de precios del subyacente
+    
+    Returns:
+        Matriz (estrategias x precios)
+    """
+    prices = np.asarray(prices, dtype=float)
+    legs = [(i, leg) for i, strategy in enumerate(strategies) for leg in _strategy_legs(strategy)]
+    payoffs = np.zeros((len(strategies), len(prices)))
+    if not legs:
+        return payoffs
+    
+    owner = np.array([i for i, _ in legs])
+    kind = np.array([leg.get('type') for _, leg in legs])
+    quantity = np.array([leg.get('quantity', 0) * leg.get('multiplier', 1) for _, leg in legs], dtype=float)
+    strike = np.array([leg.get('strike', 0.0) for _, leg in legs], dtype=float)
+    entry = np.array([leg.get('price', leg.get('entry_price', leg.get('premium', 0.0))) for _, leg in legs],
+                     dtype=float)
+    
+    # Valor al vencimiento de cada pata (patas x precios); tipos desconocidos valen 0
+    grid = prices[None, :]
+    value = np.select(
+        [kind[:, None] == 'stock', kind[:, None] == 'call', kind[:, None] == 'put'],
+        [grid, np.maximum(grid - strike[:, None], 0), np.maximum(strike[:, None] - grid, 0)],
+        default=np.nan
+    )
+    leg_payoffs = np.where(np.isnan(value), 0.0, quantity[:, None] * (value - entry[:, None]))
+    np.add.at(payoffs, owner, leg_payoffs)
+    return payoffs
+
+def payoff_frame(strategies: Dict[str, List], prices) -> pd.DataFrame:
+    """Payoffs de varias estrategias con nombre como DataFrame (índice = precio) para exportar"""
+    prices = np.asarray(prices, dtype=float)
+    matrix = payoff_matrix(list(strategies.values()), prices)
+    return pd.DataFrame(matrix.T, index=pd.Index(prices, name='price'), columns=list(strategies))
+
 def create_payoff_data(strategy_components: List[Dict], price_range: Tuple[float, float], 
                       num_points: int = 100) -> Tuple[List[float], List[float]]:
     """Crea datos de payoff para una estrategia"""
     prices = np.linspace(price_range[0], price_range[1], num_points)
-    payoffs = []
-    
-    for price in prices:
-        total_payoff = 0
-        
-        for component in strategy_components:
-            if component['type'] == 'stock':
-                payoff = component['quantity'] * (price - component['entry_price'])
-            
-            elif component['type'] == 'call':
-                intrinsic = max(price - component['strike'], 0)
-                payoff = component['quantity'] * (intrinsic - component['premium'])
-            
-            elif component['type'] == 'put':
-                intrinsic = max(component['strike'] - price, 0)
-                payoff = component['quantity'] * (intrinsic - component['premium'])
-            
-            else:
-                payoff = 0
-            
-            total_payoff += payoff
-        
-        payoffs.append(total_payoff)
-    
-    return prices.tolist(), payoffs
+    payoffs = payoff_matrix([strategy_components], prices)[0]
+    return prices.tolist(), payoffs.tolist()
 
 def calculate_portfolio_metrics(returns: pd.Series) -> Dict[str, float]:
     """Calcula métricas básicas de un portafolio"""
@@ -161,6 +222,84 @@ def calculate_portfolio_metrics(returns: pd.Series) -> Dict[str, float]:
         'num_observations': len(returns)
     }
 
+def calculate_portfolio_metrics_batch(returns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Métricas de calculate_portfolio_metrics para muchas series a la vez
+    
+    Args:
+        returns: Retornos simples, una columna por serie (tickers, curvas de
+            estrategias). Los NaN (ruedas sin cotización) no cuentan como observaciones.
+    
+    Returns:
+        DataFrame con una fila por serie y columnas annual_return, annual_volatility,
+        sharpe_ratio, max_drawdown, total_return y num_observations
+    """
+    if returns.empty:
+        return pd.DataFrame(columns=['annual_return', 'annual_volatility', 'sharpe_ratio',
+                                     'max_drawdown', 'total_return', 'num_observations'])
+    
+    annual_return = returns.mean() * 252
+    annual_vol = returns.std() * np.sqrt(252)
+    sharpe_ratio = (annual_return / annual_vol).where(annual_vol > 0, 0.0)
+    
+    # Riqueza acumulada y drawdown de todas las columnas en una pasada
+    cumulative = np.cumprod(1 + returns.fillna(0).to_numpy(dtype=float), axis=0)
+    running_max = np.maximum.accumulate(cumulative, axis=0)
+    max_drawdown = (cumulative / running_max - 1).min(axis=0)
+    
+    return pd.DataFrame({
+        'annual_return': annual_return,
+        'annual_volatility': annual_vol,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'total_return': cumulative[-1] - 1,
+        'num_observations': returns.count()
+    }, index=returns.columns)
+
+def rolling_portfolio_metrics(returns: pd.DataFrame, window: int = 63) -> Dict[str, pd.DataFrame]:
+    """
+    Métricas de portafolio en ventanas móviles para todas las series
+    
+    Args:
+        returns: Retornos simples, una columna por serie (o una Serie)
+        window: Ruedas por ventana
+    
+    Returns:
+        {'annual_return', 'annual_volatility', 'sharpe_ratio', 'max_drawdown',
+        'total_return'}: DataFrames con el mismo índice y columnas que returns
+        (NaN hasta completar la primera ventana)
+    """
+    if isinstance(returns, pd.Series):
+        returns = returns.to_frame()
+    rolling = returns.rolling(window)
+    annual_return = rolling.mean() * 252
+    annual_vol = rolling.std() * np.sqrt(252)
+    sharpe_ratio = (annual_return / annual_vol).where(annual_vol > 0, 0.0).where(annual_vol.notna())
+    
+    # Log-riqueza: el retorno y el drawdown de una ventana son diferencias de log-riqueza
+    log_wealth = np.log1p(returns.fillna(0).to_numpy(dtype=float)).cumsum(axis=0)
+    total_return = np.full(log_wealth.shape, np.nan)
+    max_drawdown = np.full(log_wealth.shape, np.nan)
+    n = len(log_wealth)
+    if n >= window:
+        padded = np.vstack([np.zeros((1, log_wealth.shape[1])), log_wealth])
+        total_return[window - 1:] = np.expm1(padded[window:] - padded[:-window])
+        # Ventanas (n - window + 1, columnas, window); drawdown desde el máximo dentro de cada ventana
+        windows = np.lib.stride_tricks.sliding_window_view(log_wealth, window, axis=0)
+        peaks = np.maximum.accumulate(windows, axis=2)
+        max_drawdown[window - 1:] = np.expm1((windows - peaks).min(axis=2))
+    
+    def frame(values):
+        return pd.DataFrame(values, index=returns.index, columns=returns.columns)
+    
+    return {
+        'annual_return': annual_return,
+        'annual_volatility': annual_vol,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': frame(max_drawdown),
+        'total_return': frame(total_return)
+    }
+
 def validate_strategy_parameters(strategy_type: str, parameters: Dict) -> bool:
     """Valida parámetros de una estrategia"""
     required_params = {
@@ -224,6 +363,82 @@ def create_summary_statistics(data: pd.DataFrame, columns: List[str] = None) ->
     
     return stats
 
+def frame_memory_bytes(data: pd.DataFrame) -> int:
+    """Memoria ocupada por un DataFrame, incluyendo el contenido de los textos"""
+    if data is None:
+        return 0
+    return int(data.memory_usage(deep=True).sum())
+
+def compact_frame(data: pd.DataFrame, columns: List[str] = None,
+                  category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Normaliza un DataFrame a tipos compactos
+    
+    Args:
+        data: DataFrame a normalizar
+        columns: Columnas a conservar (las demás se descartan); None conserva todas
+        category_ratio: Los textos con menos valores distintos que esta fracción de
+            las filas pasan a categóricos
+    
+    Returns:
+        Copia con float32 en lugar de float64, enteros de 32 bits cuando alcanzan y
+        categorías para los textos repetidos
+    """
+    if data is None or data.empty:
+        return data
+    if columns is not None:
+        data = data[[column for column in columns if column in data.columns]]
+    
+    compact = {}
+    for column, values in data.items():
+        if pd.api.types.is_bool_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            compact[column] = values
+        elif pd.api.types.is_float_dtype(values):
+            compact[column] = values.astype('float32')
+        elif pd.api.types.is_integer_dtype(values):
+            # int32 y no menos: volúmenes y OI se suman y multiplican después
+            limits = np.iinfo(np.int32)
+            fits = values.empty or (values.min() >= limits.min and values.max() <= limits.max)
+            compact[column] = values.astype('int32') if fits else values
+        elif (isinstance(values.dtype, pd.CategoricalDtype) or
+              values.nunique(dropna=False) <= category_ratio * len(values)):
+            compact[column] = values.astype('category')
+        else:
+            compact[column] = values
+    return pd.DataFrame(compact, index=data.index)
+
+def widen_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deshace compact_frame para cálculo y presentación
+    
+    Los float32 vuelven a float64 pasando por su decimal más corto (12.35 y no
+    12.350000381469727, que es lo que dejaría un astype directo) y las categorías
+    vuelven a texto.
+    """
+    if data is None or data.empty:
+        return data
+    wide = {}
+    for column, values in data.items():
+        if values.dtype == np.float32:
+            wide[column] = values.astype(str).astype('float64')
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            wide[column] = values.astype(object)
+        else:
+            wide[column] = values
+    return pd.DataFrame(wide, index=data.index)
+
+def unique_temp_path(path: str) -> str:
+    """
+    Archivo temporal único junto a path, para escribir y luego os.replace
+    
+    Vive en el mismo directorio (mismo sistema de archivos, reemplazo atómico) y su
+    nombre no se comparte con otros hilos ni procesos que escriban el mismo destino.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    return tmp_path
+
 def export_strategy_report(strategy_data: Dict, filename: str = None) -> str:
     """Exporta un reporte de estrategia a CSV o texto"""
     if filename is None:
@@ -264,30 +479,242 @@ def export_strategy_report(strategy_data: Dict, filename: str = None) -> str:
         return ""
 
 class DataCache:
-    """Cache simple para datos de mercado"""
+    """
+    Cache en memoria acotado, con vencimiento por TTL y desalojo LRU
     
-    def __init__(self, ttl_seconds: int = 300):
-        self.cache = {}
+    Seguro entre hilos (sesiones de Streamlit). Los vencimientos usan el reloj
+    monotónico y cada clave puede tener su propio TTL.
+    
+    Args:
+        ttl_seconds: TTL por defecto de las entradas
+        max_entries: Cantidad máxima de entradas (None = sin límite)
+        max_bytes: Tamaño aproximado máximo del contenido (None = sin límite)
+    """
+    
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = None, max_bytes: int = None):
         self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # {clave: (valor, vencimiento en time.monotonic(), tamaño aproximado)}, del menos al más usado
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
     
-    def get(self, key: str):
-        """Obtiene un valor del cache"""
-        if key in self.cache:
-            data, timestamp = self.cache[key]
-            if (datetime.now() - timestamp).seconds < self.ttl:
-                return data
-            else:
-                del self.cache[key]
-        return None
+    @staticmethod
+    def estimate_size(value) -> int:
+        """Tamaño aproximado en bytes (DataFrames con memory_usage, contenedores recursivo)"""
+        if isinstance(value, pd.DataFrame):
+            return frame_memory_bytes(value)
+        if isinstance(value, pd.Series):
+            return int(value.memory_usage(deep=True))
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(DataCache.estimate_size(k) + DataCache.estimate_size(v)
+                                              for k, v in value.items())
+        if isinstance(value, (list, tuple, set)):
+            return sys.getsizeof(value) + sum(DataCache.estimate_size(item) for item in value)
+        return sys.getsizeof(value)
+    
+    def get(self, key, default=None):
+        """Obtiene un valor vigente del cache (y lo marca como recién usado)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+    
+    def set(self, key, value, ttl: float = None):
+        """
+        Almacena un valor en el cache
+        
+        Args:
+            ttl: TTL de esta clave en segundos (por defecto el del cache)
+        """
+        size = self.estimate_size(value) if self.max_bytes is not None else 0
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Más grande que todo el cache: no se guarda (ni queda el valor anterior)
+                return
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict()
+    
+    def get_or_set(self, key, func, ttl: float = None):
+        """Valor cacheado o, si no hay, el resultado de func() (que se cachea)"""
+        value = self.get(key)
+        if value is None:
+            value = func()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+    
+    def delete(self, key) -> bool:
+        """Descarta una clave; devuelve si existía"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+    
+    def _remove(self, key) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
     
-    def set(self, key: str, value):
-        """Almacena un valor en el cache"""
-        self.cache[key] = (value, datetime.now())
+    def _evict(self) -> None:
+        """Desaloja las entradas menos usadas hasta cumplir los límites (con el lock tomado)"""
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries) or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.stats['evictions'] += 1
     
-    def clear(self):
-        """Limpia el cache"""
-        self.cache.clear()
+    def clear(self, ticker: str = None):
+        """
+        Limpia el cache (o solo las claves de un ticker)
+        
+        Las claves por ticker son las de DataFetcher: (fuente, ticker, tipo, ...).
+        """
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [key for key in self._entries
+                        if isinstance(key, tuple) and len(key) >= 3 and key[1] == ticker]:
+                self._remove(key)
     
     def size(self):
         """Retorna el tamaño del cache"""
-        return len(self.cache)
+        return len(self._entries)
+    
+    @property
+    def nbytes(self) -> int:
+        """Tamaño aproximado del contenido en bytes"""
+        return self._bytes
+    
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SingleFlight:
+    """
+    Coalescencia de pedidos concurrentes
+    
+    Mientras hay una descarga en curso para una clave, los demás pedidos con la
+    misma clave esperan y reciben el mismo resultado (o la misma excepción) en lugar
+    de repetir la descarga.
+    """
+    
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+            self.waiters = 0
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'executed': 0, 'shared': 0}
+    
+    def do(self, key, func, *args, **kwargs):
+        """Ejecuta func(*args, **kwargs) una sola vez por clave entre los pedidos concurrentes"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['shared'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = self._Call()
+                self.stats['executed'] += 1
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        
+        if call.error is not None:
+            raise call.error
+        return call.result
+    
+    def in_flight(self) -> int:
+        """Cantidad de claves con una descarga en curso"""
+        with self._lock:
+            return len(self._calls)
+
+class CircuitBreaker:
+    """
+    Backoff exponencial y corte por clave (ej. por ticker)
+    
+    Cada falla consecutiva posterga el próximo intento base_delay * 2^(fallas-1)
+    segundos (hasta max_delay). Desde failure_threshold fallas el circuito queda
+    abierto: no se intenta hasta que vence la espera, y ese intento (semiabierto)
+    lo cierra si sale bien.
+    """
+    
+    def __init__(self, failure_threshold: int = 3, base_delay: float = 2.0, max_delay: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._state = {}
+    
+    def allow(self, key) -> bool:
+        """Indica si se puede intentar una descarga para la clave"""
+        with self._lock:
+            state = self._state.get(key)
+            return state is None or time.monotonic() >= state['retry_at']
+    
+    def record_success(self, key) -> None:
+        with self._lock:
+            self._state.pop(key, None)
+    
+    def record_failure(self, key, error: str = None) -> None:
+        with self._lock:
+            state = self._state.setdefault(key, {'failures': 0, 'retry_at': 0.0, 'error': None})
+            state['failures'] += 1
+            state['error'] = error
+            delay = min(self.max_delay, self.base_delay * 2 ** (state['failures'] - 1))
+            state['retry_at'] = time.monotonic() + delay
+    
+    def status(self, key) -> Dict:
+        """Estado de la clave: 'closed', 'backoff' u 'open', fallas, espera restante y último error"""
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                return {'state': 'closed', 'failures': 0, 'retry_in': 0.0, 'error': None}
+            return {
+                'state': 'open' if state['failures'] >= self.failure_threshold else 'backoff',
+                'failures': state['failures'],
+                'retry_in': max(0.0, state['retry_at'] - time.monotonic()),
+                'error': state['error']
+            }
@@ -22,9 +22,12 @@ class OptionsVisualizer:
             'dark': '#343a40'
         }
     
-    def plot_option_payoff(self, strategy_data: Dict, title: str = None) -> go.Figure:
+    def plot_option_payoff(self, strategy_data: Dict, title: str = None, pnl_surface: Dict = None) -> go.Figure:
         """
         Crea un gráfico de payoff para una estrategia de opciones
+        
+        Si se pasa pnl_surface (ver OptionsStrategies.pnl_surface) o la estrategia lo
+        incluye, agrega las curvas de P&L antes de expiración (hoy, T+n).
         """
         prices = strategy_data.get('prices', [])
         payoffs = strategy_data.get('payoffs', [])
@@ -45,6 +48,21 @@ class OptionsVisualizer:
             fillcolor='rgba(31, 119, 180, 0.1)'
         ))
         
+        # Curvas de P&L antes de expiración
+        pnl_surface = pnl_surface or strategy_data.get('pnl_surface')
+        if pnl_surface:
+            expiry_day = max(pnl_surface['days']) if len(pnl_surface['days']) else 0
+            curve_colors = [self.colors['secondary'], self.colors['info'], self.colors['warning'], self.colors['dark']]
+            curves = [(day, row) for day, row in zip(pnl_surface['days'], pnl_surface['pnl']) if day < expiry_day]
+            for i, (day, row) in enumerate(curves):
+                fig.add_trace(go.Scatter(
+                    x=pnl_surface['prices'],
+                    y=row,
+                    mode='lines',
+                    name='Hoy' if day == 0 else f'T+{day:g}',
+                    line=dict(color=curve_colors[i % len(curve_colors)], width=2, dash='dot')
+                ))
+        
         # Línea de breakeven
         fig.add_hline(y=0, line_dash="dash", line_color="gray", 
                      annotation_text="Breakeven")